@@ -0,0 +1,107 @@
+"""Incrementally maintained panel-wide aggregates for Span MAIN 40."""
+from __future__ import annotations
+
+import math
+from array import array
+from typing import TYPE_CHECKING, Any
+
+from .const import MAIN_FEED_KEY
+from .metrics_store import ROWS
+
+if TYPE_CHECKING:
+    from .span_client import CircuitMetrics
+
+# Sums are rebuilt from the per-circuit contributions after this many
+# updates, so floating-point error from add/subtract can't accumulate
+_RECOMPUTE_EVERY = 10_000
+
+
+def circuit_leg(circuit_id: int) -> int:
+    """Return the leg (0 = A, 1 = B) a single-phase circuit is assumed on.
+
+    This is an estimate, not a measurement: the panel reports neither the
+    breaker position nor the leg of a single-phase circuit. Circuit N is
+    taken to sit in breaker space N, and spaces alternate legs every row
+    of two (1-2 on A, 3-4 on B, ...), as in a standard split-phase load
+    center. A panel whose circuit numbering doesn't follow the spaces gets
+    a wrong split; totals that don't depend on the leg are unaffected.
+    """
+    return (circuit_id - 1) // 2 % 2
+
+
+class PanelAggregates:
+    """Total circuit power, per-leg current and unmetered load.
+
+    Each circuit update subtracts that circuit's previous contribution and
+    adds the new one, so an update is O(1) regardless of circuit count.
+    Dual-phase circuits put their measured leg currents on both legs;
+    single-phase circuits are placed by circuit_leg(), so the per-leg
+    currents and their imbalance are estimates.
+    """
+
+    def __init__(self) -> None:
+        """Initialize with every contribution at zero."""
+        self._power = array("d", bytes(8 * ROWS))
+        self._leg_a = array("d", bytes(8 * ROWS))
+        self._leg_b = array("d", bytes(8 * ROWS))
+        self.circuit_power_w = 0.0
+        self.leg_a_current_a = 0.0
+        self.leg_b_current_a = 0.0
+        self.main_power_w = 0.0
+        self._updates = 0
+        self.recomputes = 0
+
+    @property
+    def unmetered_power_w(self) -> float:
+        """Return main feed power not accounted for by any circuit."""
+        return self.main_power_w - self.circuit_power_w
+
+    @property
+    def leg_imbalance_a(self) -> float:
+        """Return the absolute current difference between the legs."""
+        return abs(self.leg_a_current_a - self.leg_b_current_a)
+
+    def update(self, key: int, metrics: CircuitMetrics, dual_phase: bool) -> None:
+        """Replace the contribution of one circuit (or the main feed)."""
+        if key == MAIN_FEED_KEY:
+            self.main_power_w = metrics.power_w
+            return
+        power = metrics.power_w
+        self.circuit_power_w += power - self._power[key]
+        self._power[key] = power
+        if dual_phase:
+            leg_a, leg_b = metrics.current_a_a, metrics.current_b_a
+        elif circuit_leg(key):
+            leg_a, leg_b = 0.0, metrics.current_a
+        else:
+            leg_a, leg_b = metrics.current_a, 0.0
+        self.leg_a_current_a += leg_a - self._leg_a[key]
+        self._leg_a[key] = leg_a
+        self.leg_b_current_a += leg_b - self._leg_b[key]
+        self._leg_b[key] = leg_b
+        self._updates += 1
+        if self._updates >= _RECOMPUTE_EVERY:
+            self.recompute()
+
+    def discard(self, key: int) -> None:
+        """Remove a circuit's contribution (e.g. it left the panel)."""
+        self._power[key] = self._leg_a[key] = self._leg_b[key] = 0.0
+        self.recompute()
+
+    def recompute(self) -> None:
+        """Rebuild the sums from the per-circuit contributions."""
+        self.circuit_power_w = math.fsum(self._power)
+        self.leg_a_current_a = math.fsum(self._leg_a)
+        self.leg_b_current_a = math.fsum(self._leg_b)
+        self._updates = 0
+        self.recomputes += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the aggregates for diagnostics."""
+        return {
+            "circuit_power_w": round(self.circuit_power_w, 1),
+            "unmetered_power_w": round(self.unmetered_power_w, 1),
+            "leg_a_current_a": round(self.leg_a_current_a, 2),
+            "leg_b_current_a": round(self.leg_b_current_a, 2),
+            "recomputes": self.recomputes,
+        }
@@ -9,10 +9,11 @@ from homeassistant.components.binary_sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN
+from .const import DOMAIN, SIGNAL_CIRCUITS_ADDED
 from .coordinator import SpanPanelCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -32,6 +33,20 @@ async def async_setup_entry(
 
     async_add_entities(entities)
 
+    @callback
+    def _async_add_circuits(circuit_ids: list[int]) -> None:
+        """Add breaker sensors for circuits found by a resync."""
+        async_add_entities(
+            SpanBreakerStateSensor(coordinator, entry, circuit_id)
+            for circuit_id in circuit_ids
+        )
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_CIRCUITS_ADDED.format(entry.entry_id), _async_add_circuits
+        )
+    )
+
 
 class SpanBreakerStateSensor(BinarySensorEntity):
     """Binary sensor for breaker state (ON/OFF based on voltage)."""
@@ -65,6 +80,11 @@ class SpanBreakerStateSensor(BinarySensorEntity):
             via_device=(DOMAIN, self._entry.data["host"]),
         )
 
+    @property
+    def available(self) -> bool:
+        """Return False while the panel stream is stale."""
+        return self._coordinator.available
+
     @property
     def is_on(self) -> bool | None:
         """Return true if breaker is ON (voltage present)."""
@@ -75,7 +95,7 @@ class SpanBreakerStateSensor(BinarySensorEntity):
 
     async def async_added_to_hass(self) -> None:
         self._remove_listener = self._coordinator.async_add_listener(
-            self._handle_update
+            self._handle_update, self._circuit_id
         )
 
     async def async_will_remove_from_hass(self) -> None:
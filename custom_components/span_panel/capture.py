@@ -0,0 +1,114 @@
+"""Recording of raw Subscribe responses for offline replay.
+
+A capture file is the magic header followed by one record per response:
+a little-endian int64 monotonic timestamp (ns), a uint32 payload length
+and the payload bytes exactly as received from the panel.
+"""
+from __future__ import annotations
+
+import struct
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO
+
+MAGIC = b"SPANCAP1"
+
+_RECORD = struct.Struct("<qI")
+
+# Buffered records are handed to the writer thread once they reach this
+# size (bytes) or this age (ns), whichever comes first
+_FLUSH_BYTES = 64 * 1024
+_FLUSH_INTERVAL_NS = 1_000_000_000
+
+
+class CaptureWriter:
+    """Append raw notifications with their receive time to a capture file.
+
+    Records are buffered in memory and written by a dedicated thread, which
+    also opens and closes the file, so no call blocks the event loop. The
+    thread takes chunks in order, so the file matches the write() order.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Start the writer thread and have it create (truncate) the file."""
+        self._path = path
+        self._file: BinaryIO | None = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="span_panel_capture"
+        )
+        self._executor.submit(self._open)
+        self._buffer = bytearray(MAGIC)
+        self._flushed_ns = time.monotonic_ns()
+        self.records = 0
+
+    def _open(self) -> None:
+        """Create the file (writer thread)."""
+        self._file = open(self._path, "wb")  # noqa: SIM115
+
+    def _write_chunk(self, chunk: bytes) -> None:
+        """Append a chunk of records (writer thread)."""
+        if self._file is not None:
+            self._file.write(chunk)
+
+    def _close_file(self) -> None:
+        """Flush and close the file (writer thread)."""
+        if self._file is not None:
+            self._file.close()
+
+    def write(self, data: bytes, timestamp_ns: int | None = None) -> None:
+        """Record one notification, stamped now unless timestamp_ns is given."""
+        now = time.monotonic_ns()
+        if timestamp_ns is None:
+            timestamp_ns = now
+        buffer = self._buffer
+        buffer += _RECORD.pack(timestamp_ns, len(data))
+        buffer += data
+        self.records += 1
+        if (
+            len(buffer) >= _FLUSH_BYTES
+            or now - self._flushed_ns >= _FLUSH_INTERVAL_NS
+        ):
+            self._flush(now)
+
+    def _flush(self, now: int) -> None:
+        """Hand the buffered records to the writer thread."""
+        if self._buffer:
+            self._executor.submit(self._write_chunk, bytes(self._buffer))
+            self._buffer.clear()
+        self._flushed_ns = now
+
+    def close(self) -> None:
+        """Write what is buffered, close the file and let the thread exit.
+
+        Returns at once; the thread finishes the queued writes on its own.
+        """
+        self._flush(time.monotonic_ns())
+        self._executor.submit(self._close_file)
+        self._executor.shutdown(wait=False)
+
+
+def is_capture(path: str) -> bool:
+    """Return True if path starts with the capture magic."""
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def read_capture(path: str) -> Iterator[tuple[int, bytes]]:
+    """Yield (timestamp_ns, payload) for each record of a capture file.
+
+    A record cut short (e.g. the client stopped mid-write) ends the
+    iteration.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a Span capture file")
+        while True:
+            header = file.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                return
+            timestamp_ns, length = _RECORD.unpack(header)
+            data = file.read(length)
+            if len(data) < length:
+                return
+            yield timestamp_ns, data
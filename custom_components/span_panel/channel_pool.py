@@ -0,0 +1,130 @@
+"""Shared gRPC channels to Span panels, keyed by host:port."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import grpc
+
+_LOGGER = logging.getLogger(__name__)
+
+_CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", True),
+]
+
+# Seconds an unused channel stays open, so config-flow validation followed
+# by setup, or an unload followed by a reload, reuses one connection
+LINGER = 60.0
+
+
+class _PooledChannel:
+    """A channel and the number of holders."""
+
+    __slots__ = ("target", "channel", "refs", "expire")
+
+    def __init__(self, target: str) -> None:
+        self.target = target
+        self.channel = grpc.aio.insecure_channel(target, options=_CHANNEL_OPTIONS)
+        self.refs = 0
+        self.expire: asyncio.TimerHandle | None = None
+
+
+class ChannelPool:
+    """Reference-counted registry of one gRPC channel per panel.
+
+    Everything talking to the same host:port shares a channel (and with
+    it the HTTP/2 connection). A channel is closed LINGER seconds after
+    its last holder releases it, unless it is acquired again first.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty pool."""
+        self._by_target: dict[str, _PooledChannel] = {}
+        # Every open channel, including ones replaced by renew()
+        self._by_channel: dict[int, _PooledChannel] = {}
+        self._closing: set[asyncio.Task] = set()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Return channel counts for diagnostics."""
+        return {
+            "channels": len(self._by_channel),
+            "holders": sum(pooled.refs for pooled in self._by_channel.values()),
+        }
+
+    def acquire(self, host: str, port: int) -> grpc.aio.Channel:
+        """Return the shared channel to host:port, opening it if needed."""
+        target = f"{host}:{port}"
+        pooled = self._by_target.get(target)
+        if pooled is None:
+            pooled = self._by_target[target] = _PooledChannel(target)
+            self._by_channel[id(pooled.channel)] = pooled
+        elif pooled.expire is not None:
+            pooled.expire.cancel()
+            pooled.expire = None
+        pooled.refs += 1
+        return pooled.channel
+
+    async def release(self, channel: grpc.aio.Channel) -> None:
+        """Drop one hold on channel; it closes once unused for LINGER."""
+        pooled = self._by_channel.get(id(channel))
+        if pooled is None:
+            return
+        pooled.refs -= 1
+        if pooled.refs > 0:
+            return
+        if self._by_target.get(pooled.target) is not pooled:
+            # Replaced by renew(), nobody can acquire it again
+            await self._close(pooled)
+            return
+        pooled.expire = asyncio.get_running_loop().call_later(
+            LINGER, self._expire, pooled
+        )
+
+    async def renew(self, channel: grpc.aio.Channel) -> grpc.aio.Channel:
+        """Swap a channel whose connection can't be trusted for a new one.
+
+        Other holders keep the old channel until they release it, but it
+        is no longer handed out.
+        """
+        pooled = self._by_channel[id(channel)]
+        if self._by_target.get(pooled.target) is pooled:
+            del self._by_target[pooled.target]
+        host, _, port = pooled.target.rpartition(":")
+        fresh = self.acquire(host, int(port))
+        await self.release(channel)
+        return fresh
+
+    async def async_close_idle(self) -> None:
+        """Close lingering channels now instead of after LINGER."""
+        for pooled in list(self._by_channel.values()):
+            if pooled.refs == 0:
+                await self._close(pooled)
+
+    def _expire(self, pooled: _PooledChannel) -> None:
+        """Close a channel that stayed unused for LINGER."""
+        pooled.expire = None
+        if pooled.refs > 0:
+            return
+        task = asyncio.get_running_loop().create_task(self._close(pooled))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, pooled: _PooledChannel) -> None:
+        """Forget and close a channel."""
+        if pooled.expire is not None:
+            pooled.expire.cancel()
+            pooled.expire = None
+        if self._by_target.get(pooled.target) is pooled:
+            del self._by_target[pooled.target]
+        self._by_channel.pop(id(pooled.channel), None)
+        try:
+            await pooled.channel.close()
+        except Exception:
+            _LOGGER.debug("Error closing channel to %s", pooled.target, exc_info=True)
+
+
+# Process-wide pool shared by every config entry and the config flow
+POOL = ChannelPool()
@@ -5,9 +5,52 @@ import logging
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 
-from .const import DOMAIN, DEFAULT_PORT
+from .const import (
+    CONF_BREAKER_RATINGS,
+    CONF_CIRCUIT_MAX_RATE,
+    CONF_DECODE_OFFLOAD,
+    CONF_DEADBAND,
+    CONF_DEADBAND_PCT,
+    CONF_EVENT_DETECTION,
+    CONF_HISTORY_WINDOW,
+    CONF_IDLE_TIMEOUT,
+    CONF_INRUSH_RATIO,
+    CONF_LEGACY_BREAKER_RATING,
+    CONF_MAIN_MAX_RATE,
+    CONF_MAX_SILENCE,
+    CONF_NAME_CONCURRENCY,
+    CONF_NAME_TIMEOUT,
+    CONF_OVERLOAD_DURATION,
+    CONF_PEAK_SENSORS,
+    CONF_PEAK_WINDOW,
+    CONF_PROTOBUF_DECODER,
+    CONF_RESYNC_INTERVAL,
+    CONF_STALE_TIMEOUT,
+    CONF_STATISTICS_LIVE_INTERVAL,
+    CONF_STATISTICS_ONLY,
+    CONF_STEP_THRESHOLD,
+    DEFAULT_CIRCUIT_MAX_RATE,
+    DEFAULT_DEADBANDS,
+    DEFAULT_HISTORY_WINDOW,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_INRUSH_RATIO,
+    DEFAULT_MAIN_MAX_RATE,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_NAME_CONCURRENCY,
+    DEFAULT_NAME_TIMEOUT,
+    DEFAULT_OVERLOAD_DURATION,
+    DEFAULT_PEAK_WINDOW,
+    DEFAULT_PORT,
+    DEFAULT_RESYNC_INTERVAL,
+    DEFAULT_STALE_TIMEOUT,
+    DEFAULT_STATISTICS_LIVE_INTERVAL,
+    DEFAULT_STEP_THRESHOLD,
+    DOMAIN,
+)
+from .detector import parse_breaker_ratings
 from .span_client import SpanPanelClient
 
 _LOGGER = logging.getLogger(__name__)
@@ -18,6 +61,14 @@ class SpanPanelConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> SpanPanelOptionsFlow:
+        """Return the options flow handler."""
+        return SpanPanelOptionsFlow(config_entry)
+
     async def async_step_user(
         self, user_input: dict | None = None
     ) -> FlowResult:
@@ -53,3 +104,94 @@ class SpanPanelConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             data_schema=schema,
             errors=errors,
         )
+
+
+class SpanPanelOptionsFlow(config_entries.OptionsFlow):
+    """Handle options for Span MAIN 40."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self._config_entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict | None = None
+    ) -> FlowResult:
+        """Manage the integration options."""
+        errors: dict[str, str] = {}
+        options = self._config_entry.options
+
+        if user_input is not None:
+            ratings = user_input.get(CONF_BREAKER_RATINGS, "").strip()
+            try:
+                parse_breaker_ratings(ratings)
+            except ValueError:
+                errors[CONF_BREAKER_RATINGS] = "invalid_breaker_ratings"
+                # Show the form again with what was entered
+                options = {**options, **user_input}
+            else:
+                user_input[CONF_BREAKER_RATINGS] = ratings
+                if not ratings and CONF_LEGACY_BREAKER_RATING in options:
+                    # Not on the form; kept until per-circuit ratings are set
+                    user_input[CONF_LEGACY_BREAKER_RATING] = options[
+                        CONF_LEGACY_BREAKER_RATING
+                    ]
+                return self.async_create_entry(title="", data=user_input)
+
+        def optional(key: str, default) -> vol.Optional:
+            return vol.Optional(key, default=options.get(key, default))
+
+        non_negative = vol.All(vol.Coerce(float), vol.Range(min=0))
+        fields: dict = {}
+        for measurement, (abs_band, rel_band) in DEFAULT_DEADBANDS.items():
+            fields[optional(CONF_DEADBAND.format(measurement), abs_band)] = non_negative
+            fields[optional(CONF_DEADBAND_PCT.format(measurement), rel_band)] = (
+                non_negative
+            )
+        fields[optional(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE)] = vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        )
+        fields[optional(CONF_CIRCUIT_MAX_RATE, DEFAULT_CIRCUIT_MAX_RATE)] = non_negative
+        fields[optional(CONF_MAIN_MAX_RATE, DEFAULT_MAIN_MAX_RATE)] = non_negative
+        fields[optional(CONF_PEAK_SENSORS, False)] = bool
+        fields[optional(CONF_PEAK_WINDOW, DEFAULT_PEAK_WINDOW)] = vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        )
+        fields[optional(CONF_NAME_CONCURRENCY, DEFAULT_NAME_CONCURRENCY)] = vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        )
+        fields[optional(CONF_NAME_TIMEOUT, DEFAULT_NAME_TIMEOUT)] = vol.All(
+            vol.Coerce(float), vol.Range(min=0.5)
+        )
+        fields[optional(CONF_STALE_TIMEOUT, DEFAULT_STALE_TIMEOUT)] = vol.All(
+            vol.Coerce(int), vol.Range(min=5)
+        )
+        fields[optional(CONF_IDLE_TIMEOUT, DEFAULT_IDLE_TIMEOUT)] = vol.All(
+            vol.Coerce(int), vol.Range(min=5)
+        )
+        fields[optional(CONF_RESYNC_INTERVAL, DEFAULT_RESYNC_INTERVAL)] = vol.All(
+            vol.Coerce(int), vol.Range(min=0)
+        )
+        fields[optional(CONF_PROTOBUF_DECODER, False)] = bool
+        fields[optional(CONF_DECODE_OFFLOAD, False)] = bool
+        fields[optional(CONF_HISTORY_WINDOW, DEFAULT_HISTORY_WINDOW)] = vol.All(
+            vol.Coerce(int), vol.Range(min=0)
+        )
+        fields[optional(CONF_EVENT_DETECTION, False)] = bool
+        fields[optional(CONF_STEP_THRESHOLD, DEFAULT_STEP_THRESHOLD)] = vol.All(
+            vol.Coerce(float), vol.Range(min=1)
+        )
+        fields[optional(CONF_INRUSH_RATIO, DEFAULT_INRUSH_RATIO)] = vol.All(
+            vol.Coerce(float), vol.Range(min=1)
+        )
+        fields[optional(CONF_BREAKER_RATINGS, "")] = str
+        fields[optional(CONF_OVERLOAD_DURATION, DEFAULT_OVERLOAD_DURATION)] = vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        )
+        fields[optional(CONF_STATISTICS_ONLY, False)] = bool
+        fields[
+            optional(CONF_STATISTICS_LIVE_INTERVAL, DEFAULT_STATISTICS_LIVE_INTERVAL)
+        ] = vol.All(vol.Coerce(int), vol.Range(min=1))
+
+        return self.async_show_form(
+            step_id="init", data_schema=vol.Schema(fields), errors=errors
+        )
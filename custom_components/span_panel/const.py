@@ -16,15 +16,120 @@ VENDOR_SPAN = 1
 PRODUCT_GEN3_PANEL = 4
 PRODUCT_GEN3_GATEWAY = 5
 
+# Device model of each product
+PRODUCT_MODELS = {
+    PRODUCT_GEN3_PANEL: "MAIN 40 (Gen3)",
+    PRODUCT_GEN3_GATEWAY: "Gen3 Gateway",
+}
+
 # Metric IID offset: circuit N -> metric IID = N + 27
 METRIC_IID_OFFSET = 27
 
+# Highest circuit ID (circuits are numbered 1-50)
+MAX_CIRCUIT_ID = 50
+
 # Main feed IID (always 1 for trait 26)
 MAIN_FEED_IID = 1
 
+# Update key for the main feed (circuit IDs start at 1)
+MAIN_FEED_KEY = 0
+
 # Voltage threshold for breaker state detection (millivolts)
 # Below this = breaker OFF
 BREAKER_OFF_VOLTAGE_MV = 5000  # 5V
 
+# Options: state write deadbands per measurement class. Each class has an
+# absolute band (in the sensor's unit) and a relative band (percent).
+CONF_DEADBAND = "{}_deadband"
+CONF_DEADBAND_PCT = "{}_deadband_pct"
+CONF_MAX_SILENCE = "max_silence"
+
+MEASUREMENT_POWER = "power"
+MEASUREMENT_VOLTAGE = "voltage"
+MEASUREMENT_CURRENT = "current"
+MEASUREMENT_FREQUENCY = "frequency"
+
+# measurement class -> (absolute, relative %)
+DEFAULT_DEADBANDS = {
+    MEASUREMENT_POWER: (1.0, 0.0),
+    MEASUREMENT_VOLTAGE: (0.5, 0.0),
+    MEASUREMENT_CURRENT: (0.05, 0.0),
+    MEASUREMENT_FREQUENCY: (0.01, 0.0),
+}
+DEFAULT_MAX_SILENCE = 300  # seconds
+
+# Options: maximum state publish rate (Hz, 0 = unlimited)
+CONF_CIRCUIT_MAX_RATE = "circuit_max_rate"
+CONF_MAIN_MAX_RATE = "main_max_rate"
+DEFAULT_CIRCUIT_MAX_RATE = 1.0
+DEFAULT_MAIN_MAX_RATE = 5.0
+
+# Options: per-circuit peak/trough power sensors over a rolling window
+CONF_PEAK_SENSORS = "peak_sensors"
+CONF_PEAK_WINDOW = "peak_window"
+DEFAULT_PEAK_WINDOW = 300  # seconds
+
+# Options: circuit-name discovery (concurrent GetRevision requests)
+CONF_NAME_CONCURRENCY = "name_concurrency"
+CONF_NAME_TIMEOUT = "name_timeout"
+DEFAULT_NAME_CONCURRENCY = 8
+DEFAULT_NAME_TIMEOUT = 5.0  # seconds per request
+
+# Options: seconds without a notification before entities go unavailable
+CONF_STALE_TIMEOUT = "stale_timeout"
+DEFAULT_STALE_TIMEOUT = 30
+
+# Options: seconds an open stream may stay silent before it is restarted
+# on a fresh channel
+CONF_IDLE_TIMEOUT = "idle_timeout"
+DEFAULT_IDLE_TIMEOUT = 20
+
+# Options: periodic circuit layout resync (minutes, 0 = only on reconnect)
+CONF_RESYNC_INTERVAL = "resync_interval"
+DEFAULT_RESYNC_INTERVAL = 15
+
+# Dispatcher signal carrying newly discovered circuit IDs, formatted with
+# the config entry ID
+SIGNAL_CIRCUITS_ADDED = f"{DOMAIN}_circuits_added_{{}}"
+
+# Options: decode notification envelopes with span.protoset message classes
+CONF_PROTOBUF_DECODER = "protobuf_decoder"
+
+# Options: decode notifications on a worker thread instead of the event loop
+CONF_DECODE_OFFLOAD = "decode_offload"
+
+# Options: statistics-only mode. Circuit power, current and voltage are
+# imported into long-term statistics as hourly aggregates and live circuit
+# states are written at most once per live interval
+CONF_STATISTICS_ONLY = "statistics_only"
+CONF_STATISTICS_LIVE_INTERVAL = "statistics_live_interval"
+DEFAULT_STATISTICS_LIVE_INTERVAL = 60  # seconds
+
+# Options: seconds of per-circuit history kept in memory for the
+# query_history service (0 = disabled)
+CONF_HISTORY_WINDOW = "history_window"
+DEFAULT_HISTORY_WINDOW = 900
+
+# Options: per-circuit event detection (step changes, inrush, sustained
+# overload), fired on the bus as EVENT_CIRCUIT. Breaker ratings are
+# "circuit:amps" pairs; circuits without one get no overload events
+CONF_EVENT_DETECTION = "event_detection"
+CONF_STEP_THRESHOLD = "step_threshold"
+CONF_INRUSH_RATIO = "inrush_ratio"
+CONF_BREAKER_RATINGS = "breaker_ratings"
+# Earlier releases had one rating (A) for every circuit; it is still
+# applied to all circuits while no per-circuit ratings are set
+CONF_LEGACY_BREAKER_RATING = "breaker_rating"
+CONF_OVERLOAD_DURATION = "overload_duration"
+DEFAULT_STEP_THRESHOLD = 100.0  # W
+DEFAULT_INRUSH_RATIO = 2.0
+DEFAULT_OVERLOAD_DURATION = 60  # seconds
+
+# Events
+EVENT_CIRCUIT = f"{DOMAIN}_circuit_event"
+
+# Services
+SERVICE_QUERY_HISTORY = "query_history"
+
 # gRPC service path
 GRPC_SERVICE = "io.span.panel.protocols.traithandler.TraitHandlerService"
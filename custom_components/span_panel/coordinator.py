@@ -1,15 +1,141 @@
 """Data coordinator for Span MAIN 40 integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from collections.abc import Callable, Mapping
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.components.recorder.models import (
+    StatisticData,
+    StatisticMetaData,
+)
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+)
+
+try:
+    from homeassistant.components.recorder.models import StatisticMeanType
+except ImportError:  # Home Assistant before 2025.3
+    StatisticMeanType = None
+from homeassistant.const import (
+    UnitOfElectricCurrent,
+    UnitOfElectricPotential,
+    UnitOfPower,
+)
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import (
+    async_track_time_interval,
+    async_track_utc_time_change,
+)
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util, slugify
 
-from .const import DOMAIN, DEFAULT_PORT
-from .span_client import SpanPanelClient
+from .const import (
+    CONF_BREAKER_RATINGS,
+    CONF_CIRCUIT_MAX_RATE,
+    CONF_DECODE_OFFLOAD,
+    CONF_DEADBAND,
+    CONF_DEADBAND_PCT,
+    CONF_EVENT_DETECTION,
+    CONF_HISTORY_WINDOW,
+    CONF_IDLE_TIMEOUT,
+    CONF_INRUSH_RATIO,
+    CONF_LEGACY_BREAKER_RATING,
+    CONF_MAIN_MAX_RATE,
+    CONF_MAX_SILENCE,
+    CONF_NAME_CONCURRENCY,
+    CONF_NAME_TIMEOUT,
+    CONF_OVERLOAD_DURATION,
+    CONF_PEAK_SENSORS,
+    CONF_PEAK_WINDOW,
+    CONF_PROTOBUF_DECODER,
+    CONF_RESYNC_INTERVAL,
+    CONF_STALE_TIMEOUT,
+    CONF_STATISTICS_LIVE_INTERVAL,
+    CONF_STATISTICS_ONLY,
+    CONF_STEP_THRESHOLD,
+    DEFAULT_CIRCUIT_MAX_RATE,
+    DEFAULT_DEADBANDS,
+    DEFAULT_HISTORY_WINDOW,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_INRUSH_RATIO,
+    DEFAULT_MAIN_MAX_RATE,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_NAME_CONCURRENCY,
+    DEFAULT_NAME_TIMEOUT,
+    DEFAULT_OVERLOAD_DURATION,
+    DEFAULT_PEAK_WINDOW,
+    DEFAULT_PORT,
+    DEFAULT_RESYNC_INTERVAL,
+    DEFAULT_STALE_TIMEOUT,
+    DEFAULT_STATISTICS_LIVE_INTERVAL,
+    DEFAULT_STEP_THRESHOLD,
+    DOMAIN,
+    EVENT_CIRCUIT,
+    MAIN_FEED_KEY,
+    MAX_CIRCUIT_ID,
+    SIGNAL_CIRCUITS_ADDED,
+)
+from .detector import CircuitEventDetector, parse_breaker_ratings
+from .discovery_cache import DiscoveryCache
+from .instrumentation import COORDINATOR_FANOUT
+from .site import SiteAggregator, async_get_site
+from .span_client import ConnectionState, DiscoveryDiff, SpanPanelClient
 
 _LOGGER = logging.getLogger(__name__)
 
+# Delay (s) between attempts to revalidate a cached layout
+_REVALIDATE_RETRY = 30
+
+# Interval between saves of the energy totals; at most this much energy is
+# lost if Home Assistant is killed without shutting down
+_ENERGY_SAVE_INTERVAL = timedelta(minutes=5)
+
+# Unit of each imported statistic (see STATISTIC_COLUMNS)
+_STATISTIC_UNITS = {
+    "power": UnitOfPower.WATT,
+    "current": UnitOfElectricCurrent.AMPERE,
+    "voltage": UnitOfElectricPotential.VOLT,
+}
+
+# The imported rows carry arithmetic means; has_mean is the spelling
+# recorders before mean_type understand
+_MEAN_METADATA: dict[str, Any] = (
+    {"mean_type": StatisticMeanType.ARITHMETIC}
+    if StatisticMeanType is not None
+    else {"has_mean": True}
+)
+
+
+def _breaker_ratings(options: Mapping[str, Any]) -> dict[int, float]:
+    """Return the per-circuit breaker ratings (A) of an entry's options.
+
+    An entry still carrying the old global breaker_rating and no
+    per-circuit ratings gets that rating on every circuit, so its overload
+    events keep firing after the upgrade.
+    """
+    ratings = parse_breaker_ratings(options.get(CONF_BREAKER_RATINGS, ""))
+    legacy = options.get(CONF_LEGACY_BREAKER_RATING)
+    if legacy and not ratings:
+        _LOGGER.warning(
+            "The breaker_rating option (%s A for every circuit) is deprecated; "
+            "set per-circuit breaker ratings in the integration options",
+            legacy,
+        )
+        ratings = dict.fromkeys(range(1, MAX_CIRCUIT_ID + 1), float(legacy))
+    return ratings
+
+
+def energy_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, list]]:
+    """Return the store holding the energy totals of an entry."""
+    return Store(hass, 1, f"{DOMAIN}.{entry_id}.energy")
+
 
 class SpanPanelCoordinator:
     """Manage the gRPC connection and data for a Span panel."""
@@ -18,11 +144,74 @@ class SpanPanelCoordinator:
         """Initialize the coordinator."""
         self.hass = hass
         self.entry = entry
+        self._statistics_only = entry.options.get(CONF_STATISTICS_ONLY, False)
+        circuit_max_rate = entry.options.get(
+            CONF_CIRCUIT_MAX_RATE, DEFAULT_CIRCUIT_MAX_RATE
+        )
+        if self._statistics_only:
+            # Live circuit states only need to be roughly current
+            circuit_max_rate = 1 / entry.options.get(
+                CONF_STATISTICS_LIVE_INTERVAL, DEFAULT_STATISTICS_LIVE_INTERVAL
+            )
+        detector = None
+        if entry.options.get(CONF_EVENT_DETECTION, False):
+            detector = CircuitEventDetector(
+                step_threshold=entry.options.get(
+                    CONF_STEP_THRESHOLD, DEFAULT_STEP_THRESHOLD
+                ),
+                inrush_ratio=entry.options.get(CONF_INRUSH_RATIO, DEFAULT_INRUSH_RATIO),
+                breaker_ratings=_breaker_ratings(entry.options),
+                overload_duration=entry.options.get(
+                    CONF_OVERLOAD_DURATION, DEFAULT_OVERLOAD_DURATION
+                ),
+                emit=self._fire_circuit_event,
+            )
+        self._peak_sensors = entry.options.get(CONF_PEAK_SENSORS, False)
+        peak_window = entry.options.get(CONF_PEAK_WINDOW, DEFAULT_PEAK_WINDOW)
         self._client = SpanPanelClient(
             host=entry.data["host"],
             port=entry.data.get("port", DEFAULT_PORT),
+            circuit_max_rate=circuit_max_rate,
+            main_max_rate=entry.options.get(CONF_MAIN_MAX_RATE, DEFAULT_MAIN_MAX_RATE),
+            use_protobuf_decoder=entry.options.get(CONF_PROTOBUF_DECODER, False),
+            name_concurrency=entry.options.get(
+                CONF_NAME_CONCURRENCY, DEFAULT_NAME_CONCURRENCY
+            ),
+            name_timeout=entry.options.get(CONF_NAME_TIMEOUT, DEFAULT_NAME_TIMEOUT),
+            stale_timeout=entry.options.get(CONF_STALE_TIMEOUT, DEFAULT_STALE_TIMEOUT),
+            idle_timeout=entry.options.get(CONF_IDLE_TIMEOUT, DEFAULT_IDLE_TIMEOUT),
+            decode_offload=entry.options.get(CONF_DECODE_OFFLOAD, False),
+            collect_statistics=self._statistics_only,
+            history_window=entry.options.get(
+                CONF_HISTORY_WINDOW, DEFAULT_HISTORY_WINDOW
+            ),
+            peak_window=peak_window if self._peak_sensors else 0,
+            detector=detector,
+        )
+        # Options are fixed for the lifetime of the entry (changes reload it)
+        self._deadbands = {
+            measurement: (
+                entry.options.get(CONF_DEADBAND.format(measurement), abs_band),
+                entry.options.get(CONF_DEADBAND_PCT.format(measurement), rel_band),
+            )
+            for measurement, (abs_band, rel_band) in DEFAULT_DEADBANDS.items()
+        }
+        self._max_silence = entry.options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE)
+        self._cache = DiscoveryCache(hass, entry.entry_id)
+        self._revalidate_task: asyncio.Task | None = None
+        self._resync_lock = asyncio.Lock()
+        self._resync_interval = entry.options.get(
+            CONF_RESYNC_INTERVAL, DEFAULT_RESYNC_INTERVAL
         )
-        self._listeners: list[callback] = []
+        self._unsub_resync: Callable[[], None] | None = None
+        self._energy_store = energy_store(hass, entry.entry_id)
+        self._unsub_energy_save: Callable[[], None] | None = None
+        self._unsub_statistics: Callable[[], None] | None = None
+        # Hours starting before this were only partly aggregated
+        self._statistics_since: datetime | None = None
+        self._site = async_get_site(hass)
+        # Listeners keyed by circuit ID / MAIN_FEED_KEY; None receives all
+        self._listeners: dict[int | None, list[Callable[[], None]]] = {}
 
     @property
     def client(self) -> SpanPanelClient:
@@ -34,37 +223,298 @@ class SpanPanelCoordinator:
         """Return current panel data."""
         return self._client.data
 
+    @property
+    def connection_state(self) -> ConnectionState:
+        """Return the health of the panel stream."""
+        return self._client.state
+
+    @property
+    def available(self) -> bool:
+        """Return False while the panel data is stale."""
+        return self._client.state is not ConnectionState.STALE
+
+    @property
+    def site(self) -> SiteAggregator:
+        """Return the aggregate shared by all panels."""
+        return self._site
+
+    @property
+    def max_silence(self) -> float:
+        """Return the longest time (s) a sensor may go without a state write."""
+        return self._max_silence
+
+    @property
+    def peak_sensors(self) -> bool:
+        """Return True if per-circuit peak/trough sensors are enabled."""
+        return self._peak_sensors
+
+    @property
+    def statistics_only(self) -> bool:
+        """Return True if circuit statistics are imported, not recorded."""
+        return self._statistics_only
+
+    def deadband(self, measurement: str) -> tuple[float, float]:
+        """Return (absolute, relative %) deadband for a measurement class."""
+        return self._deadbands.get(measurement, (0.0, 0.0))
+
     async def async_setup(self) -> bool:
-        """Connect to the panel and start streaming."""
-        if not await self._client.connect():
-            return False
+        """Connect to the panel and start streaming.
+
+        If a cached layout exists, entities are created from it right away
+        and the layout is resynced against the panel in the background;
+        otherwise discovery runs before setup completes. The layout is also
+        resynced whenever the stream reconnects and every resync_interval
+        minutes.
+        """
+        if stored_energy := await self._energy_store.async_load():
+            self._client.energy.restore(stored_energy)
+        if await self._cache.async_restore(self._client.data):
+            await self._client.connect(discover=False)
+            self._revalidate_task = self.hass.async_create_background_task(
+                self._async_revalidate(), f"{DOMAIN} revalidate {self.entry.entry_id}"
+            )
+        else:
+            if not await self._client.connect():
+                return False
+            _LOGGER.info(
+                "Span panel %s: %d circuits, names fetched in %.2fs",
+                self.entry.data["host"],
+                len(self._client.data.circuits),
+                self._client.name_fetch_duration,
+            )
+            await self._cache.async_save(self._client.data)
 
         # Register for updates from the client
         self._client.register_callback(self._on_data_update)
+        self._client.register_reconnect_callback(self._on_reconnect)
+        self._client.register_state_callback(self._on_state_change)
+        if self._resync_interval:
+            self._unsub_resync = async_track_time_interval(
+                self.hass,
+                self._async_scheduled_resync,
+                timedelta(minutes=self._resync_interval),
+            )
+        self._unsub_energy_save = async_track_time_interval(
+            self.hass, self._async_save_energy, _ENERGY_SAVE_INTERVAL
+        )
+        if self._statistics_only:
+            self._statistics_since = dt_util.utcnow()
+            self._unsub_statistics = async_track_utc_time_change(
+                self.hass, self._async_import_statistics, minute=0, second=0
+            )
 
         # Start the metric stream
         await self._client.start_streaming()
         return True
 
+    async def _async_revalidate(self) -> None:
+        """Resync a cached layout, retrying until the panel answers."""
+        while await self.async_resync() is None:
+            _LOGGER.debug(
+                "Span panel %s not reachable, retrying discovery in %ss",
+                self.entry.data["host"],
+                _REVALIDATE_RETRY,
+            )
+            await asyncio.sleep(_REVALIDATE_RETRY)
+
+    async def async_resync(self) -> DiscoveryDiff | None:
+        """Compare a fresh discovery with the known circuits and apply it.
+
+        Only the affected devices and entities change: new circuits are
+        announced to the platforms, removed circuits have their device (and
+        with it their entities) removed, and renamed circuits get their
+        device renamed. Returns None if the panel could not be queried or
+        a resync is already running.
+        """
+        if self._resync_lock.locked():
+            return None
+        async with self._resync_lock:
+            data = self._client.data
+            identity = (data.panel_resource_id, data.product_id)
+            try:
+                circuits = await self._client.discover()
+            except Exception:
+                _LOGGER.debug("Circuit resync failed", exc_info=True)
+                return None
+            diff = self._client.apply_discovery(circuits)
+            # An unchanged layout is already cached
+            if diff or identity != (data.panel_resource_id, data.product_id):
+                await self._cache.async_save(data)
+            if diff:
+                _LOGGER.info(
+                    "Span panel %s layout changed: added %s, removed %s, renamed %s",
+                    self.entry.data["host"],
+                    sorted(diff.added),
+                    sorted(diff.removed),
+                    sorted(diff.renamed),
+                )
+                self._apply_diff(diff)
+            return diff
+
+    @callback
+    def _apply_diff(self, diff: DiscoveryDiff) -> None:
+        """Create, retire or rename the devices affected by a resync."""
+        registry = dr.async_get(self.hass)
+        host = self.entry.data["host"]
+        for circuit_id in diff.removed | diff.renamed:
+            device = registry.async_get_device(
+                identifiers={(DOMAIN, f"{host}_circuit_{circuit_id}")}
+            )
+            if device is None:
+                continue
+            if circuit_id in diff.removed:
+                registry.async_remove_device(device.id)
+            else:
+                registry.async_update_device(
+                    device.id, name=self.data.circuits[circuit_id].name
+                )
+        if diff.added:
+            async_dispatcher_send(
+                self.hass,
+                SIGNAL_CIRCUITS_ADDED.format(self.entry.entry_id),
+                sorted(diff.added),
+            )
+
+    @callback
+    def _fire_circuit_event(self, event: dict[str, Any]) -> None:
+        """Fire a detected circuit event on the bus."""
+        self.hass.bus.async_fire(
+            EVENT_CIRCUIT, {"entry_id": self.entry.entry_id, **event}
+        )
+
+    @callback
+    def _on_state_change(self, state: ConnectionState) -> None:
+        """Wake every listener so entities update their availability."""
+        for listeners in tuple(self._listeners.values()):
+            for listener in tuple(listeners):
+                try:
+                    listener()
+                except Exception:
+                    _LOGGER.exception("Error calling listener")
+
+    @callback
+    def _on_reconnect(self) -> None:
+        """Resync once the stream is back, the panel may have changed."""
+        self.hass.async_create_background_task(
+            self.async_resync(), f"{DOMAIN} resync {self.entry.entry_id}"
+        )
+
+    async def _async_scheduled_resync(self, now: datetime) -> None:
+        """Run the periodic resync."""
+        await self.async_resync()
+
+    @callback
+    def _async_save_energy(self, now: datetime) -> None:
+        """Write the energy totals (batched by the store)."""
+        self._energy_store.async_delay_save(self._client.energy.as_dict)
+
+    @callback
+    def _async_import_statistics(self, now: datetime) -> None:
+        """Import the hour that just ended into long-term statistics.
+
+        Each circuit measurement becomes one external statistic with a
+        single mean/min/max row; all of them are queued on the recorder at
+        once and committed together. The first hour after setup is only
+        partly covered, so it is rolled and discarded rather than imported
+        as a full hour.
+        """
+        aggregates = self._client.statistics.roll()
+        end = now.replace(minute=0, second=0, microsecond=0)
+        start = end - timedelta(hours=1)
+        since, self._statistics_since = self._statistics_since, end
+        if since is None or since > start:
+            _LOGGER.debug("Skipping the partial statistics hour from %s", start)
+            return
+        if "recorder" not in self.hass.config.components:
+            return
+        host = slugify(self.entry.data["host"])
+        for circuit_id, measurements in aggregates.items():
+            info = self.data.circuits.get(circuit_id)
+            if info is None:
+                continue
+            for statistic, aggregate in measurements.items():
+                if not aggregate.count:
+                    continue
+                metadata = StatisticMetaData(
+                    **_MEAN_METADATA,
+                    has_sum=False,
+                    name=f"{info.name} {statistic.capitalize()}",
+                    source=DOMAIN,
+                    statistic_id=f"{DOMAIN}:{host}_circuit_{circuit_id}_{statistic}",
+                    unit_of_measurement=_STATISTIC_UNITS[statistic],
+                )
+                async_add_external_statistics(
+                    self.hass,
+                    metadata,
+                    [
+                        StatisticData(
+                            start=start,
+                            mean=aggregate.mean,
+                            min=aggregate.low,
+                            max=aggregate.high,
+                        )
+                    ],
+                )
+
     async def async_shutdown(self) -> None:
         """Disconnect from the panel."""
+        if self._unsub_resync:
+            self._unsub_resync()
+            self._unsub_resync = None
+        if self._unsub_energy_save:
+            self._unsub_energy_save()
+            self._unsub_energy_save = None
+        if self._unsub_statistics:
+            self._unsub_statistics()
+            self._unsub_statistics = None
+        if self._revalidate_task and not self._revalidate_task.done():
+            self._revalidate_task.cancel()
+        self._site.remove(self.entry.entry_id)
         await self._client.disconnect()
+        # Keep the phase types learned from the stream for the next start
+        if self._client.data.circuits:
+            await self._cache.async_save(self._client.data)
+        await self._energy_store.async_save(self._client.energy.as_dict())
 
     @callback
-    def _on_data_update(self) -> None:
-        """Handle data update from gRPC stream."""
-        for listener in self._listeners:
-            try:
-                listener()
-            except Exception:
-                _LOGGER.exception("Error calling listener")
+    def _on_data_update(self, changed: set[int]) -> None:
+        """Handle data update from gRPC stream.
+
+        Only listeners registered for one of the changed keys (plus the
+        unkeyed listeners) are called.
+        """
+        instrumentation = self._client.instrumentation
+        start = time.perf_counter_ns() if instrumentation.enabled else 0
+        if MAIN_FEED_KEY in changed:
+            self._site.update(self.entry.entry_id, self.data.main_feed.power_w)
+        for key in (None, *changed):
+            listeners = self._listeners.get(key)
+            if not listeners:
+                continue
+            for listener in tuple(listeners):
+                try:
+                    listener()
+                except Exception:
+                    _LOGGER.exception("Error calling listener")
+        if instrumentation.enabled:
+            instrumentation.histogram(COORDINATOR_FANOUT).record(
+                time.perf_counter_ns() - start
+            )
+
+    def async_add_listener(
+        self, update_callback: Callable[[], None], key: int | None = None
+    ) -> Callable[[], None]:
+        """Add a listener for data updates. Returns unregister function.
 
-    def async_add_listener(self, update_callback: callback) -> callback:
-        """Add a listener for data updates. Returns unregister function."""
-        self._listeners.append(update_callback)
+        With a key (circuit ID or MAIN_FEED_KEY) the listener is only called
+        when that circuit or the main feed changed; without one it is called
+        on every update.
+        """
+        listeners = self._listeners.setdefault(key, [])
+        listeners.append(update_callback)
 
         def remove():
-            if update_callback in self._listeners:
-                self._listeners.remove(update_callback)
+            if update_callback in listeners:
+                listeners.remove(update_callback)
 
         return remove
@@ -0,0 +1,129 @@
+"""Off-loop decoding of Span MAIN 40 notifications in batches."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generic, TypeVar
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class DecodeWorker(Generic[_T]):
+    """Decode frames on a dedicated thread and apply the results on the loop.
+
+    Frames are queued per trait instance and only the newest frame of each
+    instance is kept, so a burst after a reconnect collapses to one frame
+    per circuit (drop-oldest) and the queue can never hold more than
+    max_pending instances. One batch is in flight at a time: while the
+    thread decodes, new frames keep coalescing, which is the backpressure.
+
+    decode(instance_id, frame) runs on the worker thread for each frame of
+    a batch and must not touch loop-owned state; a frame it raises on is
+    counted in failed and skipped, so it costs only itself. apply(results)
+    runs on the loop, once per batch, with everything decoded from it.
+    """
+
+    def __init__(
+        self,
+        decode: Callable[[int, bytes], Iterable[_T]],
+        apply: Callable[[list[_T]], None],
+        max_pending: int,
+    ) -> None:
+        """Initialize the worker; the thread starts with the first batch."""
+        self._decode = decode
+        self._apply = apply
+        self._max_pending = max_pending
+        self._pending: dict[int, bytes] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="span_panel_decode"
+        )
+        self._in_flight: asyncio.Future | None = None
+        self.submitted = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failed = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Return queue counters for diagnostics."""
+        return {
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "failed": self.failed,
+            "pending": len(self._pending),
+        }
+
+    def submit(self, instance_id: int, frame: bytes) -> None:
+        """Queue a frame, replacing any older frame of the same instance."""
+        pending = self._pending
+        self.submitted += 1
+        if instance_id in pending:
+            # Re-insert so the instance moves to the back of the queue
+            del pending[instance_id]
+            self.dropped += 1
+        elif len(pending) >= self._max_pending:
+            del pending[next(iter(pending))]
+            self.dropped += 1
+        pending[instance_id] = frame
+        if self._in_flight is None:
+            self._start_batch()
+
+    def _start_batch(self) -> None:
+        """Hand everything pending to the thread."""
+        batch = list(self._pending.items())
+        self._pending.clear()
+        loop = asyncio.get_running_loop()
+        self._in_flight = loop.run_in_executor(
+            self._executor, self._decode_batch, batch
+        )
+        self._in_flight.add_done_callback(self._batch_done)
+
+    def _decode_batch(
+        self, batch: list[tuple[int, bytes]]
+    ) -> tuple[list[_T], int]:
+        """Decode every frame of a batch (runs on the worker thread).
+
+        Returns the results and the number of frames that failed; the
+        counters are only touched on the loop.
+        """
+        results: list[_T] = []
+        failed = 0
+        for instance_id, frame in batch:
+            try:
+                results.extend(self._decode(instance_id, frame))
+            except Exception:
+                failed += 1
+                _LOGGER.debug(
+                    "Error decoding notification of instance %d",
+                    instance_id,
+                    exc_info=True,
+                )
+        return results, failed
+
+    def _batch_done(self, future: asyncio.Future) -> None:
+        """Apply a decoded batch on the loop and start the next one."""
+        self._in_flight = None
+        if future.cancelled():
+            return
+        self.batches += 1
+        results, failed = future.result()
+        self.failed += failed
+        try:
+            self._apply(results)
+        except Exception:
+            _LOGGER.exception("Error applying decoded batch")
+        if self._pending:
+            self._start_batch()
+
+    def close(self) -> None:
+        """Drop pending frames and stop the thread."""
+        self._pending.clear()
+        if self._in_flight is not None:
+            self._in_flight.cancel()
+            self._in_flight = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
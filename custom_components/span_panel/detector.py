@@ -0,0 +1,194 @@
+"""Streaming appliance and overload event detection per Span circuit."""
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from typing import TYPE_CHECKING, Any
+
+from .const import MAX_CIRCUIT_ID
+
+if TYPE_CHECKING:
+    from .span_client import CircuitMetrics
+
+# Event types
+EVENT_STEP = "step"
+EVENT_INRUSH = "inrush"
+EVENT_OVERLOAD = "overload"
+EVENT_OVERLOAD_CLEARED = "overload_cleared"
+
+# Smoothing factor of the power baseline (about a 10-sample time constant)
+_ALPHA = 0.1
+
+# Consecutive samples past the step threshold before a step is reported,
+# so a single noisy sample doesn't register as an appliance switching
+_CONFIRM_SAMPLES = 2
+
+# Share of the breaker rating a circuit may carry continuously (the 80%
+# continuous-load rule)
+_CONTINUOUS_LOAD = 0.8
+
+
+def parse_breaker_ratings(text: str) -> dict[int, float]:
+    """Parse "circuit:amps" pairs separated by commas, e.g. "5:30, 12:50".
+
+    Raises ValueError on a malformed pair, a circuit outside 1-50 or a
+    rating that isn't positive.
+    """
+    ratings: dict[int, float] = {}
+    for pair in text.replace(";", ",").split(","):
+        if not pair.strip():
+            continue
+        circuit, sep, amps = pair.partition(":")
+        if not sep:
+            raise ValueError(f"{pair.strip()!r} is not circuit:amps")
+        circuit_id = int(circuit)
+        rating = float(amps)
+        if not 1 <= circuit_id <= MAX_CIRCUIT_ID or rating <= 0:
+            raise ValueError(f"{pair.strip()!r} is out of range")
+        ratings[circuit_id] = rating
+    return ratings
+
+
+class _CircuitState:
+    """Detector state of one circuit; constant size however long it runs."""
+
+    __slots__ = (
+        "baseline",
+        "pending",
+        "inrush",
+        "overload_since",
+        "overloaded",
+    )
+
+    def __init__(self, power_w: float) -> None:
+        self.baseline = power_w
+        # Signed count of consecutive samples above (+) / below (-) the band
+        self.pending = 0
+        self.inrush = False
+        self.overload_since: float | None = None
+        self.overloaded = False
+
+
+class CircuitEventDetector:
+    """Detect step changes, inrush spikes and sustained overloads.
+
+    Fed every decoded circuit sample. Steps are deviations of at least
+    step_threshold W from an EWMA baseline that persist for
+    _CONFIRM_SAMPLES samples; the baseline then jumps to the new level.
+    Inrush is a panel window whose maximum power is at least inrush_ratio
+    times its average (and step_threshold W above it). Overload is current
+    above 80% of the circuit's breaker_ratings entry (A) for
+    overload_duration seconds, per pole for dual-phase circuits; circuits
+    with no known rating are never reported as overloaded. Each event is
+    passed to emit as a dict.
+    """
+
+    def __init__(
+        self,
+        step_threshold: float,
+        inrush_ratio: float,
+        breaker_ratings: Mapping[int, float],
+        overload_duration: float,
+        emit: Callable[[dict[str, Any]], None],
+    ) -> None:
+        """Initialize with no circuit state."""
+        self._step_threshold = step_threshold
+        self._inrush_ratio = inrush_ratio
+        self._overload_current = {
+            circuit_id: rating * _CONTINUOUS_LOAD
+            for circuit_id, rating in breaker_ratings.items()
+        }
+        self._overload_duration = overload_duration
+        self._emit = emit
+        self._states: dict[int, _CircuitState] = {}
+        self.events = 0
+
+    def discard(self, circuit_id: int) -> None:
+        """Forget a removed circuit."""
+        self._states.pop(circuit_id, None)
+
+    def add(
+        self,
+        circuit_id: int,
+        time_s: float,
+        metrics: CircuitMetrics,
+        dual_phase: bool,
+    ) -> None:
+        """Run one circuit sample through the detectors."""
+        power = metrics.power_w
+        state = self._states.get(circuit_id)
+        if state is None:
+            self._states[circuit_id] = _CircuitState(power)
+            return
+
+        # Step change against the EWMA baseline
+        delta = power - state.baseline
+        if abs(delta) >= self._step_threshold:
+            direction = 1 if delta > 0 else -1
+            if state.pending * direction > 0:
+                state.pending += direction
+            else:
+                state.pending = direction
+            if abs(state.pending) >= _CONFIRM_SAMPLES:
+                self._fire(
+                    EVENT_STEP,
+                    circuit_id,
+                    delta_w=round(delta, 1),
+                    power_w=round(power, 1),
+                )
+                state.baseline = power
+                state.pending = 0
+        else:
+            state.pending = 0
+            state.baseline += _ALPHA * delta
+
+        # Inrush within the panel's sampling window, once per spike
+        spike = metrics.power_max_w - power
+        inrush = (
+            spike >= self._step_threshold
+            and metrics.power_max_w >= self._inrush_ratio * max(power, 1.0)
+        )
+        if inrush and not state.inrush:
+            self._fire(
+                EVENT_INRUSH,
+                circuit_id,
+                delta_w=round(spike, 1),
+                peak_w=round(metrics.power_max_w, 1),
+                power_w=round(power, 1),
+            )
+        state.inrush = inrush
+
+        # Sustained overload, against the circuit's own breaker
+        limit = self._overload_current.get(circuit_id)
+        if limit is None:
+            return
+        current = (
+            max(metrics.current_a_a, metrics.current_b_a)
+            if dual_phase
+            else metrics.current_a
+        )
+        if current <= limit:
+            state.overload_since = None
+            if state.overloaded:
+                state.overloaded = False
+                self._fire(
+                    EVENT_OVERLOAD_CLEARED, circuit_id, current_a=round(current, 2)
+                )
+        elif state.overload_since is None:
+            state.overload_since = time_s
+        elif (
+            not state.overloaded
+            and time_s - state.overload_since >= self._overload_duration
+        ):
+            state.overloaded = True
+            self._fire(
+                EVENT_OVERLOAD,
+                circuit_id,
+                delta_a=round(current - limit, 2),
+                current_a=round(current, 2),
+                seconds=round(time_s - state.overload_since, 1),
+            )
+
+    def _fire(self, event_type: str, circuit_id: int, **data: Any) -> None:
+        """Hand an event to emit."""
+        self.events += 1
+        self._emit({"type": event_type, "circuit_id": circuit_id, **data})
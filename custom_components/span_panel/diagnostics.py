@@ -0,0 +1,57 @@
+"""Diagnostics support for Span MAIN 40 integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .channel_pool import POOL
+from .const import DOMAIN
+from .coordinator import SpanPanelCoordinator
+
+TO_REDACT = {"host", "panel_resource_id", "serial"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: SpanPanelCoordinator = hass.data[DOMAIN][entry.entry_id]
+    client = coordinator.client
+    data = client.data
+    return {
+        "entry": async_redact_data(
+            {"data": dict(entry.data), "options": dict(entry.options)}, TO_REDACT
+        ),
+        "panel": async_redact_data(
+            {
+                "serial": data.serial,
+                "firmware": data.firmware,
+                "panel_resource_id": data.panel_resource_id,
+                "product_id": data.product_id,
+                "circuits": len(data.circuits),
+                "dual_phase_circuits": sum(
+                    info.is_dual_phase for info in data.circuits.values()
+                ),
+            },
+            TO_REDACT,
+        ),
+        "decoder": client.decoder,
+        "name_fetch_duration": client.name_fetch_duration,
+        "aggregates": client.aggregates.as_dict(),
+        "energy_rejected_samples": client.energy.rejected,
+        "history": client.history.stats if client.history else None,
+        "detector_events": client.detector.events if client.detector else None,
+        "stream": client.stream_stats,
+        "channel_pool": POOL.stats,
+        "site": {
+            "panels": coordinator.site.panels,
+            "owner": coordinator.site.owner == entry.entry_id,
+        },
+        "dispatch": client.dispatch_stats,
+        "header_cache": client.header_cache_stats,
+        "decode_worker": client.decode_worker_stats,
+        "instrumentation": client.instrumentation.as_dict(),
+    }
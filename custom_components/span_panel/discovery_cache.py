@@ -0,0 +1,71 @@
+"""On-disk cache of the discovered Span MAIN 40 layout."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, PRODUCT_GEN3_PANEL
+from .span_client import CircuitInfo, PanelData
+
+STORAGE_VERSION = 1
+
+
+class DiscoveryCache:
+    """Persist circuits, panel resource ID, product, serial and firmware.
+
+    Lets setup create entities without waiting for GetInstances and the
+    circuit-name requests; the cached layout is revalidated once the panel
+    answers.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}"
+        )
+
+    async def async_restore(self, data: PanelData) -> bool:
+        """Load the cached layout into data. Returns False if there is none."""
+        stored = await self._store.async_load()
+        if not stored or not stored.get("circuits"):
+            return False
+        data.serial = stored.get("serial", "")
+        data.firmware = stored.get("firmware", "")
+        data.panel_resource_id = stored.get("panel_resource_id", "")
+        data.product_id = stored.get("product_id", PRODUCT_GEN3_PANEL)
+        data.circuits = {
+            circuit["circuit_id"]: CircuitInfo(
+                circuit_id=circuit["circuit_id"],
+                name=circuit["name"],
+                metric_iid=circuit["metric_iid"],
+                is_dual_phase=circuit.get("is_dual_phase", False),
+            )
+            for circuit in stored["circuits"]
+        }
+        return True
+
+    async def async_save(self, data: PanelData) -> None:
+        """Write the current layout of data."""
+        await self._store.async_save(
+            {
+                "serial": data.serial,
+                "firmware": data.firmware,
+                "panel_resource_id": data.panel_resource_id,
+                "product_id": data.product_id,
+                "circuits": [
+                    {
+                        "circuit_id": info.circuit_id,
+                        "name": info.name,
+                        "metric_iid": info.metric_iid,
+                        "is_dual_phase": info.is_dual_phase,
+                    }
+                    for info in data.circuits.values()
+                ],
+            }
+        )
+
+    async def async_remove(self) -> None:
+        """Delete the cache file."""
+        await self._store.async_remove()
@@ -0,0 +1,101 @@
+"""Rate-limited, coalescing update dispatcher for Span MAIN 40."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable
+
+from .const import MAIN_FEED_KEY
+
+# Timer handles may fire up to one clock tick early; treat those keys as due
+_CLOCK_SLACK = 0.001
+
+
+class CoalescingDispatcher:
+    """Merge bursts of updates into rate-limited flushes.
+
+    Keys (circuit IDs, or MAIN_FEED_KEY) are marked as they change. Each key
+    is published at most once per interval; a key marked again before it
+    has been published is merged into the pending flush, so the listener
+    always sees the latest values in the panel data. All keys that are due
+    at the same time are delivered together in a single publish call.
+    """
+
+    def __init__(
+        self,
+        publish: Callable[[set[int]], None],
+        circuit_max_rate: float,
+        main_max_rate: float,
+    ) -> None:
+        """Initialize the dispatcher. A rate of 0 means unlimited."""
+        self._publish = publish
+        self._circuit_interval = 1.0 / circuit_max_rate if circuit_max_rate > 0 else 0.0
+        self._main_interval = 1.0 / main_max_rate if main_max_rate > 0 else 0.0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._handle: asyncio.TimerHandle | None = None
+        self._pending: dict[int, float] = {}  # key -> due time
+        self._next_allowed: dict[int, float] = {}
+        self.received = 0
+        self.merged = 0
+        self.published = 0
+        self.flushes = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Return dispatcher counters."""
+        return {
+            "received": self.received,
+            "merged": self.merged,
+            "published": self.published,
+            "flushes": self.flushes,
+            "pending": len(self._pending),
+        }
+
+    def mark(self, keys: Iterable[int]) -> None:
+        """Mark keys as changed and schedule their publication."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        now = self._loop.time()
+        for key in keys:
+            self.received += 1
+            if key in self._pending:
+                self.merged += 1
+                continue
+            due = max(now, self._next_allowed.get(key, 0.0))
+            self._pending[key] = due
+            self._schedule(due)
+
+    def cancel(self) -> None:
+        """Drop pending updates and cancel the scheduled flush."""
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        self._pending.clear()
+        self._next_allowed.clear()
+
+    def _schedule(self, due: float) -> None:
+        """Make sure a flush runs no later than due."""
+        if self._handle is not None:
+            if self._handle.when() <= due:
+                return
+            self._handle.cancel()
+        self._handle = self._loop.call_at(due, self._flush)
+
+    def _flush(self) -> None:
+        """Publish every pending key that is due."""
+        self._handle = None
+        now = self._loop.time()
+        ready = {
+            key for key, due in self._pending.items() if due <= now + _CLOCK_SLACK
+        }
+        for key in ready:
+            del self._pending[key]
+            interval = (
+                self._main_interval if key == MAIN_FEED_KEY else self._circuit_interval
+            )
+            self._next_allowed[key] = now + interval
+        if self._pending:
+            self._schedule(min(self._pending.values()))
+        if ready:
+            self.flushes += 1
+            self.published += len(ready)
+            self._publish(ready)
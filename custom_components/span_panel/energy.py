@@ -0,0 +1,107 @@
+"""Energy accumulation from Span MAIN 40 power samples."""
+from __future__ import annotations
+
+from typing import Any
+
+# Samples further apart than this (s) are not integrated across; the panel
+# reports about once a second, so a longer gap is an outage whose power is
+# unknown
+MAX_GAP = 30.0
+
+# Largest power (W, either direction) integrated; a Gen3 panel's 200 A
+# split-phase service tops out near 48 kW, so anything beyond this is a
+# decoding error that would otherwise corrupt the TOTAL_INCREASING sensors
+MAX_POWER_W = 100_000.0
+
+
+class EnergyAccumulator:
+    """Trapezoidal (Riemann) integral of one power series, in Wh.
+
+    Positive power counts as import, negative as export. An interval whose
+    endpoints have opposite signs is split at the zero crossing so each
+    side lands in the right total.
+    """
+
+    __slots__ = ("import_wh", "export_wh", "gaps", "_time", "_power")
+
+    def __init__(self, import_wh: float = 0.0, export_wh: float = 0.0) -> None:
+        """Initialize with existing totals."""
+        self.import_wh = import_wh
+        self.export_wh = export_wh
+        self.gaps = 0
+        self._time: float | None = None
+        self._power = 0.0
+
+    def add(self, time_s: float, power_w: float) -> None:
+        """Integrate up to a sample of power_w taken at time_s."""
+        last_time = self._time
+        if last_time is not None:
+            dt = time_s - last_time
+            if dt <= 0:
+                # Duplicate or out-of-order sample
+                return
+            if dt > MAX_GAP:
+                self.gaps += 1
+            else:
+                self._integrate(self._power, power_w, dt / 3600)
+        self._time = time_s
+        self._power = power_w
+
+    def _integrate(self, p0: float, p1: float, hours: float) -> None:
+        """Add the trapezoid between p0 and p1 over hours."""
+        if (p0 >= 0) == (p1 >= 0):
+            area = (p0 + p1) / 2 * hours
+            if area >= 0:
+                self.import_wh += area
+            else:
+                self.export_wh -= area
+            return
+        # Sign change: split at the zero crossing
+        crossing = p0 / (p0 - p1)
+        first = p0 / 2 * hours * crossing
+        second = p1 / 2 * hours * (1 - crossing)
+        for area in (first, second):
+            if area >= 0:
+                self.import_wh += area
+            else:
+                self.export_wh -= area
+
+
+class EnergyTracker:
+    """Energy accumulators keyed by circuit ID / MAIN_FEED_KEY."""
+
+    def __init__(self) -> None:
+        """Initialize with no accumulators."""
+        self._accumulators: dict[int, EnergyAccumulator] = {}
+        self.rejected = 0
+
+    def add(self, key: int, time_s: float, power_w: float) -> None:
+        """Integrate a power sample for key.
+
+        Samples beyond MAX_POWER_W are counted in rejected and skipped; the
+        next good sample integrates from the last good one, or starts over
+        if that is more than MAX_GAP back.
+        """
+        if not -MAX_POWER_W <= power_w <= MAX_POWER_W:
+            self.rejected += 1
+            return
+        accumulator = self._accumulators.get(key)
+        if accumulator is None:
+            accumulator = self._accumulators[key] = EnergyAccumulator()
+        accumulator.add(time_s, power_w)
+
+    def get(self, key: int) -> EnergyAccumulator | None:
+        """Return the accumulator for key, if it has seen a sample."""
+        return self._accumulators.get(key)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the totals for persistence."""
+        return {
+            str(key): [accumulator.import_wh, accumulator.export_wh]
+            for key, accumulator in self._accumulators.items()
+        }
+
+    def restore(self, stored: dict[str, Any]) -> None:
+        """Load totals saved by as_dict()."""
+        for key, (import_wh, export_wh) in stored.items():
+            self._accumulators[int(key)] = EnergyAccumulator(import_wh, export_wh)
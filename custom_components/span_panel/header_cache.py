@@ -0,0 +1,66 @@
+"""LRU cache of decoded notification headers for Span MAIN 40."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+class TraitHeader(NamedTuple):
+    """Decoded resource_trait_info of a notification."""
+
+    vendor_id: int
+    product_id: int
+    trait_id: int
+    instance_id: int
+    resource_id: str
+
+
+class HeaderCache:
+    """Bounded LRU cache mapping raw resource_trait_info bytes to headers.
+
+    Every notification from the same trait instance carries an identical
+    header block, so a panel needs about one entry per instance. Lookups
+    accept a memoryview of the notification; only inserts copy the key.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        """Initialize the cache."""
+        self._maxsize = maxsize
+        self._entries: OrderedDict[bytes, TraitHeader] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached headers."""
+        return len(self._entries)
+
+    @property
+    def stats(self) -> dict[str, int | float]:
+        """Return hit/miss counters for diagnostics."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def get(self, key: bytes | memoryview) -> TraitHeader | None:
+        """Return the cached header for key, or None."""
+        header = self._entries.get(key)
+        if header is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return header
+
+    def put(self, key: bytes | memoryview, header: TraitHeader) -> None:
+        """Cache a header, evicting the least recently used if full."""
+        self._entries[bytes(key)] = header
+        if len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached headers; counters are kept."""
+        self._entries.clear()
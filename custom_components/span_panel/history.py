@@ -0,0 +1,188 @@
+"""Recent per-circuit history of Span MAIN 40 samples in ring buffers."""
+from __future__ import annotations
+
+import math
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING, Any
+
+from .energy import EnergyAccumulator
+
+if TYPE_CHECKING:
+    from .span_client import CircuitMetrics
+
+# Buffer slots per second of window; the panel reports about once a second
+# per circuit, so this leaves room for bursts before the window shrinks
+_SLOTS_PER_SECOND = 2
+
+# Measurements kept per sample (power_w, current_a and voltage_v)
+HISTORY_MEASUREMENTS = ("power", "current", "voltage")
+
+
+class RingBuffer:
+    """Fixed-capacity, timestamped power/current/voltage samples.
+
+    Samples live in preallocated typed arrays (8 bytes for the time, 4 per
+    value) that are overwritten in place once full, so appending is O(1)
+    and allocates nothing. Times must increase for window()'s bisection;
+    append() drops a sample that isn't newer than the last one.
+    """
+
+    __slots__ = ("capacity", "last", "_times", "_values", "_next", "_size")
+
+    def __init__(self, capacity: int) -> None:
+        """Initialize an empty buffer."""
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = {
+            measurement: array("f", bytes(4 * capacity))
+            for measurement in HISTORY_MEASUREMENTS
+        }
+        self._next = 0
+        self._size = 0
+        self.last = -math.inf
+
+    def __len__(self) -> int:
+        """Return the number of samples held."""
+        return self._size
+
+    def append(self, time_s: float, metrics: CircuitMetrics) -> bool:
+        """Add a sample, overwriting the oldest one if full.
+
+        Returns False (and stores nothing) if time_s isn't after the last
+        sample's time.
+        """
+        if time_s <= self.last:
+            return False
+        self.last = time_s
+        index = self._next
+        self._times[index] = time_s
+        values = self._values
+        values["power"][index] = metrics.power_w
+        values["current"][index] = metrics.current_a
+        values["voltage"][index] = metrics.voltage_v
+        self._next = (index + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        return True
+
+    def _ordered(self, column: array) -> array:
+        """Return a column oldest-first."""
+        if self._size < self.capacity:
+            return column[: self._size]
+        return column[self._next :] + column[: self._next]
+
+    def window(
+        self, start: float, end: float, measurement: str
+    ) -> tuple[array, array]:
+        """Return (times, values) of the samples taken in [start, end]."""
+        times = self._ordered(self._times)
+        first = bisect_left(times, start)
+        last = bisect_right(times, end)
+        values = self._ordered(self._values[measurement])
+        return times[first:last], values[first:last]
+
+
+def summarize(values: array, percentile: float) -> dict[str, float]:
+    """Return mean, min, max and a nearest-rank percentile of values."""
+    count = len(values)
+    ranked = sorted(values)
+    rank = max(1, math.ceil(percentile / 100 * count))
+    return {
+        "mean": math.fsum(values) / count,
+        "min": ranked[0],
+        "max": ranked[-1],
+        "percentile": ranked[rank - 1],
+    }
+
+
+def integrate(times: array, values: array) -> tuple[float, float]:
+    """Return (imported, exported) Wh of a power window.
+
+    Integrated the same way as the energy sensors.
+    """
+    accumulator = EnergyAccumulator()
+    for time_s, value in zip(times, values):
+        accumulator.add(time_s, value)
+    return accumulator.import_wh, accumulator.export_wh
+
+
+class PanelHistory:
+    """One RingBuffer per circuit (and the main feed) covering window seconds.
+
+    Samples are stamped with the wall clock (time.time()) when they are
+    recorded, and queries are anchored to the wall clock too, so a window
+    ending now stays empty after the stream stops instead of returning the
+    last samples before the outage.
+    """
+
+    def __init__(self, window: float) -> None:
+        """Initialize without buffers; they are created on first sample."""
+        self.window = window
+        self._capacity = max(1, math.ceil(window * _SLOTS_PER_SECOND))
+        self._buffers: dict[int, RingBuffer] = {}
+        self.dropped = 0
+
+    def append(self, key: int, time_s: float, metrics: CircuitMetrics) -> None:
+        """Record a sample for key taken at wall-clock time_s."""
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = RingBuffer(self._capacity)
+        if not buffer.append(time_s, metrics):
+            # Clock stepped back, or a sample for the same instant
+            self.dropped += 1
+
+    def discard(self, key: int) -> None:
+        """Drop the buffer of a removed circuit."""
+        self._buffers.pop(key, None)
+
+    def query(
+        self,
+        key: int,
+        measurement: str,
+        seconds: float,
+        offset: float = 0.0,
+        percentile: float = 95.0,
+        now: float | None = None,
+    ) -> dict[str, Any]:
+        """Summarize key's samples from offset + seconds ago to offset ago.
+
+        Ages are relative to now (the wall clock unless given), and
+        newest_sample_age_seconds tells how old key's latest sample is.
+        Values are rounded to 3 decimals (the buffer stores single
+        precision).
+        """
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            return {"samples": 0}
+        if now is None:
+            now = time.time()
+        age = {"newest_sample_age_seconds": round(now - buffer.last, 3)}
+        end = now - offset
+        times, values = buffer.window(end - seconds, end, measurement)
+        if not values:
+            return {"samples": 0, **age}
+        result = summarize(values, percentile)
+        if measurement == "power":
+            result["energy_import_wh"], result["energy_export_wh"] = integrate(
+                times, values
+            )
+        result = {name: round(value, 3) for name, value in result.items()}
+        result.update(
+            samples=len(values),
+            start_seconds_ago=round(now - times[0], 3),
+            end_seconds_ago=round(now - times[-1], 3),
+            **age,
+        )
+        return result
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Return buffer counts and sizes for diagnostics."""
+        return {
+            "buffers": len(self._buffers),
+            "capacity": self._capacity,
+            "samples": sum(len(buffer) for buffer in self._buffers.values()),
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,129 @@
+"""Opt-in runtime instrumentation of the Span MAIN 40 hot path."""
+from __future__ import annotations
+
+import time
+from collections import Counter
+from typing import Any
+
+# Histogram names recorded by the client and coordinator
+PROCESS_NOTIFICATION = "process_notification"
+APPLY_BATCH = "apply_batch"
+DECODE_SINGLE_PHASE = "decode_single_phase"
+DECODE_DUAL_PHASE = "decode_dual_phase"
+DECODE_MAIN_FEED = "decode_main_feed"
+NOTIFY = "notify"
+COORDINATOR_FANOUT = "coordinator_fanout"
+
+# Bucket i counts durations in [2**(i-1), 2**i) ns; 2**36 ns is ~69 s
+_BUCKETS = 37
+
+
+class Log2Histogram:
+    """Duration histogram with power-of-two nanosecond buckets.
+
+    Recording is an int.bit_length() and a list increment, cheap enough
+    to run per notification.
+    """
+
+    __slots__ = ("buckets", "count", "total_ns", "max_ns")
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.buckets = [0] * _BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns: int) -> None:
+        """Add one duration."""
+        self.buckets[min(ns.bit_length(), _BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    @property
+    def mean_ns(self) -> float:
+        """Return the mean duration (ns)."""
+        return self.total_ns / self.count if self.count else 0.0
+
+    def percentile(self, fraction: float) -> int:
+        """Return the upper bound (ns) of the bucket holding the percentile.
+
+        Capped at the largest recorded duration.
+        """
+        if not self.count:
+            return 0
+        target = fraction * self.count
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= target:
+                return min(1 << index, self.max_ns)
+        return self.max_ns
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a summary (times in microseconds) plus non-empty buckets."""
+        return {
+            "count": self.count,
+            "mean_us": round(self.mean_ns / 1000, 2),
+            "p50_us": self.percentile(0.5) / 1000,
+            "p99_us": self.percentile(0.99) / 1000,
+            "max_us": self.max_ns / 1000,
+            "buckets": {
+                f"<{1 << index}ns": hits
+                for index, hits in enumerate(self.buckets)
+                if hits
+            },
+        }
+
+
+class Instrumentation:
+    """Counters and histograms collected while instrumentation is enabled."""
+
+    def __init__(self) -> None:
+        """Initialize with instrumentation disabled."""
+        self.enabled = False
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear everything collected so far."""
+        self.started = time.monotonic()
+        self.notifications: Counter[tuple[int, int]] = Counter()
+        self.bytes_received = 0
+        self.histograms: dict[str, Log2Histogram] = {}
+
+    def histogram(self, name: str) -> Log2Histogram:
+        """Return the named histogram, creating it on first use."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Log2Histogram()
+        return histogram
+
+    @property
+    def elapsed(self) -> float:
+        """Return seconds since the counters were reset."""
+        return max(time.monotonic() - self.started, 1e-9)
+
+    @property
+    def notification_rate(self) -> float:
+        """Return notifications per second over all traits and instances."""
+        return sum(self.notifications.values()) / self.elapsed
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return everything collected, for diagnostics."""
+        elapsed = self.elapsed
+        return {
+            "enabled": self.enabled,
+            "seconds": round(elapsed, 1),
+            "bytes_received": self.bytes_received,
+            "notification_rate": round(self.notification_rate, 2),
+            "rates": {
+                f"trait {trait_id} iid {iid}": round(count / elapsed, 3)
+                for (trait_id, iid), count in sorted(self.notifications.items())
+            },
+            "histograms": {
+                name: histogram.as_dict()
+                for name, histogram in self.histograms.items()
+            },
+        }
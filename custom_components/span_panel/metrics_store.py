@@ -0,0 +1,147 @@
+"""Array-backed storage for Span MAIN 40 metrics."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterator, Mapping
+from itertools import islice
+from operator import attrgetter
+from typing import Any
+
+from .const import MAX_CIRCUIT_ID
+
+# Float quantities stored per circuit, in CircuitMetrics field order
+METRIC_COLUMNS = (
+    "power_w",
+    "voltage_v",
+    "current_a",
+    "apparent_power_va",
+    "reactive_power_var",
+    "frequency_hz",
+    "power_factor",
+    "voltage_a_v",
+    "voltage_b_v",
+    "current_a_a",
+    "current_b_a",
+    "current_min_a",
+    "current_max_a",
+    "voltage_min_v",
+    "voltage_max_v",
+    "power_min_w",
+    "power_max_w",
+    "apparent_power_min_va",
+    "apparent_power_max_va",
+    "reactive_power_min_var",
+    "reactive_power_max_var",
+)
+
+# Row 0 is the main feed (MAIN_FEED_KEY), rows 1-50 are circuits
+ROWS = MAX_CIRCUIT_ID + 1
+
+_read_columns = attrgetter(*METRIC_COLUMNS)
+
+
+class MetricsRow:
+    """Read-only view of one row of a PanelMetricsStore.
+
+    Exposes the same attributes as CircuitMetrics, so entities keep using
+    data.metrics[circuit_id].power_w and friends.
+    """
+
+    __slots__ = ("_store", "_key")
+
+    def __init__(self, store: PanelMetricsStore, key: int) -> None:
+        """Initialize the view."""
+        self._store = store
+        self._key = key
+
+    @property
+    def is_on(self) -> bool:
+        """Return True if the breaker is on."""
+        return bool(self._store.is_on[self._key])
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a snapshot of the row."""
+        values = {name: getattr(self, name) for name in METRIC_COLUMNS}
+        values["is_on"] = self.is_on
+        return values
+
+    def __repr__(self) -> str:
+        """Return a readable representation."""
+        return f"MetricsRow({self._key}, {self.as_dict()})"
+
+
+def _column_property(index: int, name: str) -> property:
+    """Build a getter reading column index at the row's key."""
+
+    def getter(self: MetricsRow) -> float:
+        return self._store.columns[index][self._key]
+
+    return property(getter, doc=f"Return {name}.")
+
+
+for _index, _name in enumerate(METRIC_COLUMNS):
+    setattr(MetricsRow, _name, _column_property(_index, _name))
+
+
+class _CircuitMetricsMapping(Mapping[int, MetricsRow]):
+    """Mapping of circuit ID -> MetricsRow for circuits that reported data."""
+
+    __slots__ = ("_store",)
+
+    def __init__(self, store: PanelMetricsStore) -> None:
+        self._store = store
+
+    def __getitem__(self, key: int) -> MetricsRow:
+        if isinstance(key, int) and 1 <= key < ROWS and self._store.present[key]:
+            return self._store.rows[key]
+        raise KeyError(key)
+
+    def get(self, key: int, default=None):
+        if isinstance(key, int) and 1 <= key < ROWS and self._store.present[key]:
+            return self._store.rows[key]
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        present = self._store.present
+        return (key for key in range(1, ROWS) if present[key])
+
+    def __len__(self) -> int:
+        return sum(islice(self._store.present, 1, None))
+
+
+class PanelMetricsStore:
+    """Fixed-schema metrics store with one typed column per quantity.
+
+    Columns are preallocated arrays with one row per key (main feed and
+    circuits 1-50) and are updated in place, so a stream update allocates
+    nothing and memory stays flat over long uptimes.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty columns."""
+        self.columns = tuple(array("d", bytes(8 * ROWS)) for _ in METRIC_COLUMNS)
+        self.is_on = bytearray(b"\x01" * ROWS)
+        self.present = bytearray(ROWS)
+        self.rows = tuple(MetricsRow(self, key) for key in range(ROWS))
+        self.metrics = _CircuitMetricsMapping(self)
+
+    def row(self, key: int) -> MetricsRow:
+        """Return the view for a key (circuit ID or MAIN_FEED_KEY)."""
+        return self.rows[key]
+
+    def write(self, key: int, metrics) -> None:
+        """Copy decoded metrics into the row for key."""
+        for column, value in zip(self.columns, _read_columns(metrics)):
+            column[key] = value
+        self.is_on[key] = metrics.is_on
+        self.present[key] = 1
+
+    def discard(self, key: int) -> None:
+        """Forget the row for key (e.g. a circuit removed from the panel)."""
+        for column in self.columns:
+            column[key] = 0.0
+        self.is_on[key] = 1
+        self.present[key] = 0
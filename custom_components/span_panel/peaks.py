@@ -0,0 +1,81 @@
+"""Rolling per-circuit power extremes of Span MAIN 40 samples."""
+from __future__ import annotations
+
+from collections import deque
+
+
+class RollingExtreme:
+    """Maximum of the samples seen within a sliding time window.
+
+    Keeps a monotonic deque of (time, value), so each sample is pushed and
+    evicted at most once and the current extreme is always at the front.
+    Pass lowest=True to track the minimum instead.
+    """
+
+    __slots__ = ("_window", "_sign", "_samples")
+
+    def __init__(self, window: float, lowest: bool = False) -> None:
+        """Initialize an empty window."""
+        self._window = window
+        self._sign = -1.0 if lowest else 1.0
+        self._samples: deque[tuple[float, float]] = deque()
+
+    def push(self, now: float, value: float) -> None:
+        """Add a sample taken at monotonic time now."""
+        keyed = value * self._sign
+        samples = self._samples
+        while samples and samples[-1][1] <= keyed:
+            samples.pop()
+        samples.append((now, keyed))
+        self.expire(now)
+
+    def expire(self, now: float) -> None:
+        """Drop samples older than the window."""
+        samples = self._samples
+        cutoff = now - self._window
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+
+    @property
+    def value(self) -> float | None:
+        """Return the extreme over the window, or None if it is empty."""
+        if not self._samples:
+            return None
+        return self._samples[0][1] * self._sign
+
+
+class PanelPeaks:
+    """Highest power_max_w and lowest power_min_w per circuit over window s.
+
+    Fed every decoded circuit sample, so a spike reported between two
+    state writes still reaches the peak sensor.
+    """
+
+    def __init__(self, window: float) -> None:
+        """Initialize without windows; they are created on first sample."""
+        self.window = window
+        self._extremes: dict[int, tuple[RollingExtreme, RollingExtreme]] = {}
+
+    def add(self, circuit_id: int, now: float, peak_w: float, trough_w: float) -> None:
+        """Add one sample's power extremes, taken at monotonic time now."""
+        extremes = self._extremes.get(circuit_id)
+        if extremes is None:
+            extremes = self._extremes[circuit_id] = (
+                RollingExtreme(self.window),
+                RollingExtreme(self.window, lowest=True),
+            )
+        extremes[0].push(now, peak_w)
+        extremes[1].push(now, trough_w)
+
+    def get(self, circuit_id: int, now: float, lowest: bool = False) -> float | None:
+        """Return a circuit's peak (or trough) over the window ending now."""
+        extremes = self._extremes.get(circuit_id)
+        if extremes is None:
+            return None
+        extreme = extremes[1] if lowest else extremes[0]
+        extreme.expire(now)
+        return extreme.value
+
+    def discard(self, circuit_id: int) -> None:
+        """Drop the windows of a removed circuit."""
+        self._extremes.pop(circuit_id, None)
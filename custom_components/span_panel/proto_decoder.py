@@ -0,0 +1,85 @@
+"""Descriptor-based notification decoding using the bundled span.protoset."""
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from pathlib import Path
+
+_LOGGER = logging.getLogger(__name__)
+
+_PROTOSET_PATH = Path(__file__).parent / "span.protoset"
+_NOTIFICATION = "io.span.panel.protocols.traithandler.TraitInstanceNotification"
+
+# (trait_id, instance_id, raw metric payloads) or None if not an external trait
+DecodedNotification = tuple[int, int, list[bytes]] | None
+
+_decoder: Callable[[bytes], DecodedNotification] | None = None
+_loaded = False
+
+
+def _message_class(pool, name: str):
+    """Return a message class for a descriptor across protobuf versions."""
+    from google.protobuf import message_factory
+
+    descriptor = pool.FindMessageTypeByName(name)
+    if hasattr(message_factory, "GetMessageClass"):
+        return message_factory.GetMessageClass(descriptor)
+    return message_factory.MessageFactory(pool).GetPrototype(descriptor)
+
+
+def _build_decoder() -> Callable[[bytes], DecodedNotification]:
+    """Load the protoset and build the notification decoder."""
+    from google.protobuf import descriptor_pb2, descriptor_pool
+
+    file_set = descriptor_pb2.FileDescriptorSet.FromString(_PROTOSET_PATH.read_bytes())
+    pool = descriptor_pool.DescriptorPool()
+    # protoc --include_imports emits files in dependency order
+    for file_proto in file_set.file:
+        pool.AddSerializedFile(file_proto.SerializeToString())
+    notification_cls = _message_class(pool, _NOTIFICATION)
+
+    def decode(data: bytes) -> DecodedNotification:
+        """Decode a TraitInstanceNotification into (trait, iid, metrics)."""
+        msg = notification_cls.FromString(data)
+        rti = msg.resource_trait_info
+        if not rti.HasField("external"):
+            return None
+        info = rti.external.trait_info
+        metrics = [
+            raw
+            for metric_list in msg.trait_notify.metrics
+            for raw in metric_list.metrics
+        ]
+        return info.trait_metadata.trait_id, info.trait_instance_id.id, metrics
+
+    return decode
+
+
+def load() -> Callable[[bytes], DecodedNotification] | None:
+    """Return the descriptor-based decoder, or None if it cannot be loaded.
+
+    The protoset is read once per process. This does file I/O, so call it
+    from an executor when running inside the event loop.
+    """
+    global _decoder, _loaded
+    if not _loaded:
+        _loaded = True
+        try:
+            _decoder = _build_decoder()
+        except Exception:
+            _LOGGER.warning(
+                "Could not load %s, using the built-in decoder",
+                _PROTOSET_PATH.name,
+                exc_info=True,
+            )
+    return _decoder
+
+
+def runtime() -> str:
+    """Return the active protobuf runtime (upb, cpp or python)."""
+    try:
+        from google.protobuf.internal import api_implementation
+
+        return api_implementation.Type()
+    except Exception:
+        return "unavailable"
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import logging
+import time
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -10,17 +11,32 @@ from homeassistant.components.sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    EntityCategory,
     UnitOfElectricCurrent,
     UnitOfElectricPotential,
+    UnitOfEnergy,
     UnitOfFrequency,
+    UnitOfInformation,
     UnitOfPower,
+    UnitOfTime,
 )
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    MAIN_FEED_KEY,
+    MEASUREMENT_CURRENT,
+    MEASUREMENT_FREQUENCY,
+    MEASUREMENT_POWER,
+    MEASUREMENT_VOLTAGE,
+    PRODUCT_MODELS,
+    SIGNAL_CIRCUITS_ADDED,
+)
 from .coordinator import SpanPanelCoordinator
+from .instrumentation import NOTIFY, PROCESS_NOTIFICATION
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -40,18 +56,77 @@ async def async_setup_entry(
         SpanMainVoltageSensor(coordinator, entry),
         SpanMainCurrentSensor(coordinator, entry),
         SpanMainFrequencySensor(coordinator, entry),
+        SpanMainEnergySensor(coordinator, entry, export=False),
+        SpanMainEnergySensor(coordinator, entry, export=True),
+    ])
+
+    # Panel-wide aggregates
+    entities.extend([
+        SpanTotalCircuitPowerSensor(coordinator, entry),
+        SpanUnmeteredPowerSensor(coordinator, entry),
+        SpanLegCurrentSensor(coordinator, entry, leg_b=False),
+        SpanLegCurrentSensor(coordinator, entry, leg_b=True),
+        SpanLegImbalanceSensor(coordinator, entry),
+    ])
+
+    # The site device sums all panels and belongs to the first entry; a
+    # later entry creates it when it inherits ownership
+    @callback
+    def _async_adopt_site() -> None:
+        async_add_entities([SpanSitePowerSensor(coordinator, entry)])
+
+    if coordinator.site.claim(entry.entry_id, _async_adopt_site):
+        entities.append(SpanSitePowerSensor(coordinator, entry))
+
+    # Instrumentation diagnostics
+    entities.extend([
+        SpanNotificationRateSensor(coordinator, entry),
+        SpanDecodeTimeSensor(coordinator, entry),
+        SpanFanoutTimeSensor(coordinator, entry),
+        SpanBytesReceivedSensor(coordinator, entry),
+        SpanReconnectsSensor(coordinator, entry),
     ])
 
     # Per-circuit sensors
-    for circuit_id, circuit_info in coordinator.data.circuits.items():
-        entities.extend([
-            SpanCircuitPowerSensor(coordinator, entry, circuit_id),
-            SpanCircuitVoltageSensor(coordinator, entry, circuit_id),
-            SpanCircuitCurrentSensor(coordinator, entry, circuit_id),
-        ])
+    for circuit_id in coordinator.data.circuits:
+        entities.extend(_circuit_sensors(coordinator, entry, circuit_id))
 
     async_add_entities(entities)
 
+    @callback
+    def _async_add_circuits(circuit_ids: list[int]) -> None:
+        """Add sensors for circuits found by a resync."""
+        async_add_entities(
+            sensor
+            for circuit_id in circuit_ids
+            for sensor in _circuit_sensors(coordinator, entry, circuit_id)
+        )
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_CIRCUITS_ADDED.format(entry.entry_id), _async_add_circuits
+        )
+    )
+
+
+def _circuit_sensors(
+    coordinator: SpanPanelCoordinator, entry: ConfigEntry, circuit_id: int
+) -> list[SensorEntity]:
+    """Return the sensors of one circuit."""
+    sensors: list[SensorEntity] = [
+        SpanCircuitPowerSensor(coordinator, entry, circuit_id),
+        SpanCircuitVoltageSensor(coordinator, entry, circuit_id),
+        SpanCircuitCurrentSensor(coordinator, entry, circuit_id),
+        SpanCircuitEnergySensor(coordinator, entry, circuit_id, export=False),
+        SpanCircuitEnergySensor(coordinator, entry, circuit_id, export=True),
+    ]
+    if coordinator.peak_sensors:
+        sensors.extend([
+            SpanCircuitPeakPowerSensor(coordinator, entry, circuit_id),
+            SpanCircuitTroughPowerSensor(coordinator, entry, circuit_id),
+        ])
+    return sensors
+
 
 class SpanBaseSensor(SensorEntity):
     """Base class for Span sensors."""
@@ -59,6 +134,12 @@ class SpanBaseSensor(SensorEntity):
     _attr_has_entity_name = True
     _attr_state_class = SensorStateClass.MEASUREMENT
 
+    # Coordinator listener key; main feed sensors only wake on main feed updates
+    _listener_key: int | None = MAIN_FEED_KEY
+
+    # Deadband class used to suppress state writes for insignificant changes
+    _measurement: str | None = None
+
     def __init__(
         self,
         coordinator: SpanPanelCoordinator,
@@ -68,6 +149,9 @@ class SpanBaseSensor(SensorEntity):
         self._coordinator = coordinator
         self._entry = entry
         self._remove_listener = None
+        self._last_written = None
+        self._last_write_time = 0.0
+        self._last_available = True
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -76,14 +160,19 @@ class SpanBaseSensor(SensorEntity):
             identifiers={(DOMAIN, self._entry.data["host"])},
             name="Span MAIN 40",
             manufacturer="Span",
-            model="MAIN 40 (Gen3)",
+            model=PRODUCT_MODELS.get(self._coordinator.data.product_id),
             sw_version=self._coordinator.data.firmware or None,
         )
 
+    @property
+    def available(self) -> bool:
+        """Return False while the panel stream is stale."""
+        return self._coordinator.available
+
     async def async_added_to_hass(self) -> None:
         """Register for updates when added to HA."""
         self._remove_listener = self._coordinator.async_add_listener(
-            self._handle_update
+            self._handle_update, self._listener_key
         )
 
     async def async_will_remove_from_hass(self) -> None:
@@ -91,9 +180,33 @@ class SpanBaseSensor(SensorEntity):
         if self._remove_listener:
             self._remove_listener()
 
+    def _within_deadband(self, value: float | None, now: float) -> bool:
+        """Return True if value is too close to the last written one to write.
+
+        A value is always written once max_silence has elapsed since the
+        previous write, and whenever it changes to or from None.
+        """
+        last = self._last_written
+        if value is None or last is None:
+            return value == last
+        if now - self._last_write_time >= self._coordinator.max_silence:
+            return False
+        if self._measurement is None:
+            return value == last
+        abs_band, rel_band = self._coordinator.deadband(self._measurement)
+        return abs(value - last) <= max(abs_band, abs(last) * rel_band / 100)
+
     @callback
     def _handle_update(self) -> None:
         """Handle coordinator data update."""
+        value = self.native_value
+        now = time.monotonic()
+        available = self.available
+        if available == self._last_available and self._within_deadband(value, now):
+            return
+        self._last_available = available
+        self._last_written = value
+        self._last_write_time = now
         self.async_write_ha_state()
 
 
@@ -103,6 +216,7 @@ class SpanMainPowerSensor(SpanBaseSensor):
     _attr_device_class = SensorDeviceClass.POWER
     _attr_native_unit_of_measurement = UnitOfPower.WATT
     _attr_suggested_display_precision = 0
+    _measurement = MEASUREMENT_POWER
 
     def __init__(self, coordinator, entry):
         super().__init__(coordinator, entry)
@@ -121,6 +235,7 @@ class SpanMainVoltageSensor(SpanBaseSensor):
     _attr_device_class = SensorDeviceClass.VOLTAGE
     _attr_native_unit_of_measurement = UnitOfElectricPotential.VOLT
     _attr_suggested_display_precision = 1
+    _measurement = MEASUREMENT_VOLTAGE
 
     def __init__(self, coordinator, entry):
         super().__init__(coordinator, entry)
@@ -139,6 +254,7 @@ class SpanMainCurrentSensor(SpanBaseSensor):
     _attr_device_class = SensorDeviceClass.CURRENT
     _attr_native_unit_of_measurement = UnitOfElectricCurrent.AMPERE
     _attr_suggested_display_precision = 1
+    _measurement = MEASUREMENT_CURRENT
 
     def __init__(self, coordinator, entry):
         super().__init__(coordinator, entry)
@@ -157,6 +273,7 @@ class SpanMainFrequencySensor(SpanBaseSensor):
     _attr_device_class = SensorDeviceClass.FREQUENCY
     _attr_native_unit_of_measurement = UnitOfFrequency.HERTZ
     _attr_suggested_display_precision = 2
+    _measurement = MEASUREMENT_FREQUENCY
 
     def __init__(self, coordinator, entry):
         super().__init__(coordinator, entry)
@@ -169,6 +286,165 @@ class SpanMainFrequencySensor(SpanBaseSensor):
         return round(m.frequency_hz, 2) if m and m.frequency_hz > 0 else None
 
 
+class SpanAggregateSensor(SpanBaseSensor):
+    """Panel-wide aggregate kept up to date by the client."""
+
+    # Any circuit can change an aggregate
+    _listener_key = None
+
+    # PanelAggregates attribute and rounding of the state
+    _attribute: str
+    _digits = 1
+
+    @property
+    def native_value(self) -> float | None:
+        value = getattr(self._coordinator.client.aggregates, self._attribute)
+        return round(value, self._digits)
+
+
+class SpanTotalCircuitPowerSensor(SpanAggregateSensor):
+    """Power summed over all circuits."""
+
+    _attr_device_class = SensorDeviceClass.POWER
+    _attr_native_unit_of_measurement = UnitOfPower.WATT
+    _attr_suggested_display_precision = 0
+    _measurement = MEASUREMENT_POWER
+    _attribute = "circuit_power_w"
+
+    def __init__(self, coordinator, entry):
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{entry.data['host']}_total_circuit_power"
+        self._attr_name = "Total Circuit Power"
+
+
+class SpanUnmeteredPowerSensor(SpanAggregateSensor):
+    """Main feed power not drawn through any metered circuit."""
+
+    _attr_device_class = SensorDeviceClass.POWER
+    _attr_native_unit_of_measurement = UnitOfPower.WATT
+    _attr_suggested_display_precision = 0
+    _measurement = MEASUREMENT_POWER
+    _attribute = "unmetered_power_w"
+
+    def __init__(self, coordinator, entry):
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{entry.data['host']}_unmetered_power"
+        self._attr_name = "Unmetered Power"
+
+
+class SpanLegCurrentSensor(SpanAggregateSensor):
+    """Circuit current on one leg of the split-phase supply (estimated).
+
+    Single-phase circuits are placed on a leg by circuit_leg()'s breaker
+    space heuristic, so the sensor is disabled by default and flagged with
+    an estimated attribute.
+    """
+
+    _attr_entity_registry_enabled_default = False
+    _attr_extra_state_attributes = {"estimated": True}
+    _attr_device_class = SensorDeviceClass.CURRENT
+    _attr_native_unit_of_measurement = UnitOfElectricCurrent.AMPERE
+    _attr_suggested_display_precision = 1
+    _measurement = MEASUREMENT_CURRENT
+    _digits = 2
+
+    def __init__(self, coordinator, entry, leg_b: bool):
+        super().__init__(coordinator, entry)
+        leg = "b" if leg_b else "a"
+        self._attribute = f"leg_{leg}_current_a"
+        self._attr_unique_id = f"{entry.data['host']}_leg_{leg}_current"
+        self._attr_name = f"Leg {leg.upper()} Current"
+
+
+class SpanLegImbalanceSensor(SpanAggregateSensor):
+    """Difference between the estimated leg A and leg B circuit currents."""
+
+    _attr_entity_registry_enabled_default = False
+    _attr_extra_state_attributes = {"estimated": True}
+    _attr_device_class = SensorDeviceClass.CURRENT
+    _attr_native_unit_of_measurement = UnitOfElectricCurrent.AMPERE
+    _attr_suggested_display_precision = 1
+    _measurement = MEASUREMENT_CURRENT
+    _attribute = "leg_imbalance_a"
+    _digits = 2
+
+    def __init__(self, coordinator, entry):
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{entry.data['host']}_leg_imbalance"
+        self._attr_name = "Leg Imbalance"
+
+
+class SpanSitePowerSensor(SpanBaseSensor):
+    """Main feed power summed over every configured panel."""
+
+    _attr_device_class = SensorDeviceClass.POWER
+    _attr_native_unit_of_measurement = UnitOfPower.WATT
+    _attr_suggested_display_precision = 0
+    _measurement = MEASUREMENT_POWER
+
+    def __init__(self, coordinator, entry):
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{DOMAIN}_site_power"
+        self._attr_name = "Site Power"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return DeviceInfo(
+            identifiers={(DOMAIN, "site")},
+            name="Span Site",
+            manufacturer="Span",
+            model="Site",
+        )
+
+    @property
+    def available(self) -> bool:
+        return self._coordinator.site.panels > 0
+
+    async def async_added_to_hass(self) -> None:
+        """Register for site total updates."""
+        self._remove_listener = self._coordinator.site.async_add_listener(
+            self._handle_update
+        )
+
+    @property
+    def native_value(self) -> float | None:
+        site = self._coordinator.site
+        return round(site.total_power_w, 1) if site.panels else None
+
+
+def _energy_kwh(
+    coordinator: SpanPanelCoordinator, key: int, export: bool
+) -> float | None:
+    """Return the imported or exported energy (kWh) accumulated for key."""
+    accumulator = coordinator.client.energy.get(key)
+    if accumulator is None:
+        return None
+    wh = accumulator.export_wh if export else accumulator.import_wh
+    return round(wh / 1000, 3)
+
+
+class SpanMainEnergySensor(SpanBaseSensor):
+    """Main feed energy imported from, or exported to the grid (disabled)."""
+
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+    _attr_suggested_display_precision = 3
+
+    def __init__(self, coordinator, entry, export: bool):
+        super().__init__(coordinator, entry)
+        self._export = export
+        direction = "exported" if export else "imported"
+        self._attr_unique_id = f"{entry.data['host']}_main_energy_{direction}"
+        self._attr_name = f"Main Feed Energy {direction.capitalize()}"
+        # Export is only seen on sites with solar or storage
+        self._attr_entity_registry_enabled_default = not export
+
+    @property
+    def native_value(self) -> float | None:
+        return _energy_kwh(self._coordinator, MAIN_FEED_KEY, self._export)
+
+
 class SpanCircuitSensor(SpanBaseSensor):
     """Base class for per-circuit sensors."""
 
@@ -180,6 +456,13 @@ class SpanCircuitSensor(SpanBaseSensor):
     ) -> None:
         super().__init__(coordinator, entry)
         self._circuit_id = circuit_id
+        self._listener_key = circuit_id
+        if (
+            coordinator.statistics_only
+            and self._attr_state_class is SensorStateClass.MEASUREMENT
+        ):
+            # Long-term statistics come from the hourly import instead
+            self._attr_state_class = None
 
     @property
     def _circuit_info(self):
@@ -208,6 +491,7 @@ class SpanCircuitPowerSensor(SpanCircuitSensor):
     _attr_device_class = SensorDeviceClass.POWER
     _attr_native_unit_of_measurement = UnitOfPower.WATT
     _attr_suggested_display_precision = 0
+    _measurement = MEASUREMENT_POWER
 
     def __init__(self, coordinator, entry, circuit_id):
         super().__init__(coordinator, entry, circuit_id)
@@ -226,6 +510,7 @@ class SpanCircuitVoltageSensor(SpanCircuitSensor):
     _attr_device_class = SensorDeviceClass.VOLTAGE
     _attr_native_unit_of_measurement = UnitOfElectricPotential.VOLT
     _attr_suggested_display_precision = 1
+    _measurement = MEASUREMENT_VOLTAGE
 
     def __init__(self, coordinator, entry, circuit_id):
         super().__init__(coordinator, entry, circuit_id)
@@ -244,6 +529,7 @@ class SpanCircuitCurrentSensor(SpanCircuitSensor):
     _attr_device_class = SensorDeviceClass.CURRENT
     _attr_native_unit_of_measurement = UnitOfElectricCurrent.AMPERE
     _attr_suggested_display_precision = 2
+    _measurement = MEASUREMENT_CURRENT
 
     def __init__(self, coordinator, entry, circuit_id):
         super().__init__(coordinator, entry, circuit_id)
@@ -254,3 +540,185 @@ class SpanCircuitCurrentSensor(SpanCircuitSensor):
     def native_value(self) -> float | None:
         m = self._circuit_metrics
         return round(m.current_a, 3) if m else None
+
+
+class SpanCircuitEnergySensor(SpanCircuitSensor):
+    """Per-circuit energy consumed, or produced (disabled by default)."""
+
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+    _attr_suggested_display_precision = 3
+
+    def __init__(self, coordinator, entry, circuit_id, export: bool):
+        super().__init__(coordinator, entry, circuit_id)
+        self._export = export
+        direction = "exported" if export else "imported"
+        self._attr_unique_id = (
+            f"{entry.data['host']}_circuit_{circuit_id}_energy_{direction}"
+        )
+        self._attr_name = f"Energy {direction.capitalize()}"
+        # Only circuits with generation or storage ever export
+        self._attr_entity_registry_enabled_default = not export
+
+    @property
+    def native_value(self) -> float | None:
+        return _energy_kwh(self._coordinator, self._circuit_id, self._export)
+
+
+class SpanCircuitPeakPowerSensor(SpanCircuitSensor):
+    """Per-circuit highest power over a rolling window."""
+
+    _attr_device_class = SensorDeviceClass.POWER
+    _attr_native_unit_of_measurement = UnitOfPower.WATT
+    _attr_suggested_display_precision = 0
+    _measurement = MEASUREMENT_POWER
+
+    # Track the lowest reported minimum instead of the highest maximum
+    _lowest = False
+
+    def __init__(self, coordinator, entry, circuit_id):
+        super().__init__(coordinator, entry, circuit_id)
+        self._attr_unique_id = f"{entry.data['host']}_circuit_{circuit_id}_peak_power"
+        self._attr_name = "Peak Power"
+
+    @property
+    def native_value(self) -> float | None:
+        # The client windows every sample, including those merged away
+        # between state writes
+        peaks = self._coordinator.client.peaks
+        if peaks is None:
+            return None
+        value = peaks.get(self._circuit_id, time.monotonic(), self._lowest)
+        return round(value, 1) if value is not None else None
+
+
+class SpanCircuitTroughPowerSensor(SpanCircuitPeakPowerSensor):
+    """Per-circuit lowest power over a rolling window."""
+
+    _lowest = True
+
+    def __init__(self, coordinator, entry, circuit_id):
+        super().__init__(coordinator, entry, circuit_id)
+        self._attr_unique_id = (
+            f"{entry.data['host']}_circuit_{circuit_id}_trough_power"
+        )
+        self._attr_name = "Trough Power"
+
+
+class SpanDiagnosticSensor(SpanBaseSensor):
+    """Base class for polled instrumentation sensors on the panel device.
+
+    Values other than the reconnect count are only collected while the
+    Instrumentation switch is on and read as unknown otherwise.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_should_poll = True
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator, entry, key: str, name: str) -> None:
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{entry.data['host']}_{key}"
+        self._attr_name = name
+
+    @property
+    def available(self) -> bool:
+        """Diagnostics stay available while the stream is down."""
+        return True
+
+    @property
+    def _instrumentation(self):
+        instrumentation = self._coordinator.client.instrumentation
+        return instrumentation if instrumentation.enabled else None
+
+    async def async_added_to_hass(self) -> None:
+        """Polled; no coordinator listener."""
+
+
+class SpanNotificationRateSensor(SpanDiagnosticSensor):
+    """Notifications received per second, all traits."""
+
+    _attr_native_unit_of_measurement = "notifications/s"
+    _attr_suggested_display_precision = 1
+
+    def __init__(self, coordinator, entry):
+        super().__init__(coordinator, entry, "notification_rate", "Notification Rate")
+
+    @property
+    def native_value(self) -> float | None:
+        i = self._instrumentation
+        return round(i.notification_rate, 2) if i else None
+
+
+class SpanHistogramSensor(SpanDiagnosticSensor):
+    """p99 of an instrumentation histogram, with the summary as attributes."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MICROSECONDS
+    _attr_suggested_display_precision = 0
+    _histogram: str
+
+    @property
+    def native_value(self) -> float | None:
+        i = self._instrumentation
+        if i is None or self._histogram not in i.histograms:
+            return None
+        return i.histograms[self._histogram].percentile(0.99) / 1000
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        i = self._instrumentation
+        if i is None or self._histogram not in i.histograms:
+            return None
+        summary = i.histograms[self._histogram].as_dict()
+        summary.pop("buckets")
+        return summary
+
+
+class SpanDecodeTimeSensor(SpanHistogramSensor):
+    """p99 time to process one notification."""
+
+    _histogram = PROCESS_NOTIFICATION
+
+    def __init__(self, coordinator, entry):
+        super().__init__(coordinator, entry, "decode_time", "Decode Time p99")
+
+
+class SpanFanoutTimeSensor(SpanHistogramSensor):
+    """p99 time to deliver one batch of updates to all listeners."""
+
+    _histogram = NOTIFY
+
+    def __init__(self, coordinator, entry):
+        super().__init__(coordinator, entry, "fanout_time", "Fan-out Time p99")
+
+
+class SpanBytesReceivedSensor(SpanDiagnosticSensor):
+    """Notification bytes received since instrumentation was enabled."""
+
+    _attr_device_class = SensorDeviceClass.DATA_SIZE
+    _attr_native_unit_of_measurement = UnitOfInformation.BYTES
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, coordinator, entry):
+        super().__init__(coordinator, entry, "bytes_received", "Bytes Received")
+
+    @property
+    def native_value(self) -> int | None:
+        i = self._instrumentation
+        return i.bytes_received if i else None
+
+
+class SpanReconnectsSensor(SpanDiagnosticSensor):
+    """Stream resubscriptions since the integration started."""
+
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, coordinator, entry):
+        super().__init__(coordinator, entry, "reconnects", "Stream Reconnects")
+
+    @property
+    def native_value(self) -> int:
+        return self._coordinator.client.reconnects
@@ -0,0 +1,98 @@
+"""Services for the Span MAIN 40 integration."""
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN, MAX_CIRCUIT_ID, SERVICE_QUERY_HISTORY
+from .coordinator import SpanPanelCoordinator
+from .history import HISTORY_MEASUREMENTS
+
+QUERY_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Optional("config_entry_id"): cv.string,
+        vol.Required("circuit"): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=MAX_CIRCUIT_ID)
+        ),
+        vol.Optional("measurement", default="power"): vol.In(HISTORY_MEASUREMENTS),
+        vol.Optional("seconds", default=300): vol.All(
+            vol.Coerce(float), vol.Range(min=1)
+        ),
+        vol.Optional("offset", default=0): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+        vol.Optional("percentile", default=95): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=100)
+        ),
+    }
+)
+
+
+def _coordinator(hass: HomeAssistant, call: ServiceCall) -> SpanPanelCoordinator:
+    """Return the coordinator a call is addressed to."""
+    coordinators: dict[str, SpanPanelCoordinator] = hass.data.get(DOMAIN, {})
+    entry_id = call.data.get("config_entry_id")
+    if entry_id is not None:
+        if entry_id not in coordinators:
+            raise ServiceValidationError(f"No loaded Span panel entry {entry_id}")
+        return coordinators[entry_id]
+    if len(coordinators) != 1:
+        raise ServiceValidationError(
+            "config_entry_id is required when more than one panel is configured"
+        )
+    return next(iter(coordinators.values()))
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services (once for all entries)."""
+    if hass.services.has_service(DOMAIN, SERVICE_QUERY_HISTORY):
+        return
+
+    @callback
+    def query_history(call: ServiceCall) -> ServiceResponse:
+        """Summarize a circuit's recent samples from the in-memory buffer.
+
+        Circuit 0 is the main feed. The window covers the seconds before
+        offset seconds ago; nothing is read from the recorder.
+        """
+        history = _coordinator(hass, call).client.history
+        if history is None:
+            raise ServiceValidationError("History is disabled for this panel")
+        circuit = call.data["circuit"]
+        measurement = call.data["measurement"]
+        return {
+            "circuit": circuit,
+            "measurement": measurement,
+            **history.query(
+                circuit,
+                measurement,
+                call.data["seconds"],
+                call.data["offset"],
+                call.data["percentile"],
+            ),
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_HISTORY,
+        query_history,
+        schema=QUERY_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+@callback
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the services once the last entry is unloaded."""
+    if not hass.data.get(DOMAIN):
+        hass.services.async_remove(DOMAIN, SERVICE_QUERY_HISTORY)
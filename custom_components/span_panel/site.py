@@ -0,0 +1,102 @@
+"""Site-wide aggregate across every configured Span panel."""
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+_DATA_SITE = f"{DOMAIN}_site"
+
+
+class SiteAggregator:
+    """Running total of main feed power over all panels.
+
+    Each panel reports its own main feed power and the total is adjusted
+    by the difference, so an update costs the same however many panels
+    there are. The site device belongs to the first entry that claims it;
+    when the owner goes away, ownership passes to the longest-standing
+    remaining claimant, which is asked to create the site entities.
+    """
+
+    def __init__(self) -> None:
+        """Initialize with no panels."""
+        self._power: dict[str, float] = {}
+        self.total_power_w = 0.0
+        self.owner: str | None = None
+        # Claimants in claim order -> callback creating the site entities
+        self._claimants: dict[str, Callable[[], None]] = {}
+        self._listeners: list[Callable[[], None]] = []
+
+    @property
+    def panels(self) -> int:
+        """Return the number of panels that have reported."""
+        return len(self._power)
+
+    def claim(self, entry_id: str, adopt: Callable[[], None]) -> bool:
+        """Make entry_id the owner unless there is one. Returns True if owner.
+
+        Otherwise adopt is called if entry_id later inherits ownership; the
+        owner creates its site entities itself when claim returns True.
+        """
+        self._claimants[entry_id] = adopt
+        if self.owner is None:
+            self.owner = entry_id
+        return self.owner == entry_id
+
+    @callback
+    def update(self, entry_id: str, power_w: float) -> None:
+        """Replace a panel's main feed power in the total."""
+        self.total_power_w += power_w - self._power.get(entry_id, 0.0)
+        self._power[entry_id] = power_w
+        self._notify()
+
+    @callback
+    def remove(self, entry_id: str) -> None:
+        """Drop a panel from the total, handing ownership on if it owned it."""
+        self._claimants.pop(entry_id, None)
+        if self._power.pop(entry_id, None) is not None:
+            # Recompute rather than subtract, which also clears rounding drift
+            self.total_power_w = sum(self._power.values())
+            self._notify()
+        if self.owner != entry_id:
+            return
+        self.owner = next(iter(self._claimants), None)
+        if self.owner is not None:
+            try:
+                self._claimants[self.owner]()
+            except Exception:
+                _LOGGER.exception("Error handing the site over to %s", self.owner)
+
+    def async_add_listener(
+        self, update_callback: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Add a listener for total changes. Returns unregister function."""
+        self._listeners.append(update_callback)
+
+        def remove():
+            if update_callback in self._listeners:
+                self._listeners.remove(update_callback)
+
+        return remove
+
+    def _notify(self) -> None:
+        """Call every listener."""
+        for listener in tuple(self._listeners):
+            try:
+                listener()
+            except Exception:
+                _LOGGER.exception("Error calling site listener")
+
+
+@callback
+def async_get_site(hass: HomeAssistant) -> SiteAggregator:
+    """Return the site aggregate, creating it with the first panel."""
+    site = hass.data.get(_DATA_SITE)
+    if site is None:
+        site = hass.data[_DATA_SITE] = SiteAggregator()
+    return site
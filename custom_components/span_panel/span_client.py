@@ -3,22 +3,55 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import random
 import struct
-from collections.abc import Callable
+import time
+from collections.abc import Callable, Iterator, Mapping
 from dataclasses import dataclass, field
-from pathlib import Path
+from enum import StrEnum
 
 import grpc
 
 from .const import (
     BREAKER_OFF_VOLTAGE_MV,
+    DEFAULT_CIRCUIT_MAX_RATE,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_MAIN_MAX_RATE,
+    DEFAULT_NAME_CONCURRENCY,
+    DEFAULT_NAME_TIMEOUT,
+    DEFAULT_STALE_TIMEOUT,
     MAIN_FEED_IID,
+    MAIN_FEED_KEY,
+    MAX_CIRCUIT_ID,
     METRIC_IID_OFFSET,
+    PRODUCT_GEN3_GATEWAY,
     PRODUCT_GEN3_PANEL,
     TRAIT_CIRCUIT_NAMES,
     TRAIT_POWER_METRICS,
     VENDOR_SPAN,
 )
+from . import proto_decoder
+from .aggregates import PanelAggregates
+from .capture import CaptureWriter
+from .channel_pool import POOL
+from .decode_worker import DecodeWorker
+from .detector import CircuitEventDetector
+from .dispatcher import CoalescingDispatcher
+from .energy import EnergyTracker
+from .header_cache import HeaderCache, TraitHeader
+from .history import PanelHistory
+from .instrumentation import (
+    APPLY_BATCH,
+    DECODE_DUAL_PHASE,
+    DECODE_MAIN_FEED,
+    DECODE_SINGLE_PHASE,
+    NOTIFY,
+    PROCESS_NOTIFICATION,
+    Instrumentation,
+)
+from .metrics_store import MetricsRow, PanelMetricsStore
+from .peaks import PanelPeaks
+from .statistics_aggregator import StatisticsAggregator
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,8 +61,21 @@ _GET_INSTANCES = f"{_SVC}/GetInstances"
 _SUBSCRIBE = f"{_SVC}/Subscribe"
 _GET_REVISION = f"{_SVC}/GetRevision"
 
-# Load proto descriptors for serialization/deserialization
-_PROTOSET_PATH = Path(__file__).parent / "span.protoset"
+# Distinct resource_trait_info headers remembered by the pre-filter; a panel
+# has roughly one per trait instance
+_HEADER_CACHE_SIZE = 128
+
+# Most trait instances with a frame queued for the decode worker; the main
+# feed and all 50 circuits fit
+_WORKER_MAX_PENDING = 64
+
+# Varints carrying int64 values: sign bit and modulus
+_INT64_SIGN = 1 << 63
+_UINT64 = 1 << 64
+
+# Stream reconnect backoff (s): doubles per failed attempt up to the cap
+_BACKOFF_INITIAL = 1.0
+_BACKOFF_MAX = 60.0
 
 
 @dataclass
@@ -37,12 +83,55 @@ class CircuitInfo:
     """Information about a circuit."""
 
     circuit_id: int
-    name: str
+    # None until fetched; apply_discovery() resolves a failed fetch
+    name: str | None
     metric_iid: int
     is_dual_phase: bool = False
 
 
+class StreamStalledError(Exception):
+    """The Subscribe stream went silent and was cancelled by the watchdog."""
+
+
+class ConnectionState(StrEnum):
+    """Health of the notification stream."""
+
+    CONNECTING = "connecting"  # Subscribe opened, nothing received yet
+    STREAMING = "streaming"  # Notifications arriving
+    DEGRADED = "degraded"  # Notifications late (half the stale timeout)
+    BACKOFF = "backoff"  # Waiting to resubscribe after a failure
+    STALE = "stale"  # Nothing received for the stale timeout
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Return the delay before reconnect attempt (0-based), with jitter.
+
+    Uses "equal jitter": half the exponential delay plus a random share of
+    the other half, so clients restarted together spread out their retries.
+    """
+    delay = min(_BACKOFF_MAX, _BACKOFF_INITIAL * 2**attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
 @dataclass
+class DiscoveryDiff:
+    """Circuit changes between the known layout and a fresh discovery."""
+
+    added: set[int] = field(default_factory=set)
+    removed: set[int] = field(default_factory=set)
+    renamed: set[int] = field(default_factory=set)
+
+    @property
+    def structural(self) -> bool:
+        """Return True if circuits were added or removed."""
+        return bool(self.added or self.removed)
+
+    def __bool__(self) -> bool:
+        """Return True if anything changed."""
+        return bool(self.added or self.removed or self.renamed)
+
+
+@dataclass(slots=True)
 class CircuitMetrics:
     """Real-time metrics for a circuit."""
 
@@ -59,6 +148,43 @@ class CircuitMetrics:
     voltage_b_v: float = 0.0
     current_a_a: float = 0.0
     current_b_a: float = 0.0
+    # Extremes over the panel's metric window (the fields above are averages)
+    current_min_a: float = 0.0
+    current_max_a: float = 0.0
+    voltage_min_v: float = 0.0
+    voltage_max_v: float = 0.0
+    power_min_w: float = 0.0
+    power_max_w: float = 0.0
+    apparent_power_min_va: float = 0.0
+    apparent_power_max_va: float = 0.0
+    reactive_power_min_var: float = 0.0
+    reactive_power_max_var: float = 0.0
+
+    def reset(self) -> CircuitMetrics:
+        """Restore the default values in place and return self."""
+        self.power_w = 0.0
+        self.voltage_v = 0.0
+        self.current_a = 0.0
+        self.apparent_power_va = 0.0
+        self.reactive_power_var = 0.0
+        self.frequency_hz = 0.0
+        self.power_factor = 0.0
+        self.is_on = True
+        self.voltage_a_v = 0.0
+        self.voltage_b_v = 0.0
+        self.current_a_a = 0.0
+        self.current_b_a = 0.0
+        self.current_min_a = 0.0
+        self.current_max_a = 0.0
+        self.voltage_min_v = 0.0
+        self.voltage_max_v = 0.0
+        self.power_min_w = 0.0
+        self.power_max_w = 0.0
+        self.apparent_power_min_va = 0.0
+        self.apparent_power_max_va = 0.0
+        self.reactive_power_min_var = 0.0
+        self.reactive_power_max_var = 0.0
+        return self
 
 
 @dataclass
@@ -68,13 +194,28 @@ class PanelData:
     serial: str = ""
     firmware: str = ""
     panel_resource_id: str = ""
+    product_id: int = PRODUCT_GEN3_PANEL
     circuits: dict[int, CircuitInfo] = field(default_factory=dict)
-    metrics: dict[int, CircuitMetrics] = field(default_factory=dict)
-    main_feed: CircuitMetrics = field(default_factory=CircuitMetrics)
+    store: PanelMetricsStore = field(default_factory=PanelMetricsStore, repr=False)
+
+    @property
+    def metrics(self) -> Mapping[int, MetricsRow]:
+        """Return metrics of the circuits that have reported data."""
+        return self.store.metrics
+
+    @property
+    def main_feed(self) -> MetricsRow:
+        """Return the main feed metrics."""
+        return self.store.row(MAIN_FEED_KEY)
 
 
 def _decode_varint(data: bytes, offset: int) -> tuple[int, int]:
     """Decode a protobuf varint, return (value, new_offset)."""
+    # Fast path: tags, lengths and small values fit in one byte
+    if offset < len(data):
+        b = data[offset]
+        if b < 0x80:
+            return b, offset + 1
     result = 0
     shift = 0
     while offset < len(data):
@@ -121,135 +262,360 @@ def _get_field(fields: dict, num: int, default=None):
     return vals[0] if vals else default
 
 
-def _parse_min_max_avg(data: bytes) -> dict[str, float]:
-    """Parse a min/max/avg sub-message."""
-    fields = _parse_protobuf_fields(data)
-    return {
-        "min": _get_field(fields, 1, 0),
-        "max": _get_field(fields, 2, 0),
-        "avg": _get_field(fields, 3, 0),
-    }
+# Buffers the offset-based helpers below accept; memoryview slices of a
+# notification are decoded in place without copying.
+Buffer = bytes | memoryview
+
+
+def _iter_fields(
+    data: Buffer, start: int = 0, end: int | None = None
+) -> Iterator[tuple[int, int, int, int]]:
+    """Walk the fields of data[start:end] without slicing.
+
+    Yields (field_num, wire_type, value, value_end). Length-delimited fields
+    yield their payload offsets [value, value_end); scalar fields yield the
+    decoded value and value_end = -1. Stops at the first malformed field.
+    """
+    if end is None:
+        end = len(data)
+    offset = start
+    while offset < end:
+        tag, offset = _decode_varint(data, offset)
+        wire_type = tag & 0x07
+
+        if wire_type == 2:  # length-delimited
+            length, offset = _decode_varint(data, offset)
+            value_end = offset + length
+            if value_end > end:
+                return
+            yield tag >> 3, 2, offset, value_end
+            offset = value_end
+        elif wire_type == 0:  # varint
+            value, offset = _decode_varint(data, offset)
+            if offset > end:
+                return
+            yield tag >> 3, 0, value, -1
+        elif wire_type == 1:  # 64-bit
+            if offset + 8 > end:
+                return
+            yield tag >> 3, 1, struct.unpack_from("<Q", data, offset)[0], -1
+            offset += 8
+        elif wire_type == 5:  # 32-bit
+            if offset + 4 > end:
+                return
+            yield tag >> 3, 5, struct.unpack_from("<I", data, offset)[0], -1
+            offset += 4
+        else:
+            return
+
+
+def _skip_field(data: Buffer, offset: int, wire_type: int) -> int:
+    """Return the offset just past a field value, or -1 if unsupported."""
+    if wire_type == 0:
+        while offset < len(data) and data[offset] & 0x80:
+            offset += 1
+        return offset + 1
+    if wire_type == 2:
+        length, offset = _decode_varint(data, offset)
+        return offset + length
+    if wire_type == 1:
+        return offset + 8
+    if wire_type == 5:
+        return offset + 4
+    return -1
+
+
+def _find_field(
+    data: Buffer, start: int, end: int, field_num: int
+) -> tuple[int, int, int] | None:
+    """Return (wire_type, value, value_end) of the first field_num, or None.
+
+    Fields before it are skipped without decoding their values.
+    """
+    offset = start
+    while offset < end:
+        tag, offset = _decode_varint(data, offset)
+        wire_type = tag & 0x07
+        if tag >> 3 == field_num:
+            if wire_type == 2:
+                length, offset = _decode_varint(data, offset)
+                if offset + length > end:
+                    return None
+                return 2, offset, offset + length
+            if wire_type == 0:
+                return 0, _decode_varint(data, offset)[0], -1
+            if wire_type == 1 and offset + 8 <= end:
+                return 1, struct.unpack_from("<Q", data, offset)[0], -1
+            if wire_type == 5 and offset + 4 <= end:
+                return 5, struct.unpack_from("<I", data, offset)[0], -1
+            return None
+        offset = _skip_field(data, offset, wire_type)
+        if offset < 0:
+            return None
+    return None
+
+
+def _find_path(
+    data: Buffer, start: int, end: int, path: tuple[int, ...]
+) -> tuple[int, int, int] | None:
+    """Follow a field-number path; return (wire_type, value, value_end) or None.
+
+    The first occurrence of each field is followed and every field but the
+    last must be a sub-message.
+    """
+    found = None
+    for field_num in path:
+        if found is not None:
+            if found[0] != 2:
+                return None
+            start, end = found[1], found[2]
+        found = _find_field(data, start, end, field_num)
+        if found is None:
+            return None
+    return found
+
 
+def _extract(data: Buffer, path: tuple[int, ...], default=None):
+    """Extract the value at a field-number path, e.g. (1, 2, 2, 1, 3).
 
-def _decode_single_phase(data: bytes) -> CircuitMetrics:
-    """Decode single-phase (120V) metrics from field 11."""
-    fields = _parse_protobuf_fields(data)
-    metrics = CircuitMetrics()
+    Returns the scalar value, a memoryview of a length-delimited value, or
+    default if any step is missing.
+    """
+    found = _find_path(data, 0, len(data), path)
+    if found is None:
+        return default
+    wire_type, value, value_end = found
+    if wire_type == 2:
+        return memoryview(data)[value:value_end]
+    return value
 
-    current_data = _get_field(fields, 1)
-    if current_data and isinstance(current_data, bytes):
-        current = _parse_min_max_avg(current_data)
-        metrics.current_a = current["avg"] / 1000.0
 
-    voltage_data = _get_field(fields, 2)
-    if voltage_data and isinstance(voltage_data, bytes):
-        voltage = _parse_min_max_avg(voltage_data)
-        metrics.voltage_v = voltage["avg"] / 1000.0
+def _signed(value: int) -> int:
+    """Return a decoded varint as the int64 it encodes (two's complement)."""
+    return value - _UINT64 if value & _INT64_SIGN else value
 
-    power_data = _get_field(fields, 3)
-    if power_data and isinstance(power_data, bytes):
-        power = _parse_min_max_avg(power_data)
-        metrics.power_w = power["avg"] / 2000.0
 
-    apparent_data = _get_field(fields, 4)
-    if apparent_data and isinstance(apparent_data, bytes):
-        apparent = _parse_min_max_avg(apparent_data)
-        metrics.apparent_power_va = apparent["avg"] / 2000.0
+def _parse_min_max_avg(
+    data: Buffer, start: int = 0, end: int | None = None
+) -> tuple[int, int, int]:
+    """Parse a min/max/avg sub-message into (min, max, avg).
 
-    reactive_data = _get_field(fields, 5)
-    if reactive_data and isinstance(reactive_data, bytes):
-        reactive = _parse_min_max_avg(reactive_data)
-        metrics.reactive_power_var = reactive["avg"] / 2000.0
+    The values are int64, so a circuit feeding power back (solar, battery)
+    decodes as negative.
+    """
+    if end is None:
+        end = len(data)
+    min_val = max_val = avg_val = 0
+    offset = start
+    while offset < end:
+        tag, offset = _decode_varint(data, offset)
+        if tag & 0x07:
+            # Not a varint; skip it
+            offset = _skip_field(data, offset, tag & 0x07)
+            if offset < 0:
+                break
+            continue
+        value, offset = _decode_varint(data, offset)
+        if value & _INT64_SIGN:
+            value -= _UINT64
+        if tag == 0x18:  # field 3
+            avg_val = value
+        elif tag == 0x08:  # field 1
+            min_val = value
+        elif tag == 0x10:  # field 2
+            max_val = value
+    return min_val, max_val, avg_val
+
+
+def _avg(data: Buffer, start: int, end: int) -> int:
+    """Return the avg of a min/max/avg sub-message."""
+    return _parse_min_max_avg(data, start, end)[2]
+
+
+def _decode_single_phase(
+    data: Buffer,
+    start: int = 0,
+    end: int | None = None,
+    out: CircuitMetrics | None = None,
+) -> CircuitMetrics:
+    """Decode single-phase (120V) metrics from field 11.
+
+    Decodes into out (reset first) when given, else into a new object.
+    """
+    metrics = out.reset() if out is not None else CircuitMetrics()
+
+    # 1=current, 2=voltage, 3=power, 4=apparent, 5=reactive
+    for num, wire_type, value, value_end in _iter_fields(data, start, end):
+        if wire_type != 2 or value == value_end:
+            continue
+        low, high, avg = _parse_min_max_avg(data, value, value_end)
+        if num == 1:
+            metrics.current_min_a = low / 1000.0
+            metrics.current_max_a = high / 1000.0
+            metrics.current_a = avg / 1000.0
+        elif num == 2:
+            metrics.voltage_min_v = low / 1000.0
+            metrics.voltage_max_v = high / 1000.0
+            metrics.voltage_v = avg / 1000.0
+        elif num == 3:
+            metrics.power_min_w = low / 2000.0
+            metrics.power_max_w = high / 2000.0
+            metrics.power_w = avg / 2000.0
+        elif num == 4:
+            metrics.apparent_power_min_va = low / 2000.0
+            metrics.apparent_power_max_va = high / 2000.0
+            metrics.apparent_power_va = avg / 2000.0
+        elif num == 5:
+            metrics.reactive_power_min_var = low / 2000.0
+            metrics.reactive_power_max_var = high / 2000.0
+            metrics.reactive_power_var = avg / 2000.0
 
     metrics.is_on = (metrics.voltage_v * 1000) > BREAKER_OFF_VOLTAGE_MV
     return metrics
 
 
-def _decode_dual_phase(data: bytes) -> CircuitMetrics:
-    """Decode dual-phase (240V) metrics from field 12."""
-    fields = _parse_protobuf_fields(data)
-    metrics = CircuitMetrics()
-
-    # Leg A (field 1)
-    leg_a_data = _get_field(fields, 1)
-    if leg_a_data and isinstance(leg_a_data, bytes):
-        leg_a = _parse_protobuf_fields(leg_a_data)
-        current_data = _get_field(leg_a, 1)
-        if current_data and isinstance(current_data, bytes):
-            metrics.current_a_a = _parse_min_max_avg(current_data)["avg"] / 1000.0
-        voltage_data = _get_field(leg_a, 2)
-        if voltage_data and isinstance(voltage_data, bytes):
-            metrics.voltage_a_v = _parse_min_max_avg(voltage_data)["avg"] / 1000.0
-
-    # Leg B (field 2)
-    leg_b_data = _get_field(fields, 2)
-    if leg_b_data and isinstance(leg_b_data, bytes):
-        leg_b = _parse_protobuf_fields(leg_b_data)
-        current_data = _get_field(leg_b, 1)
-        if current_data and isinstance(current_data, bytes):
-            metrics.current_b_a = _parse_min_max_avg(current_data)["avg"] / 1000.0
-        voltage_data = _get_field(leg_b, 2)
-        if voltage_data and isinstance(voltage_data, bytes):
-            metrics.voltage_b_v = _parse_min_max_avg(voltage_data)["avg"] / 1000.0
-
-    # Combined (field 3) — field order: 1=current, 2=voltage, 3=power,
-    # 4=apparent, 5=reactive, 6=power_factor
-    combined_data = _get_field(fields, 3)
-    if combined_data and isinstance(combined_data, bytes):
-        combined = _parse_protobuf_fields(combined_data)
-        # Field 2 = voltage (NOT field 1, which is current)
-        voltage_data = _get_field(combined, 2)
-        if voltage_data and isinstance(voltage_data, bytes):
-            metrics.voltage_v = _parse_min_max_avg(voltage_data)["avg"] / 1000.0
-        power_data = _get_field(combined, 3)
-        if power_data and isinstance(power_data, bytes):
-            metrics.power_w = _parse_min_max_avg(power_data)["avg"] / 2000.0
-        apparent_data = _get_field(combined, 4)
-        if apparent_data and isinstance(apparent_data, bytes):
-            metrics.apparent_power_va = _parse_min_max_avg(apparent_data)["avg"] / 2000.0
-        reactive_data = _get_field(combined, 5)
-        if reactive_data and isinstance(reactive_data, bytes):
-            metrics.reactive_power_var = _parse_min_max_avg(reactive_data)["avg"] / 2000.0
-        pf_data = _get_field(combined, 6)
-        if pf_data and isinstance(pf_data, bytes):
-            pf = _parse_min_max_avg(pf_data)
-            metrics.power_factor = pf["avg"] / 2000.0
-
-    # Frequency (field 4)
-    freq_data = _get_field(fields, 4)
-    if freq_data and isinstance(freq_data, bytes):
-        freq = _parse_min_max_avg(freq_data)
-        metrics.frequency_hz = freq["avg"] / 1000.0
-
-    # Total current = leg A + leg B
+def _decode_leg(
+    data: Buffer, start: int, end: int
+) -> tuple[tuple[int, int, int], tuple[int, int, int]]:
+    """Decode a dual-phase leg into raw (current, voltage) min/max/avg."""
+    current = voltage = (0, 0, 0)
+    for num, wire_type, value, value_end in _iter_fields(data, start, end):
+        if wire_type != 2 or value == value_end:
+            continue
+        if num == 1:
+            current = _parse_min_max_avg(data, value, value_end)
+        elif num == 2:
+            voltage = _parse_min_max_avg(data, value, value_end)
+    return current, voltage
+
+
+def _decode_dual_phase(
+    data: Buffer,
+    start: int = 0,
+    end: int | None = None,
+    out: CircuitMetrics | None = None,
+) -> CircuitMetrics:
+    """Decode dual-phase (240V) metrics from field 12.
+
+    Decodes into out (reset first) when given, else into a new object.
+    """
+    metrics = out.reset() if out is not None else CircuitMetrics()
+    current_a = current_b = (0, 0, 0)
+
+    for num, wire_type, value, value_end in _iter_fields(data, start, end):
+        if wire_type != 2 or value == value_end:
+            continue
+        if num == 1:  # Leg A
+            current_a, voltage = _decode_leg(data, value, value_end)
+            metrics.voltage_a_v = voltage[2] / 1000.0
+        elif num == 2:  # Leg B
+            current_b, voltage = _decode_leg(data, value, value_end)
+            metrics.voltage_b_v = voltage[2] / 1000.0
+        elif num == 3:
+            # Combined — field order: 1=current, 2=voltage, 3=power,
+            # 4=apparent, 5=reactive, 6=power_factor
+            _decode_combined(data, value, value_end, metrics)
+        elif num == 4:  # Frequency
+            metrics.frequency_hz = _avg(data, value, value_end) / 1000.0
+
+    metrics.current_a_a = current_a[2] / 1000.0
+    metrics.current_b_a = current_b[2] / 1000.0
+
+    # Total current = leg A + leg B (the extremes are summed per leg, which
+    # bounds the true combined extremes)
     metrics.current_a = metrics.current_a_a + metrics.current_b_a
+    metrics.current_min_a = (current_a[0] + current_b[0]) / 1000.0
+    metrics.current_max_a = (current_a[1] + current_b[1]) / 1000.0
 
     metrics.is_on = (metrics.voltage_v * 1000) > BREAKER_OFF_VOLTAGE_MV
     return metrics
 
 
-def _extract_deepest_value(data: bytes, target_field: int = 3) -> int:
+def _decode_combined(
+    data: Buffer, start: int, end: int, metrics: CircuitMetrics
+) -> None:
+    """Decode the combined block (field 3) of a dual-phase payload."""
+    for num, wire_type, value, value_end in _iter_fields(data, start, end):
+        if wire_type != 2 or value == value_end:
+            continue
+        low, high, avg = _parse_min_max_avg(data, value, value_end)
+        # Field 2 = voltage (NOT field 1, which is current)
+        if num == 2:
+            metrics.voltage_min_v = low / 1000.0
+            metrics.voltage_max_v = high / 1000.0
+            metrics.voltage_v = avg / 1000.0
+        elif num == 3:
+            metrics.power_min_w = low / 2000.0
+            metrics.power_max_w = high / 2000.0
+            metrics.power_w = avg / 2000.0
+        elif num == 4:
+            metrics.apparent_power_min_va = low / 2000.0
+            metrics.apparent_power_max_va = high / 2000.0
+            metrics.apparent_power_va = avg / 2000.0
+        elif num == 5:
+            metrics.reactive_power_min_var = low / 2000.0
+            metrics.reactive_power_max_var = high / 2000.0
+            metrics.reactive_power_var = avg / 2000.0
+        elif num == 6:
+            metrics.power_factor = avg / 2000.0
+
+
+def _extract_deepest_value(
+    data: Buffer, start: int = 0, end: int | None = None, target_field: int = 3
+) -> int:
     """Extract the deepest varint from nested protobuf.
 
-    Recursively searches for the largest non-zero value at field 3
-    within nested sub-messages. Handles field 14's deeper nesting.
+    Recursively searches for the largest-magnitude non-zero value at field
+    3 within nested sub-messages, read as int64 so exported power keeps its
+    sign. Handles field 14's deeper nesting.
     """
-    fields = _parse_protobuf_fields(data)
     best = 0
-
-    for fn, vals in fields.items():
-        for v in vals:
-            if isinstance(v, bytes) and len(v) > 0:
-                inner = _extract_deepest_value(v, target_field)
-                if inner > best:
+    for num, wire_type, value, value_end in _iter_fields(data, start, end):
+        if wire_type == 2:
+            if value_end > value:
+                inner = _extract_deepest_value(data, value, value_end, target_field)
+                if abs(inner) > abs(best):
                     best = inner
-            elif not isinstance(v, bytes) and fn == target_field:
-                if v > best:
-                    best = v
+        elif num == target_field and wire_type == 0:
+            value = _signed(value)
+            if abs(value) > abs(best):
+                best = value
     return best
 
 
-def _decode_main_feed(data: bytes) -> CircuitMetrics:
+def _decode_main_leg(
+    data: Buffer, start: int, end: int
+) -> tuple[float, float, float]:
+    """Decode a main feed leg into (power_w, voltage_v, frequency_hz)."""
+    power = voltage = frequency = 0.0
+    for num, wire_type, value, value_end in _iter_fields(data, start, end):
+        if wire_type != 2 or value == value_end:
+            continue
+        if num == 3:
+            # Power comes from sub-field 3 (deepest nested value)
+            power = _extract_deepest_value(data, value, value_end) / 2000.0
+        elif num == 2:
+            # Voltage: each data set has {1: msg{3:current}, 2: msg{3:voltage}}
+            # The second sub-message (field 2) contains voltage in mV
+            found = _find_field(data, value, value_end, 2)
+            if found and found[0] == 2:
+                v = _find_field(data, found[1], found[2], 3)
+                if v and v[0] != 2 and v[1] > 0:
+                    voltage = v[1] / 1000.0
+        elif num == 4:
+            # Frequency {3: freq_mHz}
+            f = _find_field(data, value, value_end, 3)
+            if f and f[0] != 2 and f[1] > 0:
+                frequency = f[1] / 1000.0
+    return power, voltage, frequency
+
+
+def _decode_main_feed(
+    data: Buffer,
+    start: int = 0,
+    end: int | None = None,
+    out: CircuitMetrics | None = None,
+) -> CircuitMetrics:
     """Decode main feed metrics from field 14.
 
     Field 14 has deeper nesting than field 12. Rather than trying to
@@ -261,64 +627,30 @@ def _decode_main_feed(data: bytes) -> CircuitMetrics:
                14.1.2 = data set B
                14.1.3 = data set C (contains power as deepest value)
                14.1.4 = frequency {3: freq_mHz}
+
+    Decodes into out (reset first) when given, else into a new object.
     """
-    fields = _parse_protobuf_fields(data)
-    main_data = _get_field(fields, 14)
-    if not main_data or not isinstance(main_data, bytes):
-        return CircuitMetrics()
-
-    metrics = CircuitMetrics()
-    main_fields = _parse_protobuf_fields(main_data)
-
-    # Extract from primary data block (field 1)
-    leg_a = _get_field(main_fields, 1)
-    if leg_a and isinstance(leg_a, bytes):
-        la_fields = _parse_protobuf_fields(leg_a)
-
-        # Power comes from sub-field 3 (deepest nested value)
-        power_stats = _get_field(la_fields, 3)
-        if power_stats and isinstance(power_stats, bytes):
-            metrics.power_w = _extract_deepest_value(power_stats) / 2000.0
-
-        # Voltage: each data set has {1: msg{3:current}, 2: msg{3:voltage}}
-        # Extract from sub-field 2 which contains voltage data
-        voltage_stats = _get_field(la_fields, 2)
-        if voltage_stats and isinstance(voltage_stats, bytes):
-            vs_fields = _parse_protobuf_fields(voltage_stats)
-            # The second sub-message (field 2) contains voltage in mV
-            f2 = _get_field(vs_fields, 2)
-            if f2 and isinstance(f2, bytes):
-                inner = _parse_protobuf_fields(f2)
-                v = _get_field(inner, 3, 0)
-                if isinstance(v, int) and v > 0:
-                    metrics.voltage_a_v = v / 1000.0
-
-        # Frequency from sub-field 4
-        freq_stats = _get_field(la_fields, 4)
-        if freq_stats and isinstance(freq_stats, bytes):
-            freq_fields = _parse_protobuf_fields(freq_stats)
-            freq_val = _get_field(freq_fields, 3, 0)
-            if isinstance(freq_val, int) and freq_val > 0:
-                metrics.frequency_hz = freq_val / 1000.0
-
-    # Leg B data (field 2) — add if present
-    leg_b = _get_field(main_fields, 2)
-    if leg_b and isinstance(leg_b, bytes):
-        lb_fields = _parse_protobuf_fields(leg_b)
-        power_stats = _get_field(lb_fields, 3)
-        if power_stats and isinstance(power_stats, bytes):
-            lb_power = _extract_deepest_value(power_stats) / 2000.0
-            if lb_power > 0:
-                metrics.power_w += lb_power
-        voltage_stats = _get_field(lb_fields, 2)
-        if voltage_stats and isinstance(voltage_stats, bytes):
-            vs_fields = _parse_protobuf_fields(voltage_stats)
-            f2 = _get_field(vs_fields, 2)
-            if f2 and isinstance(f2, bytes):
-                inner = _parse_protobuf_fields(f2)
-                v = _get_field(inner, 3, 0)
-                if isinstance(v, int) and v > 0:
-                    metrics.voltage_b_v = v / 1000.0
+    metrics = out.reset() if out is not None else CircuitMetrics()
+    if end is None:
+        end = len(data)
+    found = _find_field(data, start, end, 14)
+    if found is None or found[0] != 2 or found[1] == found[2]:
+        return metrics
+    _, main_start, main_end = found
+    for num, wire_type, value, value_end in _iter_fields(data, main_start, main_end):
+        if wire_type != 2 or value == value_end:
+            continue
+        if num == 1:
+            # Primary data block (leg A)
+            (
+                metrics.power_w,
+                metrics.voltage_a_v,
+                metrics.frequency_hz,
+            ) = _decode_main_leg(data, value, value_end)
+        elif num == 2:
+            # Leg B data — add if present
+            lb_power, metrics.voltage_b_v, _ = _decode_main_leg(data, value, value_end)
+            metrics.power_w += lb_power
 
     # Combined voltage (split-phase: leg A + leg B, or 2x leg A)
     if metrics.voltage_b_v > 0:
@@ -330,21 +662,209 @@ def _decode_main_feed(data: bytes) -> CircuitMetrics:
     if metrics.voltage_v > 0:
         metrics.current_a = metrics.power_w / metrics.voltage_v
 
+    # The main feed block carries no separate extremes
+    metrics.power_min_w = metrics.power_max_w = metrics.power_w
+    metrics.voltage_min_v = metrics.voltage_max_v = metrics.voltage_v
+    metrics.current_min_a = metrics.current_max_a = metrics.current_a
+
     metrics.is_on = True
     return metrics
 
 
+def _decode_metric(
+    iid: int, raw: Buffer, out: CircuitMetrics
+) -> tuple[int, bool | None] | None:
+    """Decode one raw trait 26 metric payload into out.
+
+    Returns (store key, dual phase) — dual phase is None for the main feed —
+    or None if the instance or payload isn't a known metric.
+    """
+    # Main feed (IID 1) uses field 14 with unique deeper nesting
+    if iid == MAIN_FEED_IID:
+        _decode_main_feed(raw, out=out)
+        return MAIN_FEED_KEY, None
+
+    circuit_id = iid - METRIC_IID_OFFSET
+    if not (1 <= circuit_id <= MAX_CIRCUIT_ID):
+        return None
+
+    # Dual-phase (field 12) — check first since it's more specific
+    dual = _find_field(raw, 0, len(raw), 12)
+    if dual and dual[0] == 2 and dual[1] < dual[2]:
+        _decode_dual_phase(raw, dual[1], dual[2], out)
+        return circuit_id, True
+
+    # Single-phase (field 11)
+    single = _find_field(raw, 0, len(raw), 11)
+    if single and single[0] == 2 and single[1] < single[2]:
+        _decode_single_phase(raw, single[1], single[2], out)
+        return circuit_id, False
+    return None
+
+
+def _notification_time(data: Buffer) -> float:
+    """Return the panel's TraitMetricsList start time (s since the epoch).
+
+    Falls back to the local wall clock if the panel sent none, so the
+    times of one stream always come from the same kind of clock.
+    """
+    # trait_notify (2) -> metrics (3) -> start_time (2) -> time_msec (1)
+    time_msec = _extract(data, (2, 3, 2, 1), 0)
+    return time_msec / 1000 if time_msec else time.time()
+
+
+def _decode_header(
+    data: Buffer, start: int = 0, end: int | None = None
+) -> TraitHeader | None:
+    """Decode a resource_trait_info block into a TraitHeader."""
+    if end is None:
+        end = len(data)
+    # external (2) -> trait_info (2)
+    ext = _find_field(data, start, end, 2)
+    if ext is None or ext[0] != 2:
+        return None
+    info = _find_field(data, ext[1], ext[2], 2)
+    if info is None or info[0] != 2 or info[1] == info[2]:
+        return None
+    _, info_start, info_end = info
+
+    # trait_metadata (1) -> vendor (1), product (2), trait (3)
+    ids = [0, 0, 0]
+    meta = _find_field(data, info_start, info_end, 1)
+    if meta and meta[0] == 2:
+        for num, wire_type, value, _ in _iter_fields(data, meta[1], meta[2]):
+            if wire_type == 0 and 1 <= num <= 3:
+                ids[num - 1] = value
+
+    # trait_instance_id (2) -> id (1)
+    iid = _find_path(data, info_start, info_end, (2, 1))
+    instance_id = iid[1] if iid and iid[0] != 2 else 0
+
+    # resource_id (1) -> id (1)
+    rid = _find_path(data, ext[1], ext[2], (1, 1))
+    resource_id = ""
+    if rid and rid[0] == 2:
+        resource_id = str(data[rid[1] : rid[2]], "utf-8", errors="replace")
+
+    return TraitHeader(ids[0], ids[1], ids[2], instance_id, resource_id)
+
+
+def _decode_raw_metrics(data: Buffer) -> list[memoryview]:
+    """Return the raw metric payloads of a notification as memoryviews."""
+    # trait_notify (2) -> metrics (3, repeated) -> raw payloads (3, repeated)
+    raw_metrics: list[memoryview] = []
+    notify = _find_field(data, 0, len(data), 2)
+    if notify and notify[0] == 2:
+        view = memoryview(data)
+        for num, wire_type, ml_start, ml_end in _iter_fields(
+            data, notify[1], notify[2]
+        ):
+            if num != 3 or wire_type != 2:
+                continue
+            for n, wt, start, end in _iter_fields(data, ml_start, ml_end):
+                if n == 3 and wt == 2:
+                    raw_metrics.append(view[start:end])
+    return raw_metrics
+
+
+def _decode_notification(
+    data: Buffer,
+) -> tuple[int, int, list[memoryview]] | None:
+    """Decode a TraitInstanceNotification into (trait, iid, raw metrics)."""
+    # resource_trait_info (1)
+    rti = _find_field(data, 0, len(data), 1)
+    if rti is None or rti[0] != 2:
+        return None
+    header = _decode_header(data, rti[1], rti[2])
+    if header is None:
+        return None
+    return header.trait_id, header.instance_id, _decode_raw_metrics(data)
+
+
 class SpanPanelClient:
     """gRPC client for Span MAIN 40."""
 
-    def __init__(self, host: str, port: int = 50065) -> None:
-        """Initialize the client."""
+    def __init__(
+        self,
+        host: str,
+        port: int = 50065,
+        circuit_max_rate: float = DEFAULT_CIRCUIT_MAX_RATE,
+        main_max_rate: float = DEFAULT_MAIN_MAX_RATE,
+        use_protobuf_decoder: bool = False,
+        name_concurrency: int = DEFAULT_NAME_CONCURRENCY,
+        name_timeout: float = DEFAULT_NAME_TIMEOUT,
+        stale_timeout: float = DEFAULT_STALE_TIMEOUT,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        decode_offload: bool = False,
+        collect_statistics: bool = False,
+        history_window: float = 0,
+        peak_window: float = 0,
+        detector: CircuitEventDetector | None = None,
+    ) -> None:
+        """Initialize the client.
+
+        circuit_max_rate and main_max_rate cap how often (Hz) callbacks are
+        told about a given circuit or the main feed; 0 disables the limit.
+        use_protobuf_decoder decodes notification envelopes with message
+        classes built from span.protoset, falling back to the built-in
+        decoder if the descriptors cannot be loaded. name_concurrency caps
+        the circuit-name requests in flight during connect and name_timeout
+        bounds each one (s); a circuit whose name can't be fetched keeps its
+        default name. stale_timeout is how long (s) the stream may go
+        without a notification before the data is considered stale, and
+        idle_timeout how long (s) an open stream may stay silent before it
+        is cancelled and the channel rebuilt. decode_offload decodes stream
+        notifications in batches on a worker thread instead of the loop.
+        collect_statistics folds every circuit sample into the aggregates
+        returned by statistics, independent of the callback rate.
+        history_window keeps that many seconds of samples per circuit for
+        history queries; 0 keeps none. peak_window tracks each circuit's
+        highest and lowest reported power over that many seconds; 0 tracks
+        nothing. detector, if given, is fed every circuit sample.
+        """
         self._host = host
         self._port = port
         self._channel: grpc.aio.Channel | None = None
         self._stream_task: asyncio.Task | None = None
         self._data = PanelData()
-        self._callbacks: list[Callable[[], None]] = []
+        self._callbacks: list[Callable[[set[int]], None]] = []
+        self._dirty: set[int] = set()
+        self._dispatcher = CoalescingDispatcher(
+            self._notify, circuit_max_rate, main_max_rate
+        )
+        self._use_protobuf_decoder = use_protobuf_decoder
+        self._protobuf_decode: Callable | None = None
+        self._header_cache = HeaderCache(_HEADER_CACHE_SIZE)
+        # Reused decode target; its values are copied into the store
+        self._scratch = CircuitMetrics()
+        self._name_concurrency = max(1, name_concurrency)
+        self._name_timeout = name_timeout
+        self._name_fetch_duration: float | None = None
+        self._reconnect_callbacks: list[Callable[[], None]] = []
+        self._resubscribing = False
+        self._state = ConnectionState.CONNECTING
+        self._state_callbacks: list[Callable[[ConnectionState], None]] = []
+        self._stale_timeout = stale_timeout
+        self._last_notification = 0.0
+        self._watchdog: asyncio.TimerHandle | None = None
+        self._idle_timeout = idle_timeout
+        self._call: grpc.aio.UnaryStreamCall | None = None
+        self._call_started = 0.0
+        self._stalled = False
+        self._stalls = 0
+        self._channel_rebuilds = 0
+        self._capture: CaptureWriter | None = None
+        self._instrumentation = Instrumentation()
+        self._decode_offload = decode_offload
+        self._energy = EnergyTracker()
+        self._aggregates = PanelAggregates()
+        self._sample_time = 0.0
+        self._statistics = StatisticsAggregator() if collect_statistics else None
+        self._history = PanelHistory(history_window) if history_window else None
+        self._peaks = PanelPeaks(peak_window) if peak_window else None
+        self._detector = detector
+        self._worker: DecodeWorker | None = None
+        self._reconnects = 0
         self._connected = False
 
     @property
@@ -352,48 +872,332 @@ class SpanPanelClient:
         """Return current panel data."""
         return self._data
 
+    @property
+    def dispatch_stats(self) -> dict[str, int]:
+        """Return counters of received, merged and published updates."""
+        return self._dispatcher.stats
+
+    @property
+    def header_cache_stats(self) -> dict[str, int | float]:
+        """Return hit/miss counters of the notification header cache."""
+        return self._header_cache.stats
+
+    @property
+    def aggregates(self) -> PanelAggregates:
+        """Return the panel-wide totals kept up to date by the stream."""
+        return self._aggregates
+
+    @property
+    def energy(self) -> EnergyTracker:
+        """Return the energy totals of the main feed and circuits."""
+        return self._energy
+
+    @property
+    def detector(self) -> CircuitEventDetector | None:
+        """Return the circuit event detector, if one was given."""
+        return self._detector
+
+    @property
+    def history(self) -> PanelHistory | None:
+        """Return the recent-sample buffers, if history_window is set."""
+        return self._history
+
+    @property
+    def peaks(self) -> PanelPeaks | None:
+        """Return the rolling power extremes, if peak_window is set."""
+        return self._peaks
+
+    @property
+    def statistics(self) -> StatisticsAggregator | None:
+        """Return the circuit aggregates, if collect_statistics is set."""
+        return self._statistics
+
+    @property
+    def decode_worker_stats(self) -> dict[str, int] | None:
+        """Return decode worker queue counters, or None if not offloading."""
+        return self._worker.stats if self._worker is not None else None
+
+    @property
+    def instrumentation(self) -> Instrumentation:
+        """Return the hot-path instrumentation."""
+        return self._instrumentation
+
+    @property
+    def reconnects(self) -> int:
+        """Return how many times the stream has been resubscribed."""
+        return self._reconnects
+
+    def set_instrumentation(self, enabled: bool) -> None:
+        """Turn hot-path instrumentation on or off.
+
+        While on, instance attributes shadow the hot-path methods with
+        timed wrappers, so the disabled path runs the plain methods and
+        costs nothing. Enabling starts a fresh collection.
+        """
+        instrumentation = self._instrumentation
+        if enabled == instrumentation.enabled:
+            return
+        instrumentation.enabled = enabled
+        if enabled:
+            instrumentation.reset()
+            self._process_notification = self._timed_process_notification
+            self._offload_notification = self._counted_offload_notification
+            self._read_header = self._counted_read_header
+            self._decode_and_store_metric = self._timed_decode_and_store_metric
+            self._apply_batch = self._timed_apply_batch
+        else:
+            for name in (
+                "_process_notification",
+                "_offload_notification",
+                "_read_header",
+                "_decode_and_store_metric",
+                "_apply_batch",
+            ):
+                self.__dict__.pop(name, None)
+
+    def _timed_process_notification(self, data: bytes) -> None:
+        """Instrumented _process_notification: time it and count bytes."""
+        start = time.perf_counter_ns()
+        SpanPanelClient._process_notification(self, data)
+        instrumentation = self._instrumentation
+        instrumentation.histogram(PROCESS_NOTIFICATION).record(
+            time.perf_counter_ns() - start
+        )
+        instrumentation.bytes_received += len(data)
+
+    def _counted_offload_notification(self, data: bytes) -> None:
+        """Instrumented _offload_notification: count bytes.
+
+        With decode_offload on, the decode runs on the worker thread and
+        is not timed; _timed_apply_batch times the loop's share instead.
+        """
+        SpanPanelClient._offload_notification(self, data)
+        self._instrumentation.bytes_received += len(data)
+
+    def _counted_read_header(self, data: bytes) -> TraitHeader | None:
+        """Instrumented _read_header: count notifications per trait instance."""
+        header = SpanPanelClient._read_header(self, data)
+        if header is not None:
+            self._instrumentation.notifications[
+                (header.trait_id, header.instance_id)
+            ] += 1
+        return header
+
+    def _timed_decode_and_store_metric(self, iid: int, raw: Buffer) -> None:
+        """Instrumented _decode_and_store_metric, decode timed per layout.
+
+        Only the decode is timed; storing the sample (aggregates, energy,
+        history, peaks, statistics, detector) is left out so the
+        histograms compare the payload layouts.
+        """
+        start = time.perf_counter_ns()
+        decoded = _decode_metric(iid, raw, self._scratch)
+        elapsed = time.perf_counter_ns() - start
+        if decoded is None:
+            return
+        key, dual_phase = decoded
+        if dual_phase is None:
+            name = DECODE_MAIN_FEED
+        elif dual_phase:
+            name = DECODE_DUAL_PHASE
+        else:
+            name = DECODE_SINGLE_PHASE
+        self._instrumentation.histogram(name).record(elapsed)
+        self._store_metric(key, self._scratch, dual_phase)
+
+    def _timed_apply_batch(
+        self, results: list[tuple[int, CircuitMetrics, bool | None, float]]
+    ) -> None:
+        """Instrumented _apply_batch: time storing a decoded batch."""
+        start = time.perf_counter_ns()
+        SpanPanelClient._apply_batch(self, results)
+        self._instrumentation.histogram(APPLY_BATCH).record(
+            time.perf_counter_ns() - start
+        )
+
+    @property
+    def name_fetch_duration(self) -> float | None:
+        """Return how long (s) the last circuit-name fetch took."""
+        return self._name_fetch_duration
+
     @property
     def connected(self) -> bool:
         """Return connection status."""
         return self._connected
 
-    def register_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
-        """Register a callback for data updates. Returns unregister function."""
+    def register_callback(
+        self, callback: Callable[[set[int]], None]
+    ) -> Callable[[], None]:
+        """Register a callback for data updates. Returns unregister function.
+
+        The callback receives the set of keys (circuit IDs, or MAIN_FEED_KEY
+        for the main feed) updated since the previous notification.
+        """
         self._callbacks.append(callback)
         return lambda: self._callbacks.remove(callback)
 
-    def _notify(self) -> None:
-        """Notify all registered callbacks."""
+    @property
+    def state(self) -> ConnectionState:
+        """Return the health of the notification stream."""
+        return self._state
+
+    def register_state_callback(
+        self, callback: Callable[[ConnectionState], None]
+    ) -> Callable[[], None]:
+        """Register a callback for connection state changes.
+
+        Returns an unregister function.
+        """
+        self._state_callbacks.append(callback)
+        return lambda: self._state_callbacks.remove(callback)
+
+    def _set_state(self, state: ConnectionState) -> None:
+        """Move to state and tell the state callbacks.
+
+        STALE only ends when notifications resume; retries while stale don't
+        make the data any fresher.
+        """
+        if state is self._state or (
+            self._state is ConnectionState.STALE
+            and state is not ConnectionState.STREAMING
+        ):
+            return
+        _LOGGER.debug("Span panel %s: %s -> %s", self._host, self._state, state)
+        self._state = state
+        for cb in self._state_callbacks:
+            try:
+                cb(state)
+            except Exception:
+                _LOGGER.exception("Error in state callback")
+
+    @property
+    def stream_stats(self) -> dict[str, int | float | str]:
+        """Return stream health counters for diagnostics."""
+        return {
+            "state": self._state,
+            "stalls": self._stalls,
+            "channel_rebuilds": self._channel_rebuilds,
+            "reconnects": self._reconnects,
+            "seconds_since_notification": round(
+                time.monotonic() - self._last_notification, 1
+            ),
+        }
+
+    def _check_stale(self) -> None:
+        """Watchdog: degrade, then go stale when notifications stop.
+
+        Also cancels an open stream that has received nothing for the idle
+        timeout; a half-open connection never errors on its own.
+        """
+        now = time.monotonic()
+        call = self._call
+        if (
+            call is not None
+            and not call.done()
+            and now - max(self._last_notification, self._call_started)
+            >= self._idle_timeout
+        ):
+            self._stalls += 1
+            self._stalled = True
+            _LOGGER.warning(
+                "Span panel %s stream silent for %ss, restarting it",
+                self._host,
+                self._idle_timeout,
+            )
+            call.cancel()
+
+        idle = now - self._last_notification
+        if idle >= self._stale_timeout:
+            self._set_state(ConnectionState.STALE)
+        elif (
+            idle >= self._stale_timeout / 2
+            and self._state is ConnectionState.STREAMING
+        ):
+            self._set_state(ConnectionState.DEGRADED)
+        self._watchdog = asyncio.get_running_loop().call_later(
+            min(self._stale_timeout, self._idle_timeout) / 4, self._check_stale
+        )
+
+    def register_reconnect_callback(
+        self, callback: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Register a callback for when the stream resumes after an error.
+
+        Returns an unregister function.
+        """
+        self._reconnect_callbacks.append(callback)
+        return lambda: self._reconnect_callbacks.remove(callback)
+
+    def _dispatch(self) -> None:
+        """Hand the keys changed by the last notification to the dispatcher."""
+        if self._dirty:
+            self._dispatcher.mark(self._dirty)
+            self._dirty.clear()
+
+    def _notify(self, changed: set[int]) -> None:
+        """Notify all registered callbacks of the keys changed."""
+        instrumentation = self._instrumentation
+        start = time.perf_counter_ns() if instrumentation.enabled else 0
         for cb in self._callbacks:
             try:
-                cb()
+                cb(changed)
             except Exception:
                 _LOGGER.exception("Error in callback")
+        if instrumentation.enabled:
+            instrumentation.histogram(NOTIFY).record(time.perf_counter_ns() - start)
 
-    async def connect(self) -> bool:
-        """Connect to the panel and fetch initial data."""
-        try:
-            self._channel = grpc.aio.insecure_channel(
-                f"{self._host}:{self._port}",
-                options=[
-                    ("grpc.keepalive_time_ms", 30000),
-                    ("grpc.keepalive_timeout_ms", 10000),
-                    ("grpc.keepalive_permit_without_calls", True),
-                ],
+    @property
+    def decoder(self) -> str:
+        """Return the name of the active notification decoder."""
+        if self._protobuf_decode is None:
+            return "builtin"
+        return f"protobuf ({proto_decoder.runtime()})"
+
+    async def connect(self, discover: bool = True) -> bool:
+        """Connect to the panel and fetch initial data.
+
+        With discover=False only the channel is opened; the caller has
+        restored the circuit layout (e.g. from the discovery cache) and
+        revalidates it later with discover().
+        """
+        if self._use_protobuf_decoder:
+            loop = asyncio.get_running_loop()
+            self._protobuf_decode = await loop.run_in_executor(
+                None, proto_decoder.load
             )
-            # Test connection with GetInstances
-            await self._fetch_instances()
-            await self._fetch_circuit_names()
+        try:
+            if self._channel is None:
+                self._channel = POOL.acquire(self._host, self._port)
+            if discover:
+                # Test connection with GetInstances
+                self.apply_discovery(await self.discover())
             self._connected = True
             return True
         except Exception:
             _LOGGER.exception("Failed to connect to Span panel at %s:%s", self._host, self._port)
             self._connected = False
+            # Give the hold back, or every failed setup retry leaks one
+            if self._channel is not None:
+                await POOL.release(self._channel)
+                self._channel = None
             return False
 
+    async def _rebuild_channel(self) -> None:
+        """Replace the channel after a stall; its connection can't be trusted."""
+        self._channel = await POOL.renew(self._channel)
+        self._channel_rebuilds += 1
+
     async def disconnect(self) -> None:
         """Disconnect from the panel."""
         self._connected = False
+        self._dispatcher.cancel()
+        self.stop_capture()
+        if self._worker is not None:
+            self._worker.close()
+            self._worker = None
+        if self._watchdog:
+            self._watchdog.cancel()
+            self._watchdog = None
         if self._stream_task and not self._stream_task.done():
             self._stream_task.cancel()
             try:
@@ -401,10 +1205,60 @@ class SpanPanelClient:
             except asyncio.CancelledError:
                 pass
         if self._channel:
-            await self._channel.close()
+            await POOL.release(self._channel)
             self._channel = None
 
-    async def _fetch_instances(self) -> None:
+    async def discover(self) -> dict[int, CircuitInfo]:
+        """Fetch the circuit layout and names from the panel.
+
+        The panel resource ID is updated as a side effect (circuit-name
+        requests are addressed to it); the circuits are returned for
+        apply_discovery() rather than applied here.
+        """
+        resource_id, product_id, circuits = await self._fetch_instances()
+        if resource_id:
+            self._data.panel_resource_id = resource_id
+            self._data.product_id = product_id
+        await self._fetch_circuit_names(circuits)
+        return circuits
+
+    def apply_discovery(self, circuits: dict[int, CircuitInfo]) -> DiscoveryDiff:
+        """Replace the known circuit layout, returning what changed.
+
+        Phase type is learned from the metric stream, so it is carried over
+        for circuits that are already known. So is the name of a known
+        circuit whose name could not be fetched; a new one gets a
+        placeholder.
+        """
+        known = self._data.circuits
+        diff = DiscoveryDiff(
+            added=circuits.keys() - known.keys(),
+            removed=known.keys() - circuits.keys(),
+        )
+        for circuit_id, info in circuits.items():
+            old = known.get(circuit_id)
+            if old is None:
+                if info.name is None:
+                    info.name = f"Circuit {circuit_id}"
+                continue
+            info.is_dual_phase = old.is_dual_phase
+            if info.name is None:
+                info.name = old.name
+            elif info.name != old.name:
+                diff.renamed.add(circuit_id)
+        self._data.circuits = circuits
+        for circuit_id in diff.removed:
+            self._data.store.discard(circuit_id)
+            self._aggregates.discard(circuit_id)
+            if self._history is not None:
+                self._history.discard(circuit_id)
+            if self._peaks is not None:
+                self._peaks.discard(circuit_id)
+            if self._detector is not None:
+                self._detector.discard(circuit_id)
+        return diff
+
+    async def _fetch_instances(self) -> tuple[str, int, dict[int, CircuitInfo]]:
         """Fetch all trait instances to discover circuits."""
         response = await self._channel.unary_unary(
             _GET_INSTANCES,
@@ -413,12 +1267,20 @@ class SpanPanelClient:
         )(b"")
 
         # Parse the response to find circuit info
-        self._parse_instances(response)
+        return self._parse_instances(response)
 
-    def _parse_instances(self, data: bytes) -> None:
-        """Parse GetInstancesResponse to discover circuits and panel info."""
+    @staticmethod
+    def _parse_instances(data: bytes) -> tuple[str, int, dict[int, CircuitInfo]]:
+        """Parse GetInstancesResponse into (resource ID, product, circuits).
+
+        The resource ID and product come from the panel's traits, or from a
+        Gen3 gateway's if the response has no panel traits.
+        """
         fields = _parse_protobuf_fields(data)
         items = fields.get(1, [])
+        panel_resource_id = ""
+        gateway_resource_id = ""
+        circuits: dict[int, CircuitInfo] = {}
 
         for item_data in items:
             if not isinstance(item_data, bytes):
@@ -476,53 +1338,86 @@ class SpanPanelClient:
             if (
                 product_id == PRODUCT_GEN3_PANEL
                 and resource_id_str
-                and not self._data.panel_resource_id
+                and not panel_resource_id
             ):
-                self._data.panel_resource_id = resource_id_str
+                panel_resource_id = resource_id_str
                 _LOGGER.debug("Discovered panel resource_id: %s", resource_id_str)
+            elif (
+                product_id == PRODUCT_GEN3_GATEWAY
+                and resource_id_str
+                and not gateway_resource_id
+            ):
+                gateway_resource_id = resource_id_str
+                _LOGGER.debug("Discovered gateway resource_id: %s", resource_id_str)
 
             # Detect power metric circuits (trait 26)
             if trait_id == TRAIT_POWER_METRICS and vendor_id == VENDOR_SPAN:
                 circuit_id = instance_id - METRIC_IID_OFFSET
-                if 1 <= circuit_id <= 50:  # Valid circuit range only
-                    if circuit_id not in self._data.circuits:
-                        self._data.circuits[circuit_id] = CircuitInfo(
+                if 1 <= circuit_id <= MAX_CIRCUIT_ID:  # Valid circuit range only
+                    if circuit_id not in circuits:
+                        circuits[circuit_id] = CircuitInfo(
                             circuit_id=circuit_id,
-                            name=f"Circuit {circuit_id}",
+                            name=None,
                             metric_iid=instance_id,
                         )
 
-    async def _fetch_circuit_names(self) -> None:
-        """Fetch circuit names from trait 16."""
-        for circuit_id in list(self._data.circuits.keys()):
-            try:
-                name = await self._get_circuit_name(circuit_id)
-                if name:
-                    self._data.circuits[circuit_id].name = name
-            except Exception:
-                _LOGGER.debug("Failed to get name for circuit %d", circuit_id)
+        if not panel_resource_id and gateway_resource_id:
+            return gateway_resource_id, PRODUCT_GEN3_GATEWAY, circuits
+        return panel_resource_id, PRODUCT_GEN3_PANEL, circuits
+
+    async def _fetch_circuit_names(self, circuits: dict[int, CircuitInfo]) -> None:
+        """Fetch circuit names from trait 16 into circuits.
 
-    async def _get_circuit_name(self, circuit_id: int) -> str | None:
+        Requests run concurrently, at most name_concurrency at a time, so
+        the whole phase takes about one round-trip on a typical panel. A
+        circuit whose name could not be fetched keeps name None.
+        """
+        start = time.monotonic()
+        semaphore = asyncio.Semaphore(self._name_concurrency)
+        get_revision = self._channel.unary_unary(
+            _GET_REVISION,
+            request_serializer=lambda x: x,
+            response_deserializer=lambda x: x,
+        )
+
+        async def fetch(circuit_id: int) -> None:
+            async with semaphore:
+                try:
+                    name = await self._get_circuit_name(circuit_id, get_revision)
+                except Exception:
+                    _LOGGER.debug("Failed to get name for circuit %d", circuit_id)
+                    return
+            if name:
+                circuits[circuit_id].name = name
+
+        await asyncio.gather(*(fetch(cid) for cid in list(circuits)))
+        self._name_fetch_duration = time.monotonic() - start
+        _LOGGER.debug(
+            "Fetched %d circuit names in %.3fs",
+            len(circuits),
+            self._name_fetch_duration,
+        )
+
+    async def _get_circuit_name(
+        self, circuit_id: int, get_revision: grpc.aio.UnaryUnaryMultiCallable
+    ) -> str | None:
         """Get a single circuit name via GetRevision on trait 16."""
         # Build GetRevisionRequest for trait 16, instance = circuit_id
-        # TraitMetadata: vendor=1(SPAN), product=4(GEN3_PANEL), trait=16, version=1
+        # TraitMetadata: vendor=1(SPAN), product=4(GEN3_PANEL) or
+        # 5(GEN3_GATEWAY), trait=16, version=1
         # InstanceMetadata: resource_id=panel_id, instance_id=circuit_id
         request = self._build_get_revision_request(
             vendor_id=VENDOR_SPAN,
-            product_id=PRODUCT_GEN3_PANEL,
+            product_id=self._data.product_id,
             trait_id=TRAIT_CIRCUIT_NAMES,
             instance_id=circuit_id,
         )
 
         try:
-            response = await self._channel.unary_unary(
-                _GET_REVISION,
-                request_serializer=lambda x: x,
-                response_deserializer=lambda x: x,
-            )(request)
-
+            response = await get_revision(request, timeout=self._name_timeout)
             return self._parse_circuit_name(response)
         except grpc.aio.AioRpcError:
+            # Includes DEADLINE_EXCEEDED when name_timeout elapses
             return None
 
     def _encode_string_field(self, field_num: int, value: str) -> bytes:
@@ -595,161 +1490,265 @@ class SpanPanelClient:
     @staticmethod
     def _parse_circuit_name(data: bytes) -> str | None:
         """Parse circuit name from GetRevision response."""
-        fields = _parse_protobuf_fields(data)
-
-        # state_revision (field 3 in RevisionResponse)
-        sr_data = _get_field(fields, 3)
-        if not sr_data or not isinstance(sr_data, bytes):
-            return None
-
-        sr_fields = _parse_protobuf_fields(sr_data)
-        payload_data = _get_field(sr_fields, 2)
-        if not payload_data or not isinstance(payload_data, bytes):
-            return None
-
-        pl_fields = _parse_protobuf_fields(payload_data)
-        raw = _get_field(pl_fields, 1)
-        if not raw or not isinstance(raw, bytes):
-            return None
-
-        # Circuit name is field 4 in the trait 16 payload
-        name_fields = _parse_protobuf_fields(raw)
-        name = _get_field(name_fields, 4)
-        if name and isinstance(name, bytes):
-            return name.decode("utf-8", errors="replace").strip()
+        # state_revision (field 3 in RevisionResponse) -> payload (2)
+        # -> raw trait 16 payload (1) -> circuit name (4)
+        name = _extract(data, (3, 2, 1, 4))
+        if isinstance(name, memoryview) and name:
+            return str(name, "utf-8", errors="replace").strip()
         return None
 
     async def start_streaming(self) -> None:
-        """Start the metric streaming task."""
+        """Start the metric streaming task and the stale-data watchdog."""
         if self._stream_task and not self._stream_task.done():
             return
+        self._last_notification = time.monotonic()
+        if self._decode_offload and self._worker is None:
+            # apply is looked up per batch so instrumentation can shadow it
+            self._worker = DecodeWorker(
+                self._decode_frame,
+                lambda results: self._apply_batch(results),
+                _WORKER_MAX_PENDING,
+            )
         self._stream_task = asyncio.create_task(self._stream_loop())
+        if self._watchdog is None:
+            self._check_stale()
 
     async def _stream_loop(self) -> None:
-        """Main streaming loop with reconnection."""
+        """Main streaming loop, resubscribing with exponential backoff."""
+        attempt = 0
         while self._connected:
+            started = time.monotonic()
+            self._set_state(ConnectionState.CONNECTING)
             try:
                 await self._subscribe_stream()
+                error: Exception | None = None
             except asyncio.CancelledError:
                 return
-            except Exception:
-                _LOGGER.exception("Stream error, reconnecting in 5s")
-                await asyncio.sleep(5)
+            except Exception as err:
+                error = err
+            if isinstance(error, StreamStalledError):
+                await self._rebuild_channel()
+
+            # A stream that delivered data resets the backoff
+            if self._last_notification > started:
+                attempt = 0
+            delay = _backoff_delay(attempt)
+            attempt += 1
+            self._reconnects += 1
+            self._resubscribing = True
+            self._set_state(ConnectionState.BACKOFF)
+
+            # Log the first failure of an outage, then stay quiet
+            log = _LOGGER.warning if attempt == 1 else _LOGGER.debug
+            log(
+                "Span panel %s stream %s, reconnecting in %.1fs",
+                self._host,
+                f"failed: {error!r}" if error else "ended",
+                delay,
+            )
+            await asyncio.sleep(delay)
 
     async def _subscribe_stream(self) -> None:
         """Subscribe to the gRPC stream and process updates."""
+        # Instances may have changed while disconnected
+        self._header_cache.clear()
         call = self._channel.unary_stream(
             _SUBSCRIBE,
             request_serializer=lambda x: x,
             response_deserializer=lambda x: x,
         )
 
-        stream = call(b"")
+        self._stalled = False
+        self._call_started = time.monotonic()
+        self._call = stream = call(b"")
+        try:
+            await self._read_stream(stream)
+        except (asyncio.CancelledError, grpc.aio.AioRpcError):
+            # The watchdog cancelled the call; anything else is a shutdown
+            # or a real stream error
+            if not self._stalled:
+                raise
+            raise StreamStalledError from None
+        finally:
+            self._call = None
+
+    async def _read_stream(self, stream: grpc.aio.UnaryStreamCall) -> None:
+        """Process notifications until the stream ends."""
         async for response in stream:
+            self._last_notification = time.monotonic()
+            if self._capture is not None:
+                self._capture.write(response)
+            if self._state is not ConnectionState.STREAMING:
+                self._set_state(ConnectionState.STREAMING)
+            if self._resubscribing:
+                self._resubscribing = False
+                _LOGGER.info("Span panel %s stream resumed", self._host)
+                self._notify_reconnect()
             try:
-                self._process_notification(response)
+                if self._worker is not None:
+                    self._offload_notification(response)
+                else:
+                    self._process_notification(response)
             except Exception:
                 _LOGGER.debug("Error processing notification", exc_info=True)
 
-    def _process_notification(self, data: bytes) -> None:
-        """Process a TraitInstanceNotification."""
-        fields = _parse_protobuf_fields(data)
-
-        # Parse resource_trait_info (field 1) to get trait/instance info
-        rti_data = _get_field(fields, 1)
-        if not rti_data or not isinstance(rti_data, bytes):
-            return
-
-        rti_fields = _parse_protobuf_fields(rti_data)
-        ext_data = _get_field(rti_fields, 2)
-        if not ext_data or not isinstance(ext_data, bytes):
-            return
-
-        ext_fields = _parse_protobuf_fields(ext_data)
-        info_data = _get_field(ext_fields, 2)
-        if not info_data or not isinstance(info_data, bytes):
-            return
+    def start_capture(self, path: str) -> None:
+        """Record every raw Subscribe response to a capture file.
 
-        info_fields = _parse_protobuf_fields(info_data)
-        meta_data = _get_field(info_fields, 1)
-        if not meta_data or not isinstance(meta_data, bytes):
-            return
-
-        meta_fields = _parse_protobuf_fields(meta_data)
-        trait_id = _get_field(meta_fields, 3, 0)
-
-        iid_data = _get_field(info_fields, 2)
-        instance_id = 0
-        if iid_data and isinstance(iid_data, bytes):
-            iid_fields = _parse_protobuf_fields(iid_data)
-            instance_id = _get_field(iid_fields, 1, 0)
+        The file is opened and written on the capture writer's own thread.
+        """
+        self.stop_capture()
+        self._capture = CaptureWriter(path)
+        _LOGGER.info("Capturing Span panel %s stream to %s", self._host, path)
+
+    def stop_capture(self) -> int:
+        """Stop recording; returns the number of responses captured."""
+        capture, self._capture = self._capture, None
+        if capture is None:
+            return 0
+        capture.close()
+        return capture.records
+
+    def _notify_reconnect(self) -> None:
+        """Tell reconnect callbacks that the stream is flowing again."""
+        for cb in self._reconnect_callbacks:
+            try:
+                cb()
+            except Exception:
+                _LOGGER.exception("Error in reconnect callback")
 
-        # Only process trait 26 (power metrics)
-        if trait_id != TRAIT_POWER_METRICS:
+    def _process_notification(self, data: bytes) -> None:
+        """Process a TraitInstanceNotification."""
+        header = self._read_header(data)
+        if header is None:
             return
 
-        # Parse trait_notify (field 2)
-        notify_data = _get_field(fields, 2)
-        if not notify_data or not isinstance(notify_data, bytes):
+        # Only process trait 26 (power metrics); other traits are dropped
+        # before their body is decoded
+        if header.trait_id != TRAIT_POWER_METRICS:
             return
+        instance_id = header.instance_id
+        self._sample_time = _notification_time(data)
 
-        notify_fields = _parse_protobuf_fields(notify_data)
-
-        # Parse metrics (field 3, repeated)
-        metrics_list = notify_fields.get(3, [])
-        for metric_data in metrics_list:
-            if not isinstance(metric_data, bytes):
-                continue
+        if self._protobuf_decode is not None:
+            decoded = self._protobuf_decode(data)
+            raw_metrics = decoded[2] if decoded else ()
+        else:
+            raw_metrics = _decode_raw_metrics(data)
 
-            ml_fields = _parse_protobuf_fields(metric_data)
-            raw_metrics = ml_fields.get(3, [])
+        for raw in raw_metrics:
+            self._decode_and_store_metric(instance_id, raw)
 
-            for raw in raw_metrics:
-                if not isinstance(raw, bytes):
-                    continue
-                self._decode_and_store_metric(instance_id, raw)
+        self._dispatch()
 
-        self._notify()
+    def _read_header(self, data: bytes) -> TraitHeader | None:
+        """Return the decoded resource_trait_info header of a notification.
 
-    def _decode_and_store_metric(self, iid: int, raw: bytes) -> None:
+        The header block (field 1) is identical for every notification from
+        the same trait instance, so its raw bytes are used as an LRU cache
+        key and repeated headers cost a single hash lookup.
+        """
+        rti = _find_field(data, 0, len(data), 1)
+        if rti is None or rti[0] != 2:
+            return None
+        key = memoryview(data)[rti[1] : rti[2]]
+        header = self._header_cache.get(key)
+        if header is None:
+            header = _decode_header(data, rti[1], rti[2])
+            if header is None:
+                return None
+            self._header_cache.put(key, header)
+        return header
+
+    def _decode_and_store_metric(self, iid: int, raw: Buffer) -> None:
         """Decode a raw metric payload and store it."""
-        top_fields = _parse_protobuf_fields(raw)
-
-        # Main feed (IID 1) uses field 14 with unique deeper nesting
-        if iid == MAIN_FEED_IID:
-            self._data.main_feed = _decode_main_feed(raw)
-            return
-
-        circuit_id = iid - METRIC_IID_OFFSET
-        if not (1 <= circuit_id <= 50):
-            return
-
-        # Dual-phase (field 12) — check first since it's more specific
-        dual_data = _get_field(top_fields, 12)
-        if dual_data and isinstance(dual_data, bytes):
-            self._data.metrics[circuit_id] = _decode_dual_phase(dual_data)
-            # Detect phase from actual metric data
-            if circuit_id in self._data.circuits:
-                self._data.circuits[circuit_id].is_dual_phase = True
-            return
-
-        # Single-phase (field 11)
-        single_data = _get_field(top_fields, 11)
-        if single_data and isinstance(single_data, bytes):
-            self._data.metrics[circuit_id] = _decode_single_phase(single_data)
-            if circuit_id in self._data.circuits:
-                self._data.circuits[circuit_id].is_dual_phase = False
+        decoded = _decode_metric(iid, raw, self._scratch)
+        if decoded is not None:
+            self._store_metric(decoded[0], self._scratch, decoded[1])
+
+    def _store_metric(
+        self, key: int, metrics: CircuitMetrics, dual_phase: bool | None
+    ) -> None:
+        """Copy decoded metrics into the store and mark the key changed.
+
+        Also updates the panel-wide aggregates, integrates the power into
+        the energy totals, timed by the notification the metrics came from,
+        records the sample in the history buffers, and feeds circuit
+        samples to the rolling peaks, the statistics aggregates and the
+        event detector when they are enabled.
+        """
+        self._data.store.write(key, metrics)
+        self._aggregates.update(key, metrics, bool(dual_phase))
+        self._energy.add(key, self._sample_time, metrics.power_w)
+        if self._history is not None:
+            # Stamped locally; queries are anchored to the local wall clock
+            self._history.append(key, time.time(), metrics)
+        if key != MAIN_FEED_KEY:
+            if self._peaks is not None and metrics.is_on:
+                self._peaks.add(
+                    key, time.monotonic(), metrics.power_max_w, metrics.power_min_w
+                )
+            if self._statistics is not None:
+                self._statistics.add(key, metrics)
+            if self._detector is not None:
+                self._detector.add(
+                    key, self._sample_time, metrics, bool(dual_phase)
+                )
+        self._dirty.add(key)
+        # Detect phase from actual metric data
+        if dual_phase is not None and key in self._data.circuits:
+            self._data.circuits[key].is_dual_phase = dual_phase
+
+    def _offload_notification(self, data: bytes) -> None:
+        """Queue a trait 26 notification for the decode worker."""
+        header = self._read_header(data)
+        if header is not None and header.trait_id == TRAIT_POWER_METRICS:
+            self._worker.submit(header.instance_id, data)
+
+    def _decode_frame(
+        self, instance_id: int, data: bytes
+    ) -> list[tuple[int, CircuitMetrics, bool | None, float]]:
+        """Decode one queued notification (runs on the worker thread).
+
+        Each metric gets its own CircuitMetrics; the shared scratch object
+        and the store belong to the loop.
+        """
+        sample_time = _notification_time(data)
+        if self._protobuf_decode is not None:
+            decoded = self._protobuf_decode(data)
+            raw_metrics = decoded[2] if decoded else ()
+        else:
+            raw_metrics = _decode_raw_metrics(data)
+        results = []
+        for raw in raw_metrics:
+            metrics = CircuitMetrics()
+            decoded_metric = _decode_metric(instance_id, raw, metrics)
+            if decoded_metric is not None:
+                key, dual_phase = decoded_metric
+                results.append((key, metrics, dual_phase, sample_time))
+        return results
+
+    def _apply_batch(
+        self, results: list[tuple[int, CircuitMetrics, bool | None, float]]
+    ) -> None:
+        """Store a decoded batch (on the loop) and dispatch it once."""
+        for key, metrics, dual_phase, sample_time in results:
+            self._sample_time = sample_time
+            self._store_metric(key, metrics, dual_phase)
+        self._dispatch()
 
     async def test_connection(self) -> bool:
         """Test if we can connect to the panel."""
+        channel = POOL.acquire(self._host, self._port)
         try:
-            channel = grpc.aio.insecure_channel(f"{self._host}:{self._port}")
             response = await channel.unary_unary(
                 _GET_INSTANCES,
                 request_serializer=lambda x: x,
                 response_deserializer=lambda x: x,
             )(b"")
-            await channel.close()
             return len(response) > 0
         except Exception:
             return False
+        finally:
+            # The channel lingers in the pool for the entry being set up
+            await POOL.release(channel)
@@ -0,0 +1,76 @@
+"""Per-circuit aggregates for long-term statistics import."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .span_client import CircuitMetrics
+
+# (statistic, average column, minimum column, maximum column); the panel
+# reports per-window extremes, so min/max come from those rather than from
+# the averages
+STATISTIC_COLUMNS = (
+    ("power", "power_w", "power_min_w", "power_max_w"),
+    ("current", "current_a", "current_min_a", "current_max_a"),
+    ("voltage", "voltage_v", "voltage_min_v", "voltage_max_v"),
+)
+
+
+class Aggregate:
+    """Running count, sum, minimum and maximum of one measurement."""
+
+    __slots__ = ("count", "total", "low", "high")
+
+    def __init__(self) -> None:
+        """Initialize an empty aggregate."""
+        self.count = 0
+        self.total = 0.0
+        self.low = float("inf")
+        self.high = float("-inf")
+
+    @property
+    def mean(self) -> float:
+        """Return the mean of the samples."""
+        return self.total / self.count if self.count else 0.0
+
+
+class StatisticsAggregator:
+    """Fold every decoded sample into per-circuit aggregates.
+
+    Sampling is O(1) per measurement and memory is one Aggregate per
+    circuit and measurement, however many samples arrive before roll().
+    """
+
+    def __init__(self) -> None:
+        """Initialize with no samples."""
+        self._aggregates: dict[int, tuple[Aggregate, ...]] = {}
+
+    def add(self, key: int, metrics: CircuitMetrics) -> None:
+        """Add one sample of a circuit."""
+        aggregates = self._aggregates.get(key)
+        if aggregates is None:
+            aggregates = self._aggregates[key] = tuple(
+                Aggregate() for _ in STATISTIC_COLUMNS
+            )
+        for aggregate, (_, average, minimum, maximum) in zip(
+            aggregates, STATISTIC_COLUMNS
+        ):
+            aggregate.count += 1
+            aggregate.total += getattr(metrics, average)
+            low = getattr(metrics, minimum)
+            if low < aggregate.low:
+                aggregate.low = low
+            high = getattr(metrics, maximum)
+            if high > aggregate.high:
+                aggregate.high = high
+
+    def roll(self) -> dict[int, dict[str, Aggregate]]:
+        """Return the aggregates since the last roll and start over."""
+        aggregates, self._aggregates = self._aggregates, {}
+        return {
+            key: {
+                statistic: aggregate
+                for (statistic, *_), aggregate in zip(STATISTIC_COLUMNS, values)
+            }
+            for key, values in aggregates.items()
+        }
@@ -0,0 +1,66 @@
+"""Switch platform for Span MAIN 40 integration."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.components.switch import SwitchEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN
+from .coordinator import SpanPanelCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Span Panel switches from a config entry."""
+    coordinator: SpanPanelCoordinator = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities([SpanInstrumentationSwitch(coordinator, entry)])
+
+
+class SpanInstrumentationSwitch(SwitchEntity):
+    """Turns hot-path instrumentation on or off at runtime."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.CONFIG
+    _attr_icon = "mdi:chart-timeline-variant"
+
+    def __init__(
+        self,
+        coordinator: SpanPanelCoordinator,
+        entry: ConfigEntry,
+    ) -> None:
+        """Initialize the switch."""
+        self._coordinator = coordinator
+        self._entry = entry
+        self._attr_unique_id = f"{entry.data['host']}_instrumentation"
+        self._attr_name = "Instrumentation"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return device info."""
+        return DeviceInfo(identifiers={(DOMAIN, self._entry.data["host"])})
+
+    @property
+    def is_on(self) -> bool:
+        """Return True if instrumentation is collecting."""
+        return self._coordinator.client.instrumentation.enabled
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Start collecting (counters restart from zero)."""
+        self._coordinator.client.set_instrumentation(True)
+        self.async_write_ha_state()
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        """Stop collecting."""
+        self._coordinator.client.set_instrumentation(False)
+        self.async_write_ha_state()
@@ -0,0 +1,23 @@
+"""Import the integration modules without Home Assistant.
+
+The package __init__ imports Home Assistant, but the client, decoders and
+dispatcher only need grpc/protobuf. Registering a bare package module lets
+the tools import ``span_panel.span_client`` and friends directly.
+"""
+from __future__ import annotations
+
+import sys
+import types
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+PACKAGE_DIR = REPO_DIR / "custom_components" / "span_panel"
+
+
+def load_package() -> None:
+    """Register the integration directory as the ``span_panel`` package."""
+    if "span_panel" in sys.modules:
+        return
+    package = types.ModuleType("span_panel")
+    package.__path__ = [str(PACKAGE_DIR)]
+    sys.modules["span_panel"] = package
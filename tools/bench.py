@@ -0,0 +1,180 @@
+"""Micro-benchmarks for the decode and dispatch hot path.
+
+Usage: python tools/bench.py [--filter SUBSTR] [--listeners N]
+       [--baseline FILE] [--save-baseline] [--threshold 0.15]
+
+Each case reports the best mean ns/op over several repeats and the peak
+bytes allocated while running one op (tracemalloc). Save a baseline on the
+host you care about with --save-baseline, then rerun after an upgrade: any
+case slower than baseline * (1 + threshold) is flagged and the script
+exits with status 1. Baselines are host-specific and are not committed.
+
+Runs without Home Assistant; payloads come from tools/payloads.py.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from _bootstrap import load_package
+
+load_package()
+
+from span_panel.span_client import (  # noqa: E402
+    CircuitMetrics,
+    SpanPanelClient,
+    _decode_dual_phase,
+    _decode_main_feed,
+    _decode_single_phase,
+    _decode_varint,
+    _find_field,
+    _parse_protobuf_fields,
+)
+
+import payloads  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).with_name("bench_baseline.json")
+
+
+def _body(raw: bytes, field_num: int) -> tuple[bytes, int, int]:
+    """Return (raw, start, end) of the sub-message field_num in raw."""
+    _, start, end = _find_field(raw, 0, len(raw), field_num)
+    return raw, start, end
+
+
+def _cases(listeners: int) -> dict[str, Callable[[], object]]:
+    """Build the benchmark cases; each is a zero-argument callable."""
+    varints = b"".join(
+        payloads.encode_varint(v) for v in (1, 150, 120_400, 9_000_000, 2**40)
+    )
+
+    def decode_varints() -> None:
+        offset = 0
+        while offset < len(varints):
+            _, offset = _decode_varint(varints, offset)
+
+    single = _body(payloads.single_phase_metric(1200, 120_400, 240_000), 11)
+    dual = _body(payloads.dual_phase_metric(8000, 7900, 241_000, 3_800_000), 12)
+    main = _body(payloads.main_feed_metric(9_000_000, 121_500), 14)
+    out = CircuitMetrics()
+
+    messages = payloads.sample_notifications()
+    client = SpanPanelClient("bench")
+
+    def process_notifications() -> None:
+        for msg in messages:
+            client._process_notification(msg)
+
+    fanout = SpanPanelClient("bench")
+    for _ in range(listeners):
+        fanout.register_callback(lambda changed: None)
+    changed = set(range(1, 39))
+
+    return {
+        "decode_varint x5": decode_varints,
+        "parse_protobuf_fields": lambda: _parse_protobuf_fields(single[0]),
+        "decode_single_phase": lambda: _decode_single_phase(*single, out),
+        "decode_dual_phase": lambda: _decode_dual_phase(*dual, out),
+        "decode_main_feed": lambda: _decode_main_feed(*main, out),
+        f"process_notification x{len(messages)}": process_notifications,
+        f"notify fan-out x{listeners}": lambda: fanout._notify(changed),
+    }
+
+
+def _time_ns(func: Callable[[], object], min_time: float, repeats: int) -> float:
+    """Return the best mean ns/op of func over repeats timed runs."""
+    # Calibrate the loop count to run for about min_time
+    loops = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_time * 1e9:
+            break
+        loops *= 2
+    best = elapsed / loops
+    for _ in range(repeats - 1):
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            func()
+        best = min(best, (time.perf_counter_ns() - start) / loops)
+    return best
+
+
+def _peak_bytes(func: Callable[[], object], samples: int = 50) -> float:
+    """Return the mean peak bytes allocated while running func once."""
+    func()  # warm caches so one-time allocations are not counted
+    tracemalloc.start()
+    total = 0
+    for _ in range(samples):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - before
+    tracemalloc.stop()
+    return total / samples
+
+
+async def _run(args: argparse.Namespace) -> int:
+    results: dict[str, dict[str, float]] = {}
+    for name, func in _cases(args.listeners).items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = {
+            "ns_per_op": _time_ns(func, args.min_time, args.repeats),
+            "peak_bytes_per_op": _peak_bytes(func),
+        }
+
+    baseline: dict[str, dict[str, float]] = {}
+    if not args.save_baseline and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+
+    regressions = 0
+    print(f"{'case':<28} {'ns/op':>12} {'peak B/op':>10} {'vs baseline':>12}")
+    for name, result in results.items():
+        line = (
+            f"{name:<28} {result['ns_per_op']:12.0f}"
+            f" {result['peak_bytes_per_op']:10.0f}"
+        )
+        if name in baseline:
+            ratio = result["ns_per_op"] / baseline[name]["ns_per_op"]
+            line += f" {ratio - 1:+11.1%}"
+            if ratio > 1 + args.threshold:
+                line += "  REGRESSION"
+                regressions += 1
+        print(line)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nbaseline saved to {args.baseline}")
+    elif not baseline:
+        print(f"\nno baseline at {args.baseline}; run with --save-baseline first")
+    elif regressions:
+        print(f"\n{regressions} case(s) slower than the {args.threshold:.0%} threshold")
+        return 1
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", help="only run cases containing this text")
+    parser.add_argument("--listeners", type=int, default=50)
+    parser.add_argument("--min-time", type=float, default=0.2, help="s per run")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+    # The client's dispatcher needs a running loop
+    raise SystemExit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()
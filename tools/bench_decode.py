@@ -0,0 +1,74 @@
+"""Compare the built-in and protoset-based notification decoders.
+
+Usage: python tools/bench_decode.py [--iterations N]
+
+Runs without Home Assistant; needs grpcio and protobuf installed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from _bootstrap import load_package
+
+load_package()
+
+from span_panel import proto_decoder  # noqa: E402
+from span_panel.span_client import SpanPanelClient, _decode_notification  # noqa: E402
+
+import payloads  # noqa: E402
+
+
+def _ns_per_op(func, messages: list[bytes], iterations: int) -> float:
+    """Return mean nanoseconds per call of func over messages."""
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        for msg in messages:
+            func(msg)
+    return (time.perf_counter_ns() - start) / (iterations * len(messages))
+
+
+async def _run(iterations: int) -> None:
+    messages = payloads.sample_notifications()
+    protobuf_decode = proto_decoder.load()
+    print(f"protobuf runtime: {proto_decoder.runtime()}")
+    print(f"{len(messages)} notifications x {iterations} iterations\n")
+
+    results = {
+        "builtin envelope": _ns_per_op(_decode_notification, messages, iterations)
+    }
+    builtin_client = SpanPanelClient("bench")
+    results["builtin end-to-end"] = _ns_per_op(
+        builtin_client._process_notification, messages, iterations
+    )
+
+    if protobuf_decode is None:
+        print("protoset could not be loaded; only the built-in decoder was measured")
+    else:
+        for msg in messages:
+            if protobuf_decode(msg) != _decode_notification(msg):
+                raise SystemExit("decoders disagree on a sample notification")
+        results["protobuf envelope"] = _ns_per_op(protobuf_decode, messages, iterations)
+        protobuf_client = SpanPanelClient("bench")
+        protobuf_client._protobuf_decode = protobuf_decode
+        results["protobuf end-to-end"] = _ns_per_op(
+            protobuf_client._process_notification, messages, iterations
+        )
+
+    for name, ns in results.items():
+        print(f"{name:<22} {ns / 1000:9.2f} us/op")
+    if protobuf_decode is not None:
+        ratio = results["builtin envelope"] / results["protobuf envelope"]
+        print(f"\nenvelope speedup: {ratio:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(_run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+"""Check the metric decoders against a reference decoder and fixed values.
+
+Usage: python tools/check_decode.py [CAPTURE ...]
+
+Decodes tools/payloads.sample_notifications() and the recorded captures
+(default: tools/captures/*.cap) with the offset-based decoders and
+compares every CircuitMetrics field with a dict-based reference decoder
+kept in the shape of the original field-by-field parser. The same
+notifications are then fed through the client's inline, protobuf and
+decode-worker paths, and the stored rows are compared as well.
+
+Prints every mismatch and exits non-zero if there were any. Runs without
+Home Assistant; needs grpcio and protobuf installed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import math
+import struct
+import sys
+from pathlib import Path
+
+from _bootstrap import REPO_DIR, load_package
+
+load_package()
+
+from span_panel import proto_decoder  # noqa: E402
+from span_panel.capture import read_capture  # noqa: E402
+from span_panel.const import (  # noqa: E402
+    BREAKER_OFF_VOLTAGE_MV,
+    MAIN_FEED_IID,
+    MAIN_FEED_KEY,
+    MAX_CIRCUIT_ID,
+    METRIC_IID_OFFSET,
+    TRAIT_POWER_METRICS,
+)
+from span_panel.decode_worker import DecodeWorker  # noqa: E402
+from span_panel.span_client import (  # noqa: E402
+    CircuitMetrics,
+    SpanPanelClient,
+    _decode_metric,
+    _decode_notification,
+)
+
+import payloads  # noqa: E402
+
+CAPTURE_DIR = REPO_DIR / "tools" / "captures"
+FIELDS = [f.name for f in dataclasses.fields(CircuitMetrics)]
+
+
+# --- Reference decoder -------------------------------------------------------
+# Parses each message into a dict of field number -> [values] and picks the
+# values out by path, as the integration did before the offset decoders.
+# Extended only where the decoded output was extended since: min/max, int64
+# signs, summed dual-phase current extremes and signed leg B main power.
+
+
+def _varint(data: bytes, offset: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        b = data[offset]
+        offset += 1
+        result |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return result, offset
+        shift += 7
+
+
+def _fields(data: bytes) -> dict[int, list]:
+    fields: dict[int, list] = {}
+    offset = 0
+    while offset < len(data):
+        tag, offset = _varint(data, offset)
+        wire_type = tag & 0x07
+        if wire_type == 0:
+            value, offset = _varint(data, offset)
+        elif wire_type == 1:
+            value = struct.unpack_from("<Q", data, offset)[0]
+            offset += 8
+        elif wire_type == 2:
+            length, offset = _varint(data, offset)
+            value = bytes(data[offset : offset + length])
+            offset += length
+        elif wire_type == 5:
+            value = struct.unpack_from("<I", data, offset)[0]
+            offset += 4
+        else:
+            break
+        fields.setdefault(tag >> 3, []).append(value)
+    return fields
+
+
+def _first(fields: dict, num: int, default=None):
+    values = fields.get(num)
+    return values[0] if values else default
+
+
+def _int64(value: int) -> int:
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _stats(data) -> tuple[int, int, int] | None:
+    """Return (min, max, avg) of a stats message, or None if absent."""
+    if not isinstance(data, bytes) or not data:
+        return None
+    fields = _fields(data)
+    return tuple(_int64(_first(fields, n, 0)) for n in (1, 2, 3))
+
+
+def _ref_single_phase(data: bytes) -> CircuitMetrics:
+    fields = _fields(data)
+    metrics = CircuitMetrics()
+    for num, prefix, scale in (
+        (1, "current", 1000.0),
+        (2, "voltage", 1000.0),
+        (3, "power", 2000.0),
+        (4, "apparent_power", 2000.0),
+        (5, "reactive_power", 2000.0),
+    ):
+        stats = _stats(_first(fields, num))
+        if stats is not None:
+            _set_named(metrics, prefix, stats, scale)
+    metrics.is_on = metrics.voltage_v * 1000 > BREAKER_OFF_VOLTAGE_MV
+    return metrics
+
+
+_UNITS = {
+    "current": "a",
+    "voltage": "v",
+    "power": "w",
+    "apparent_power": "va",
+    "reactive_power": "var",
+}
+
+
+def _set_named(metrics: CircuitMetrics, prefix: str, stats, scale: float) -> None:
+    unit = _UNITS[prefix]
+    low, high, avg = stats
+    setattr(metrics, f"{prefix}_min_{unit}", low / scale)
+    setattr(metrics, f"{prefix}_max_{unit}", high / scale)
+    setattr(metrics, f"{prefix}_{unit}", avg / scale)
+
+
+def _ref_dual_phase(data: bytes) -> CircuitMetrics:
+    fields = _fields(data)
+    metrics = CircuitMetrics()
+    legs = []
+    for num, voltage_attr in ((1, "voltage_a_v"), (2, "voltage_b_v")):
+        current = (0, 0, 0)
+        leg = _first(fields, num)
+        if isinstance(leg, bytes) and leg:
+            leg_fields = _fields(leg)
+            current = _stats(_first(leg_fields, 1)) or current
+            voltage = _stats(_first(leg_fields, 2))
+            if voltage is not None:
+                setattr(metrics, voltage_attr, voltage[2] / 1000.0)
+        legs.append(current)
+
+    combined = _first(fields, 3)
+    if isinstance(combined, bytes) and combined:
+        combined_fields = _fields(combined)
+        for num, prefix in (
+            (2, "voltage"),
+            (3, "power"),
+            (4, "apparent_power"),
+            (5, "reactive_power"),
+        ):
+            stats = _stats(_first(combined_fields, num))
+            if stats is not None:
+                _set_named(
+                    metrics, prefix, stats, 1000.0 if num == 2 else 2000.0
+                )
+        power_factor = _stats(_first(combined_fields, 6))
+        if power_factor is not None:
+            metrics.power_factor = power_factor[2] / 2000.0
+
+    frequency = _stats(_first(fields, 4))
+    if frequency is not None:
+        metrics.frequency_hz = frequency[2] / 1000.0
+
+    metrics.current_a_a = legs[0][2] / 1000.0
+    metrics.current_b_a = legs[1][2] / 1000.0
+    metrics.current_a = metrics.current_a_a + metrics.current_b_a
+    metrics.current_min_a = (legs[0][0] + legs[1][0]) / 1000.0
+    metrics.current_max_a = (legs[0][1] + legs[1][1]) / 1000.0
+    metrics.is_on = metrics.voltage_v * 1000 > BREAKER_OFF_VOLTAGE_MV
+    return metrics
+
+
+def _ref_deepest(data: bytes) -> int:
+    best = 0
+    for num, values in _fields(data).items():
+        for value in values:
+            if isinstance(value, bytes):
+                inner = _ref_deepest(value) if value else 0
+            elif num == 3:
+                inner = _int64(value)
+            else:
+                continue
+            if abs(inner) > abs(best):
+                best = inner
+    return best
+
+
+def _ref_main_leg(data: bytes) -> tuple[float, float, float]:
+    fields = _fields(data)
+    power = voltage = frequency = 0.0
+    power_stats = _first(fields, 3)
+    if isinstance(power_stats, bytes) and power_stats:
+        power = _ref_deepest(power_stats) / 2000.0
+    voltage_stats = _first(fields, 2)
+    if isinstance(voltage_stats, bytes) and voltage_stats:
+        inner = _first(_fields(voltage_stats), 2)
+        if isinstance(inner, bytes):
+            value = _first(_fields(inner), 3, 0)
+            if isinstance(value, int) and value > 0:
+                voltage = value / 1000.0
+    frequency_stats = _first(fields, 4)
+    if isinstance(frequency_stats, bytes) and frequency_stats:
+        value = _first(_fields(frequency_stats), 3, 0)
+        if isinstance(value, int) and value > 0:
+            frequency = value / 1000.0
+    return power, voltage, frequency
+
+
+def _ref_main_feed(data: bytes) -> CircuitMetrics:
+    metrics = CircuitMetrics()
+    main = _first(_fields(data), 14)
+    if not isinstance(main, bytes) or not main:
+        return metrics
+    main_fields = _fields(main)
+    leg_a = _first(main_fields, 1)
+    if isinstance(leg_a, bytes) and leg_a:
+        metrics.power_w, metrics.voltage_a_v, metrics.frequency_hz = (
+            _ref_main_leg(leg_a)
+        )
+    leg_b = _first(main_fields, 2)
+    if isinstance(leg_b, bytes) and leg_b:
+        power, metrics.voltage_b_v, _ = _ref_main_leg(leg_b)
+        metrics.power_w += power
+
+    if metrics.voltage_b_v > 0:
+        metrics.voltage_v = metrics.voltage_a_v + metrics.voltage_b_v
+    else:
+        metrics.voltage_v = metrics.voltage_a_v * 2
+    if metrics.voltage_v > 0:
+        metrics.current_a = metrics.power_w / metrics.voltage_v
+    metrics.power_min_w = metrics.power_max_w = metrics.power_w
+    metrics.voltage_min_v = metrics.voltage_max_v = metrics.voltage_v
+    metrics.current_min_a = metrics.current_max_a = metrics.current_a
+    metrics.is_on = True
+    return metrics
+
+
+def reference_decode(iid: int, raw: bytes) -> tuple[int, CircuitMetrics] | None:
+    """Decode one raw metric payload into (store key, metrics)."""
+    if iid == MAIN_FEED_IID:
+        return MAIN_FEED_KEY, _ref_main_feed(raw)
+    circuit_id = iid - METRIC_IID_OFFSET
+    if not 1 <= circuit_id <= MAX_CIRCUIT_ID:
+        return None
+    fields = _fields(raw)
+    dual = _first(fields, 12)
+    if isinstance(dual, bytes) and dual:
+        return circuit_id, _ref_dual_phase(dual)
+    single = _first(fields, 11)
+    if isinstance(single, bytes) and single:
+        return circuit_id, _ref_single_phase(single)
+    return None
+
+
+# --- Checks ------------------------------------------------------------------
+
+
+class Checker:
+    """Collect mismatches instead of stopping at the first one."""
+
+    def __init__(self) -> None:
+        self.checked = 0
+        self.failures: list[str] = []
+
+    def compare(self, label: str, got, expected: CircuitMetrics) -> None:
+        """Compare every CircuitMetrics field of got with expected."""
+        self.checked += 1
+        for name in FIELDS:
+            value = getattr(got, name)
+            want = getattr(expected, name)
+            if value != want and not (
+                isinstance(want, float) and math.isclose(value, want, abs_tol=1e-9)
+            ):
+                self.failures.append(f"{label}: {name} = {value!r}, expected {want!r}")
+
+    def expect(self, label: str, value: float, want: float) -> None:
+        """Compare one value with a fixed expectation."""
+        self.checked += 1
+        if not math.isclose(value, want, abs_tol=1e-9):
+            self.failures.append(f"{label} = {value!r}, expected {want!r}")
+
+
+def _reference_rows(messages: list[bytes]) -> dict[int, CircuitMetrics]:
+    """Return the last reference-decoded metrics per store key."""
+    rows: dict[int, CircuitMetrics] = {}
+    for data in messages:
+        decoded = _decode_notification(data)
+        if decoded is None or decoded[0] != TRAIT_POWER_METRICS:
+            continue
+        for raw in decoded[2]:
+            ref = reference_decode(decoded[1], bytes(raw))
+            if ref is not None:
+                rows[ref[0]] = ref[1]
+    return rows
+
+
+def check_decoders(check: Checker, source: str, messages: list[bytes]) -> None:
+    """Compare _decode_metric with the reference for every metric payload."""
+    scratch = CircuitMetrics()
+    for index, data in enumerate(messages):
+        decoded = _decode_notification(data)
+        if decoded is None or decoded[0] != TRAIT_POWER_METRICS:
+            continue
+        iid = decoded[1]
+        for raw in decoded[2]:
+            ref = reference_decode(iid, bytes(raw))
+            got = _decode_metric(iid, raw, scratch)
+            label = f"{source}[{index}] iid {iid}"
+            if (got is None) != (ref is None) or (
+                got is not None and got[0] != ref[0]
+            ):
+                check.failures.append(f"{label}: key {got!r}, expected {ref!r}")
+            elif got is not None:
+                check.compare(label, scratch, ref[1])
+
+
+def check_client(
+    check: Checker, source: str, path: str, client: SpanPanelClient,
+    expected: dict[int, CircuitMetrics],
+) -> None:
+    """Compare a client's stored rows with the reference rows."""
+    stored = dict(client.data.metrics)
+    stored[MAIN_FEED_KEY] = client.data.main_feed
+    if stored.keys() != expected.keys():
+        check.failures.append(
+            f"{source} {path}: stored keys {sorted(stored)}, "
+            f"expected {sorted(expected)}"
+        )
+    for key in stored.keys() & expected.keys():
+        check.compare(f"{source} {path} key {key}", stored[key], expected[key])
+
+
+async def _worker_client(messages: list[bytes]) -> SpanPanelClient:
+    """Feed messages through a decode worker and wait for it to drain."""
+    client = SpanPanelClient("check")
+    worker = DecodeWorker(client._decode_frame, client._apply_batch, 64)
+    client._worker = worker
+    try:
+        for data in messages:
+            client._offload_notification(data)
+            # Let batches complete now and then, as a live stream would
+            await asyncio.sleep(0)
+        while worker.stats["pending"] or worker._in_flight is not None:
+            await asyncio.sleep(0.001)
+    finally:
+        worker.close()
+    if worker.stats["failed"]:
+        raise SystemExit(f"decode worker failed frames: {worker.stats}")
+    return client
+
+
+async def check_paths(check: Checker, source: str, messages: list[bytes]) -> None:
+    """Compare the inline, protobuf and worker paths with the reference."""
+    expected = _reference_rows(messages)
+
+    inline = SpanPanelClient("check")
+    for data in messages:
+        inline._process_notification(data)
+    check_client(check, source, "inline", inline, expected)
+
+    protobuf_decode = proto_decoder.load()
+    if protobuf_decode is not None:
+        protobuf = SpanPanelClient("check")
+        protobuf._protobuf_decode = protobuf_decode
+        for data in messages:
+            protobuf._process_notification(data)
+        check_client(check, source, "protobuf", protobuf, expected)
+
+    worker = await _worker_client(messages)
+    check_client(check, source, "worker", worker, expected)
+
+
+def check_fixed(check: Checker) -> None:
+    """Check spot values of the sample payloads and a backfeeding circuit."""
+    scratch = CircuitMetrics()
+    messages = payloads.sample_notifications()
+    rows = {}
+    for data in messages:
+        _, iid, raws = _decode_notification(data)
+        key, _ = _decode_metric(iid, raws[0], scratch)
+        rows[key] = dataclasses.replace(scratch)
+
+    main = rows[MAIN_FEED_KEY]
+    check.expect("sample main feed power_w", main.power_w, 4500.0)
+    check.expect("sample main feed voltage_v", main.voltage_v, 243.0)
+    check.expect("sample main feed frequency_hz", main.frequency_hz, 60.0)
+    circuit = rows[1]
+    check.expect("sample circuit 1 current_a", circuit.current_a, 1.0)
+    check.expect("sample circuit 1 voltage_v", circuit.voltage_v, 120.4)
+    check.expect("sample circuit 1 power_w", circuit.power_w, 120.0)
+    check.expect("sample circuit 1 power_max_w", circuit.power_max_w, 126.0)
+    dual = rows[31]
+    check.expect("sample circuit 31 current_a", dual.current_a, 15.9)
+    check.expect("sample circuit 31 power_w", dual.power_w, 1900.0)
+
+    backfeed = payloads.single_phase_metric(-4000, 120_000, -1_000_000)
+    _decode_metric(payloads.circuit_iid(2), backfeed, scratch)
+    check.expect("backfeed power_w", scratch.power_w, -500.0)
+    check.expect("backfeed power_min_w", scratch.power_min_w, -525.0)
+    check.expect("backfeed current_a", scratch.current_a, -4.0)
+    exporting = payloads.main_feed_metric(-6_000_000, 121_000)
+    _decode_metric(MAIN_FEED_IID, exporting, scratch)
+    check.expect("exporting main feed power_w", scratch.power_w, -3000.0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "captures", nargs="*", type=Path,
+        help="capture files (default: tools/captures/*.cap)",
+    )
+    args = parser.parse_args()
+    captures = args.captures or sorted(CAPTURE_DIR.glob("*.cap"))
+
+    sources = [("payloads", payloads.sample_notifications())]
+    for path in captures:
+        messages = [data for _, data in read_capture(str(path))]
+        if not messages:
+            raise SystemExit(f"{path} is empty")
+        sources.append((path.name, messages))
+
+    check = Checker()
+    check_fixed(check)
+    for source, messages in sources:
+        check_decoders(check, source, messages)
+        asyncio.run(check_paths(check, source, messages))
+        print(f"{source}: {len(messages)} notifications")
+
+    if check.failures:
+        for failure in check.failures[:50]:
+            print(f"MISMATCH {failure}")
+        print(f"{len(check.failures)} mismatches in {check.checked} comparisons")
+        sys.exit(1)
+    print(f"ok: {check.checked} comparisons")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Synthetic Span MAIN 40 payloads matching the documented field layouts.
+
+Metric values use the panel's raw units: current in mA, voltage in mV,
+power in 1/2000 W and frequency in mHz.
+"""
+from __future__ import annotations
+
+from _bootstrap import load_package
+
+load_package()
+
+from span_panel.const import (  # noqa: E402
+    MAIN_FEED_IID,
+    METRIC_IID_OFFSET,
+    PRODUCT_GEN3_PANEL,
+    TRAIT_CIRCUIT_NAMES,
+    TRAIT_POWER_METRICS,
+    VENDOR_SPAN,
+)
+
+PANEL_RESOURCE_ID = "nt-0000-sim00"
+
+
+def encode_varint(value: int) -> bytes:
+    """Encode an integer as a varint (negative as int64 two's complement)."""
+    value &= (1 << 64) - 1
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def varint_field(field_num: int, value: int) -> bytes:
+    """Encode a varint field (tag + value)."""
+    return encode_varint(field_num << 3) + encode_varint(value)
+
+
+def bytes_field(field_num: int, value: bytes) -> bytes:
+    """Encode a length-delimited field (tag + length + value)."""
+    return encode_varint((field_num << 3) | 2) + encode_varint(len(value)) + value
+
+
+def min_max_avg(avg: int, spread: int = 0) -> bytes:
+    """Encode a {1: min, 2: max, 3: avg} stats message."""
+    spread = abs(spread)
+    return (
+        varint_field(1, avg - spread if avg < 0 else max(avg - spread, 0))
+        + varint_field(2, avg + spread)
+        + varint_field(3, avg)
+    )
+
+
+def single_phase_metric(current_ma: int, voltage_mv: int, power: int) -> bytes:
+    """Build a trait 26 single-phase (field 11) metric payload."""
+    body = (
+        bytes_field(1, min_max_avg(current_ma, current_ma // 20))
+        + bytes_field(2, min_max_avg(voltage_mv, 500))
+        + bytes_field(3, min_max_avg(power, power // 20))
+        + bytes_field(4, min_max_avg(power + power // 50))
+        + bytes_field(5, min_max_avg(power // 100))
+    )
+    return bytes_field(11, body)
+
+
+def dual_phase_metric(
+    current_a_ma: int, current_b_ma: int, voltage_mv: int, power: int
+) -> bytes:
+    """Build a trait 26 dual-phase (field 12) metric payload."""
+
+    def leg(current_ma: int) -> bytes:
+        return bytes_field(1, min_max_avg(current_ma)) + bytes_field(
+            2, min_max_avg(voltage_mv // 2)
+        )
+
+    combined = (
+        bytes_field(1, min_max_avg(current_a_ma + current_b_ma))
+        + bytes_field(2, min_max_avg(voltage_mv, 800))
+        + bytes_field(3, min_max_avg(power, power // 20))
+        + bytes_field(4, min_max_avg(power + power // 50))
+        + bytes_field(5, min_max_avg(power // 100))
+        + bytes_field(6, min_max_avg(1960))
+    )
+    body = (
+        bytes_field(1, leg(current_a_ma))
+        + bytes_field(2, leg(current_b_ma))
+        + bytes_field(3, combined)
+        + bytes_field(4, min_max_avg(60000))
+    )
+    return bytes_field(12, body)
+
+
+def main_feed_metric(power: int, voltage_mv: int, frequency_mhz: int = 60000) -> bytes:
+    """Build a trait 26 main feed (field 14) metric payload."""
+
+    def stat(value: int) -> bytes:
+        return varint_field(3, value)
+
+    def leg(leg_power: int) -> bytes:
+        return (
+            bytes_field(1, bytes_field(1, stat(1)) + bytes_field(2, stat(2)))
+            + bytes_field(
+                2, bytes_field(1, stat(5000)) + bytes_field(2, stat(voltage_mv))
+            )
+            + bytes_field(3, bytes_field(1, stat(leg_power)))
+            + bytes_field(4, stat(frequency_mhz))
+        )
+
+    half = power // 2
+    return bytes_field(14, bytes_field(1, leg(half)) + bytes_field(2, leg(half)))
+
+
+def trait_info(
+    trait_id: int,
+    instance_id: int,
+    resource_id: str = PANEL_RESOURCE_ID,
+    product_id: int = PRODUCT_GEN3_PANEL,
+) -> bytes:
+    """Build a ResourceTraitInfo with external trait info."""
+    metadata = (
+        varint_field(1, VENDOR_SPAN)
+        + varint_field(2, product_id)
+        + varint_field(3, trait_id)
+        + varint_field(4, 1)
+    )
+    info = bytes_field(1, metadata) + bytes_field(2, varint_field(1, instance_id))
+    resource = bytes_field(1, resource_id.encode())
+    external = bytes_field(1, resource) + bytes_field(2, info)
+    return bytes_field(2, external)
+
+
+def notification(
+    instance_id: int,
+    *raw_metrics: bytes,
+    trait_id: int = TRAIT_POWER_METRICS,
+    time_msec: int = 0,
+) -> bytes:
+    """Build a TraitInstanceNotification carrying raw metric payloads."""
+    metrics_list = varint_field(1, 1) + bytes_field(2, varint_field(1, time_msec))
+    for raw in raw_metrics:
+        metrics_list += bytes_field(3, raw)
+    return bytes_field(1, trait_info(trait_id, instance_id)) + bytes_field(
+        2, bytes_field(3, metrics_list)
+    )
+
+
+def instances_response(
+    circuit_ids,
+    resource_id: str = PANEL_RESOURCE_ID,
+    product_id: int = PRODUCT_GEN3_PANEL,
+) -> bytes:
+    """Build a GetInstancesResponse listing the main feed and circuits.
+
+    Each circuit gets a trait 26 (metrics) and a trait 16 (name) instance.
+    """
+    items = [
+        trait_info(TRAIT_POWER_METRICS, MAIN_FEED_IID, resource_id, product_id)
+    ]
+    for circuit_id in circuit_ids:
+        items.append(
+            trait_info(
+                TRAIT_POWER_METRICS, circuit_iid(circuit_id), resource_id, product_id
+            )
+        )
+        items.append(
+            trait_info(TRAIT_CIRCUIT_NAMES, circuit_id, resource_id, product_id)
+        )
+    return b"".join(bytes_field(1, bytes_field(1, item)) for item in items)
+
+
+def circuit_name_revision(name: str) -> bytes:
+    """Build a GetRevision response carrying a trait 16 circuit name."""
+    payload = bytes_field(1, bytes_field(4, name.encode()))
+    return bytes_field(3, bytes_field(2, payload))
+
+
+def circuit_iid(circuit_id: int) -> int:
+    """Return the trait 26 instance ID of a circuit."""
+    return circuit_id + METRIC_IID_OFFSET
+
+
+def sample_notifications(
+    single_phase: int = 30, dual_phase: int = 8, time_msec: int = 0
+) -> list[bytes]:
+    """Return one notification per circuit plus the main feed."""
+    main_raw = main_feed_metric(9_000_000, 121_500)
+    out = [notification(MAIN_FEED_IID, main_raw, time_msec=time_msec)]
+    circuit_id = 1
+    for n in range(single_phase):
+        raw = single_phase_metric(1000 + 97 * n, 120_400, 240_000 + 23_000 * n)
+        out.append(notification(circuit_iid(circuit_id), raw, time_msec=time_msec))
+        circuit_id += 1
+    for n in range(dual_phase):
+        raw = dual_phase_metric(
+            8000 + 300 * n, 7900 + 300 * n, 241_000, 3_800_000 + 50_000 * n
+        )
+        out.append(notification(circuit_iid(circuit_id), raw, time_msec=time_msec))
+        circuit_id += 1
+    return out
@@ -0,0 +1,102 @@
+"""Feed a capture file through SpanPanelClient's notification path.
+
+Usage: python tools/replay.py CAPTURE [--realtime] [--speed X] [--protobuf]
+       [--loops N]
+
+Record a capture with SpanPanelClient.start_capture(path), or with
+--capture against a live panel or the simulator:
+
+    python tools/replay.py CAPTURE --capture HOST[:PORT] --seconds 60
+
+Without --realtime the responses are processed back to back and the
+decode cost per notification is reported. Runs without Home Assistant.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from _bootstrap import load_package
+
+load_package()
+
+from span_panel import proto_decoder  # noqa: E402
+from span_panel.capture import read_capture  # noqa: E402
+from span_panel.channel_pool import POOL  # noqa: E402
+from span_panel.const import DEFAULT_PORT  # noqa: E402
+from span_panel.span_client import SpanPanelClient  # noqa: E402
+
+
+async def _record(path: str, target: str, seconds: float) -> None:
+    host, _, port = target.partition(":")
+    client = SpanPanelClient(host, int(port or DEFAULT_PORT))
+    if not await client.connect():
+        raise SystemExit(f"could not connect to {target}")
+    client.start_capture(path)
+    await client.start_streaming()
+    await asyncio.sleep(seconds)
+    records = client.stop_capture()
+    await client.disconnect()
+    await POOL.async_close_idle()
+    print(f"captured {records} responses to {path}")
+
+
+async def _replay(args: argparse.Namespace) -> None:
+    records = list(read_capture(args.capture))
+    if not records:
+        raise SystemExit("capture is empty")
+    client = SpanPanelClient("replay")
+    if args.protobuf:
+        client._protobuf_decode = proto_decoder.load()
+
+    start = time.perf_counter_ns()
+    if args.realtime:
+        first = records[0][0]
+        origin = time.monotonic_ns()
+        for timestamp_ns, data in records:
+            due = origin + (timestamp_ns - first) / args.speed
+            delay = (due - time.monotonic_ns()) / 1e9
+            if delay > 0:
+                await asyncio.sleep(delay)
+            client._process_notification(data)
+    else:
+        for _ in range(args.loops):
+            for _, data in records:
+                client._process_notification(data)
+    elapsed_ns = time.perf_counter_ns() - start
+
+    processed = len(records) * (1 if args.realtime else args.loops)
+    span_s = (records[-1][0] - records[0][0]) / 1e9
+    print(f"{len(records)} responses over {span_s:.1f}s, decoder {client.decoder}")
+    print(f"{processed} processed in {elapsed_ns / 1e9:.3f}s", end="")
+    if not args.realtime:
+        print(f" ({elapsed_ns / processed / 1000:.2f} us/notification)", end="")
+    print()
+    print(f"header cache: {client.header_cache_stats}")
+    data = client.data
+    main_feed = data.main_feed
+    print(f"main feed: {main_feed.power_w:.1f} W, {main_feed.voltage_v:.1f} V")
+    for circuit_id, metrics in data.metrics.items():
+        print(f"  circuit {circuit_id:2d}: {metrics.power_w:9.1f} W")
+    client._dispatcher.cancel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture")
+    parser.add_argument("--realtime", action="store_true")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--loops", type=int, default=1)
+    parser.add_argument("--protobuf", action="store_true")
+    parser.add_argument("--capture", dest="record", metavar="HOST[:PORT]")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    args = parser.parse_args()
+    if args.record:
+        asyncio.run(_record(args.capture, args.record, args.seconds))
+    else:
+        asyncio.run(_replay(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Local stand-in for a Span MAIN 40 gRPC service.
+
+Usage: python tools/simulator.py [--port 50065] [--single-phase 30]
+       [--dual-phase 8] [--rate 1] [--replay FILE] [--gateway]
+       [fault options]
+
+Serves GetInstances, GetRevision and Subscribe on TraitHandlerService, so
+SpanPanelClient (and the integration) can point at it unchanged. Subscribe
+streams synthetic metrics for the configured circuits, or replays recorded
+notifications. --replay takes a capture file (see tools/replay.py) or a
+varint length-delimited file of raw TraitInstanceNotification messages.
+
+Fault injection: --stall-after keeps the stream open but silent,
+--disconnect-after aborts it with UNAVAILABLE, and --malformed-rate
+corrupts a share of the frames.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+import grpc
+
+from _bootstrap import load_package
+
+load_package()
+
+from span_panel.capture import is_capture, read_capture  # noqa: E402
+from span_panel.const import (  # noqa: E402
+    GRPC_SERVICE,
+    MAIN_FEED_IID,
+    PRODUCT_GEN3_GATEWAY,
+    PRODUCT_GEN3_PANEL,
+)
+from span_panel.span_client import _extract  # noqa: E402
+
+import payloads  # noqa: E402
+
+
+@dataclass
+class Faults:
+    """Fault injection settings; times are seconds into each stream."""
+
+    stall_after: float | None = None
+    stall_for: float = 3600.0
+    disconnect_after: float | None = None
+    malformed_rate: float = 0.0
+
+
+def load_frames(path: str) -> list[bytes]:
+    """Read recorded notifications from a capture or delimited file."""
+    if is_capture(path):
+        return [data for _, data in read_capture(path)]
+    return read_delimited(path)
+
+
+def read_delimited(path: str) -> list[bytes]:
+    """Read a file of varint length-delimited messages."""
+    with open(path, "rb") as file:
+        data = file.read()
+    frames = []
+    pos = 0
+    while pos < len(data):
+        length = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        frames.append(data[pos : pos + length])
+        pos += length
+    return frames
+
+
+def _malform(frame: bytes, rng: random.Random) -> bytes:
+    """Return a corrupted copy of frame (truncated, garbage or bad tag)."""
+    kind = rng.randrange(3)
+    if kind == 0:
+        return frame[: rng.randrange(1, max(2, len(frame)))]
+    if kind == 1:
+        return rng.randbytes(len(frame))
+    # Field 1 with an invalid wire type (7)
+    return b"\x0f" + frame[1:]
+
+
+class _SyntheticCircuit:
+    """Random-walk load for one circuit."""
+
+    def __init__(
+        self, circuit_id: int, dual_phase: bool, rng: random.Random
+    ) -> None:
+        self.circuit_id = circuit_id
+        self.dual_phase = dual_phase
+        self.watts = rng.uniform(5, 3000 if dual_phase else 1200)
+        self._rng = rng
+
+    def frame(self, time_msec: int) -> bytes:
+        """Return the next notification for this circuit."""
+        rng = self._rng
+        self.watts = max(0.0, self.watts * rng.uniform(0.9, 1.1) + rng.uniform(-5, 5))
+        power = int(self.watts * 2000)
+        if self.dual_phase:
+            voltage_mv = rng.randint(238_000, 244_000)
+            leg_ma = int(self.watts / voltage_mv * 1_000_000)
+            raw = payloads.dual_phase_metric(leg_ma, leg_ma, voltage_mv, power)
+        else:
+            voltage_mv = rng.randint(119_000, 122_000)
+            current_ma = int(self.watts / voltage_mv * 1_000_000)
+            raw = payloads.single_phase_metric(current_ma, voltage_mv, power)
+        return payloads.notification(
+            payloads.circuit_iid(self.circuit_id), raw, time_msec=time_msec
+        )
+
+
+class PanelSimulator:
+    """TraitHandlerService implementation backed by synthetic or recorded data."""
+
+    def __init__(
+        self,
+        single_phase: int = 30,
+        dual_phase: int = 8,
+        rate: float = 1.0,
+        replay: list[bytes] | None = None,
+        faults: Faults | None = None,
+        seed: int | None = None,
+        product_id: int = PRODUCT_GEN3_PANEL,
+    ) -> None:
+        """Initialize the simulator.
+
+        rate is how many times per second every circuit reports; product_id
+        is the product the discovered traits claim to belong to.
+        """
+        self._product_id = product_id
+        self._rng = random.Random(seed)
+        self._rate = rate
+        self._replay = replay
+        self._faults = faults or Faults()
+        self._circuits = [
+            _SyntheticCircuit(n + 1, n >= single_phase, self._rng)
+            for n in range(single_phase + dual_phase)
+        ]
+        self._server: grpc.aio.Server | None = None
+        self.frames_sent = 0
+
+    async def get_instances(self, request: bytes, context) -> bytes:
+        """Handle GetInstances."""
+        return payloads.instances_response(
+            (c.circuit_id for c in self._circuits), product_id=self._product_id
+        )
+
+    async def get_revision(self, request: bytes, context) -> bytes:
+        """Handle GetRevision (only trait 16 circuit names are served)."""
+        circuit_id = _extract(request, (2, 2, 1), 0)
+        return payloads.circuit_name_revision(f"Sim Circuit {circuit_id}")
+
+    def _synthetic_rounds(self) -> Iterator[list[bytes]]:
+        """Yield one round of notifications (main feed + all circuits)."""
+        while True:
+            time_msec = int(time.time() * 1000)
+            frames = [circuit.frame(time_msec) for circuit in self._circuits]
+            total = int(sum(circuit.watts for circuit in self._circuits) * 2000)
+            voltage_mv = 121_000 + self._rng.randint(-500, 500)
+            main = payloads.main_feed_metric(total, voltage_mv)
+            frames.insert(
+                0, payloads.notification(MAIN_FEED_IID, main, time_msec=time_msec)
+            )
+            yield frames
+
+    def _replay_rounds(self) -> Iterator[list[bytes]]:
+        """Yield the recorded frames in rounds of one frame per instance."""
+        while True:
+            round_: list[bytes] = []
+            seen: set[int] = set()
+            for frame in self._replay:
+                iid = _extract(frame, (1, 2, 2, 2, 1), None)
+                if iid in seen:
+                    yield round_
+                    round_, seen = [], set()
+                seen.add(iid)
+                round_.append(frame)
+            if round_:
+                yield round_
+
+    async def subscribe(self, request: bytes, context):
+        """Handle Subscribe: stream notifications until the client leaves."""
+        faults = self._faults
+        started = time.monotonic()
+        interval = 1 / self._rate if self._rate > 0 else 0
+        rounds = self._replay_rounds() if self._replay else self._synthetic_rounds()
+        stalled = False
+        for frames in rounds:
+            elapsed = time.monotonic() - started
+            if (
+                faults.disconnect_after is not None
+                and elapsed >= faults.disconnect_after
+            ):
+                await context.abort(grpc.StatusCode.UNAVAILABLE, "simulated disconnect")
+            if (
+                not stalled
+                and faults.stall_after is not None
+                and elapsed >= faults.stall_after
+            ):
+                stalled = True
+                await asyncio.sleep(faults.stall_for)
+            for frame in frames:
+                if faults.malformed_rate and self._rng.random() < faults.malformed_rate:
+                    frame = _malform(frame, self._rng)
+                self.frames_sent += 1
+                yield frame
+            await asyncio.sleep(interval)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start serving; returns the bound port (0 picks a free one)."""
+        # No (de)serializers: requests and responses stay raw bytes
+        handler = grpc.method_handlers_generic_handler(
+            GRPC_SERVICE,
+            {
+                "GetInstances": grpc.unary_unary_rpc_method_handler(
+                    self.get_instances
+                ),
+                "GetRevision": grpc.unary_unary_rpc_method_handler(self.get_revision),
+                "Subscribe": grpc.unary_stream_rpc_method_handler(self.subscribe),
+            },
+        )
+        self._server = grpc.aio.server()
+        self._server.add_generic_rpc_handlers((handler,))
+        bound = self._server.add_insecure_port(f"{host}:{port}")
+        await self._server.start()
+        return bound
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._server is not None:
+            await self._server.stop(grace=None)
+            self._server = None
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    replay = load_frames(args.replay) if args.replay else None
+    faults = Faults(
+        stall_after=args.stall_after,
+        stall_for=args.stall_for,
+        disconnect_after=args.disconnect_after,
+        malformed_rate=args.malformed_rate,
+    )
+    simulator = PanelSimulator(
+        args.single_phase,
+        args.dual_phase,
+        args.rate,
+        replay,
+        faults,
+        args.seed,
+        PRODUCT_GEN3_GATEWAY if args.gateway else PRODUCT_GEN3_PANEL,
+    )
+    port = await simulator.start(args.host, args.port)
+    print(f"Simulated panel listening on {args.host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=50065)
+    parser.add_argument("--single-phase", type=int, default=30)
+    parser.add_argument("--dual-phase", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=1.0, help="rounds per second")
+    parser.add_argument("--replay", help="recorded notifications to stream instead")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--gateway", action="store_true", help="present as a Gen3 gateway"
+    )
+    parser.add_argument("--stall-after", type=float, help="seconds, per stream")
+    parser.add_argument("--stall-for", type=float, default=3600.0)
+    parser.add_argument("--disconnect-after", type=float, help="seconds, per stream")
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()